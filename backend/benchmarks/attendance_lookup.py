@@ -0,0 +1,71 @@
+"""
+Per-child attendance lookups over one day document, the way
+get_attendance_by_date resolves every child: the old children.index(cid)
+scan per child against attendance_store.day_records built once, on both
+the legacy parallel lists and the records map.
+
+    cd backend && python -m benchmarks.attendance_lookup [--sizes 100 500 2000]
+"""
+import argparse
+import timeit
+
+from tests.support import configure_environment
+
+configure_environment()
+
+from services import attendance_store  # noqa: E402
+from benchmarks.timing import print_table  # noqa: E402
+
+
+def legacy_day(size: int) -> dict:
+    children = [f"child-{i:05d}" for i in range(size)]
+    return {"children": children, "childrenimage": [f"https://img/{cid}.jpg" for cid in children]}
+
+
+def records_day(size: int) -> dict:
+    return {"records": {f"child-{i:05d}": {"image": f"https://img/child-{i:05d}.jpg"} for i in range(size)}}
+
+
+def list_index_lookups(data: dict, childids: list) -> list:
+    children = data.get("children", [])
+    images = data.get("childrenimage", [])
+    return [
+        (cid, cid in children, images[children.index(cid)] if cid in children else "null")
+        for cid in childids
+    ]
+
+
+def day_records_lookups(data: dict, childids: list) -> list:
+    records = attendance_store.day_records(data)
+    return [(cid, cid in records, attendance_store.record_image(records, cid)) for cid in childids]
+
+
+def best_of(fn, *args, repeat: int = 5) -> float:
+    number = 3
+    return min(timeit.repeat(lambda: fn(*args), number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000])
+    args = parser.parse_args()
+
+    rows = {}
+    for size in args.sizes:
+        legacy, records = legacy_day(size), records_day(size)
+        childids = list(reversed(legacy["children"]))  # worst case for the scan
+        old = best_of(list_index_lookups, legacy, childids)
+        new_legacy = best_of(day_records_lookups, legacy, childids)
+        new_records = best_of(day_records_lookups, records, childids)
+        rows[f"{size} children"] = {
+            "list.index_ms": round(old * 1000, 3),
+            "lists_dict_ms": round(new_legacy * 1000, 3),
+            "records_ms": round(new_records * 1000, 3),
+            "speedup": f"{old / new_legacy:.0f}x",
+        }
+
+    print_table("Resolving every child of one attendance day", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Throughput of audio_format.to_linear16 on 30 s WAV recordings in the
+shapes phones and browsers send, through audioop where the runtime has it
+and through the pure-Python array fallback used from Python 3.13 on.
+Reported as audio seconds converted per wall-clock second.
+
+    cd backend && python -m benchmarks.audio_conversion [--seconds 30]
+"""
+import argparse
+import time
+
+from tests.support import configure_environment
+
+configure_environment()
+
+from services import audio_format  # noqa: E402
+from tests import audio_samples  # noqa: E402
+from benchmarks.timing import print_table  # noqa: E402
+
+SHAPES = {
+    "16 kHz mono 16-bit": dict(rate=16000),
+    "44.1 kHz stereo 16-bit": dict(rate=44100, channels=2),
+    "48 kHz stereo 24-bit": dict(rate=48000, channels=2, width=3),
+    "96 kHz mono 16-bit": dict(rate=96000),
+    "48 kHz mono float32": dict(rate=48000, float=True),
+}
+
+
+def build(seconds: float, rate: int, channels: int = 1, width: int = 2, float: bool = False) -> bytes:
+    samples = audio_samples.sine(rate, seconds=seconds, frequency=300)
+    if float:
+        return audio_samples.float_wav(samples, rate=rate)
+    return audio_samples.wav(samples, rate=rate, width=width, channels=channels)
+
+
+def throughput(content: bytes, seconds: float) -> dict:
+    info = audio_format.detect(content)
+    started = time.perf_counter()
+    pcm, rate = audio_format.to_linear16(content, info)
+    elapsed = time.perf_counter() - started
+    return {
+        "in_MB": round(len(content) / 1e6, 2),
+        "out_rate": rate,
+        "ms": round(elapsed * 1000, 1),
+        "audio_s_per_s": round(seconds / elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30)
+    args = parser.parse_args()
+
+    inputs = {label: build(args.seconds, **shape) for label, shape in SHAPES.items()}
+    audioop = audio_format.audioop
+    backends = {"audioop": audioop, "array fallback": None} if audioop else {"array fallback": None}
+
+    for backend, module in backends.items():
+        audio_format.audioop = module
+        print_table(f"to_linear16 via {backend}, {args.seconds:g} s clips", {
+            label: throughput(content, args.seconds) for label, content in inputs.items()
+        })
+    audio_format.audioop = audioop
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Throughput of /profile and /findchats under concurrent load: the old
+controllers (module-level sync firestore.client() called from async def
+routes) against the current ones on the async client. Both run against
+the in-memory Firestore fake with the same per-call latency, in process.
+
+    cd backend && python -m benchmarks.firestore_throughput [--latency 0.005] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import time
+
+from tests.support import configure_environment
+
+configure_environment()
+
+from fastapi import Depends, FastAPI, HTTPException  # noqa: E402
+from controllers.chat_controller import router as chat_router  # noqa: E402
+from controllers.profile_controller import router as profile_router  # noqa: E402
+from services.firebase_auth import get_current_user  # noqa: E402
+from tests.fakes import FakeFirestore, FakeSyncFirestore  # noqa: E402
+from tests.support import asgi_client, build_app  # noqa: E402
+from benchmarks.timing import print_table, summarize  # noqa: E402
+
+USER = "parent-0"
+CHATS = 10
+
+
+def seed(db):
+    db.seed(f"users/{USER}", {"name": "Parent", "email": "parent@example.com", "role": "parent"})
+    for i in range(CHATS):
+        teacher = f"teacher-{i}"
+        db.seed(f"users/{teacher}", {"name": f"Teacher {i}", "profilepic": ""})
+        db.seed(f"chat/chat-{i}", {"userID1": USER, "userID2": teacher, "lastMessage": "hi", "unread": {USER: i % 2, teacher: 0}})
+        db.seed(f"chat/chat-{i}/messages/m-{i}", {"sender": teacher, "receiver": USER, "isRead": i % 2 == 0})
+    return db
+
+
+def old_app(db) -> FastAPI:
+    """
+    /profile and /findchats as they were before the async client.
+    """
+    app = FastAPI()
+    app.dependency_overrides[get_current_user] = lambda: {"uid": USER}
+
+    @app.get("/profile")
+    async def get_profile(user=Depends(get_current_user)):
+        uid = user.get("uid")
+        doc = db.collection("users").document(uid).get()
+        if not doc.exists:
+            raise HTTPException(status_code=404, detail="User not found")
+        profile = doc.to_dict()
+        return {"user_id": uid, "email": profile.get("email"), "role": profile.get("role"), "name": profile.get("name")}
+
+    @app.get("/findchats")
+    async def find_chats(user_data=Depends(get_current_user)):
+        user_id = user_data["uid"]
+        chats_ref = db.collection("chat")
+        query1 = chats_ref.where("userID1", "==", user_id).stream()
+        query2 = chats_ref.where("userID2", "==", user_id).stream()
+
+        chats = []
+        for doc in list(query1) + list(query2):
+            chat_data = doc.to_dict()
+            chat_data["id"] = doc.id
+            other_user_id = chat_data["userID2"] if chat_data["userID1"] == user_id else chat_data["userID1"]
+            other_user_doc = db.collection("users").document(other_user_id).get()
+            chat_data["otherUserName"] = other_user_doc.to_dict().get("name") if other_user_doc.exists else "Unknown User"
+            messages_ref = db.collection("chat").document(doc.id).collection("messages")
+            unread = messages_ref.where("receiver", "==", user_id).where("isRead", "==", False).limit(1).stream()
+            chat_data["isRead"] = not any(True for _ in unread)
+            chats.append(chat_data)
+        return chats
+
+    return app
+
+
+async def load(app, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = iter(range(requests))
+
+    async with asgi_client(app) as client:
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return dict(summarize(latencies), req_per_s=round(requests / elapsed, 1))
+
+
+async def run(args):
+    old = old_app(seed(FakeSyncFirestore(latency=args.latency)))
+    new = build_app(seed(FakeFirestore(latency=args.latency)), profile_router, chat_router, uid=USER)
+
+    for path in ("/profile", "/findchats"):
+        print_table(f"GET {path}: {args.requests} requests, {args.concurrency} concurrent, {args.latency * 1000:g} ms per Firestore call", {
+            "sync client": await load(old, path, args.requests, args.concurrency),
+            "async client": await load(new, path, args.requests, args.concurrency),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per Firestore call")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import time
+
+
+def percentile(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def summarize(samples: list) -> dict:
+    """
+    p50/p99/mean of latency samples in seconds, reported in milliseconds.
+    """
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+    }
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def print_table(title: str, rows: dict):
+    print(f"\n📊 {title}")
+    columns = list(next(iter(rows.values())))
+    width = max(len(label) for label in rows) + 2
+    print("".ljust(width) + "".join(column.rjust(14) for column in columns))
+    for label, row in rows.items():
+        print(label.ljust(width) + "".join(str(row[column]).rjust(14) for column in columns))
@@ -0,0 +1,48 @@
+"""
+p50/p99 latency of FirebaseAuthService.verify_token with the verified-token
+cache on and off, for a pool of users each making several requests.
+Certs are served locally, so "off" is the signature check alone; the old
+auth.verify_id_token path also went over HTTP for certs and is slower still.
+
+    cd backend && python -m benchmarks.token_cache [--users 200] [--requests 20]
+"""
+import argparse
+import random
+
+from tests.support import configure_environment, FakeCertEndpoint, TokenIssuer
+
+configure_environment()
+
+from services import firebase_auth  # noqa: E402
+from services.cache import TTLCache  # noqa: E402
+from benchmarks.timing import print_table, summarize, timed  # noqa: E402
+
+
+def run(tokens: list, cache: TTLCache) -> dict:
+    firebase_auth.token_cache = cache
+    samples = [timed(firebase_auth.FirebaseAuthService.verify_token, token) for token in tokens]
+    return dict(summarize(samples), hit_rate=cache.stats()["hit_rate"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="requests per user")
+    args = parser.parse_args()
+
+    issuer = TokenIssuer()
+    firebase_auth.cert_store._request = FakeCertEndpoint(issuer.certs())
+    firebase_auth.cert_store.refresh()
+
+    user_tokens = [issuer.token(uid=f"user-{i}") for i in range(args.users)]
+    traffic = user_tokens * args.requests
+    random.Random(0).shuffle(traffic)
+
+    print_table(f"verify_token, {args.users} users x {args.requests} requests", {
+        "cache off": run(traffic, TTLCache(maxsize=0)),
+        "cache on": run(traffic, TTLCache(maxsize=firebase_auth.TOKEN_CACHE_SIZE)),
+    })
+
+
+if __name__ == "__main__":
+    main()
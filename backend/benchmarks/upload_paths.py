@@ -0,0 +1,121 @@
+"""
+Peak RSS and latency of a document upload sent as a base64 data-URL in
+JSON (/createdocument) against the same file as a multipart part
+(/createdocument/upload). Each path runs in its own process so the peak
+RSS of one does not hide the other. Storage is a stand-in that reads the
+file in Cloudinary-sized chunks and discards it, and Firestore is the
+in-memory fake, so the numbers are the app's own cost. The base64 path
+grows with the file; the multipart one stays near two upload chunks.
+
+    cd backend && python -m benchmarks.upload_paths [--size-mb 10] [--requests 5]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from tests.support import BACKEND_DIR, configure_environment
+
+configure_environment()
+
+from controllers import document_controller  # noqa: E402
+from controllers.document_controller import router as document_router  # noqa: E402
+from services import media_upload  # noqa: E402
+from services.media_upload import MediaUploader  # noqa: E402
+from tests.fakes import FakeFirestore  # noqa: E402
+from tests.support import asgi_client, build_app  # noqa: E402
+from benchmarks.timing import print_table, summarize  # noqa: E402
+
+PATHS = ("base64", "multipart")
+
+
+def discard_upload(file, **options) -> dict:
+    """
+    Consumes the upload the way upload_large does, a chunk at a time.
+    """
+    size = len(file) if isinstance(file, (bytes, bytearray)) else 0
+    if hasattr(file, "read"):
+        while chunk := file.read(media_upload.UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+    return {"public_id": options["public_id"], "secure_url": f"https://res.cloudinary.com/demo/raw/upload/{options['public_id']}", "bytes": size}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def measure(path: str, size: int, requests: int) -> dict:
+    media = MediaUploader(upload_fn=discard_upload)
+    media_upload.media_uploader = media
+    document_controller.media_uploader = media
+    app = build_app(FakeFirestore(), document_router)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "report.pdf")
+        with open(source, "wb") as out:
+            for _ in range(size // (1024 * 1024)):
+                out.write(os.urandom(1024 * 1024))
+
+        if path == "base64":
+            # What the app sends today: the encoded body is built on the phone
+            with open(source, "rb") as file:
+                encoded = base64.b64encode(file.read()).decode("ascii")
+            body = json.dumps({"name": "Report", "childid": "child-1", "file": f"data:application/pdf;base64,{encoded}"}).encode("utf-8")
+            del encoded
+
+            async def send(client):
+                return await client.post("/createdocument", content=body, headers={"Content-Type": "application/json"})
+        else:
+            async def send(client):
+                with open(source, "rb") as file:
+                    return await client.post(
+                        "/createdocument/upload",
+                        data={"name": "Report", "childid": "child-1"},
+                        files={"file": ("report.pdf", file, "application/pdf")},
+                    )
+
+        latencies = []
+        async with asgi_client(app) as client:
+            baseline = peak_rss_mb()
+            for _ in range(requests):
+                started = time.perf_counter()
+                response = await send(client)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+    return dict(summarize(latencies), peak_rss_mb=round(peak_rss_mb() - baseline, 1))
+
+
+def run_in_subprocess(path: str, args) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.upload_paths", "--path", path,
+         "--size-mb", str(args.size_mb), "--requests", str(args.requests)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--path", choices=PATHS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(asyncio.run(measure(args.path, args.size_mb * 1024 * 1024, args.requests))))
+        return
+
+    rows = {path: run_in_subprocess(path, args) for path in PATHS}
+    print_table(f"{args.size_mb} MB document, {args.requests} requests per path (peak RSS growth over the idle app)", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 # controllers/announcement_controller.py
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from firebase_admin import firestore
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services.pretranslation import DEFAULT_SOURCE_LANGUAGE, pretranslate_document
+from services.class_feed import list_for_class
 from pydantic import BaseModel
 from datetime import datetime
 
 router = APIRouter()
-db = firestore.client()
 
 class AnnouncementRequest(BaseModel):
     classid: str
@@ -16,11 +18,12 @@ class AnnouncementRequest(BaseModel):
     content: str
     teachername: str
     teacheruserid: str
+    language: str = DEFAULT_SOURCE_LANGUAGE
 
 @router.post("/addannouncement")
-def add_announcement(data: AnnouncementRequest, user=Depends(get_current_user)):
+async def add_announcement(data: AnnouncementRequest, background_tasks: BackgroundTasks, user=Depends(get_current_user), db=Depends(get_db)):
     doc_ref = db.collection("announcements").document()
-    doc_ref.set({
+    await doc_ref.set({
         "classid": data.classid,
         "classname": data.classname,
         "name": data.name,
@@ -30,28 +33,21 @@ def add_announcement(data: AnnouncementRequest, user=Depends(get_current_user)):
         "status": "open",
         "created": firestore.SERVER_TIMESTAMP,
     })
-    return {"success": True, "id": doc_ref.id}
 
-@router.get("/announcements/{classid}")
-def get_announcements_for_class(classid: str, user=Depends(get_current_user)):
-    announcements = (
-        db.collection("announcements")
-        .where("classid", "==", classid)
-        .stream()
+    background_tasks.add_task(
+        pretranslate_document, db, doc_ref, data.classid,
+        {"name": data.name, "content": data.content}, data.language,
     )
+    return {"success": True, "id": doc_ref.id}
 
-    result = []
-    for doc in announcements:
-        data = doc.to_dict()
-        data["id"] = doc.id
-        result.append(data)
-
-    return result
+@router.get("/announcements/{classid}")
+async def get_announcements_for_class(classid: str, lang: str = None, user=Depends(get_current_user), db=Depends(get_db)):
+    return await list_for_class(db, "announcements", classid, lang)
 
 @router.patch("/announcements/{announcement_id}/toggle")
-def toggle_announcement_status(announcement_id: str, user=Depends(get_current_user)):
+async def toggle_announcement_status(announcement_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     doc_ref = db.collection("announcements").document(announcement_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
 
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Announcement not found")
@@ -62,5 +58,5 @@ def toggle_announcement_status(announcement_id: str, user=Depends(get_current_us
         raise HTTPException(status_code=403, detail="Not allowed")
 
     new_status = "closed" if data["status"] == "open" else "open"
-    doc_ref.update({"status": new_status})
+    await doc_ref.update({"status": new_status})
     return {"status": new_status}
@@ -3,98 +3,117 @@
 from fastapi import APIRouter, Depends, HTTPException, Body, UploadFile, File, Form
 from firebase_admin import firestore
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services import attendance_store
+from services.batch_reads import get_all_in_order
+from services.media_upload import media_uploader, UploadError
+from services.image_processing import thumbnail_url
+from services.children import children_of_parent
+from pydantic import BaseModel
+from typing import List, Optional
 from datetime import datetime
-import cloudinary.uploader
+import asyncio
+import base64
+import binascii
 
 router = APIRouter()
-db = firestore.client()
 
-@router.get("/attendance-records/{child_id}")
-def get_attendance_by_child(child_id: str, user=Depends(get_current_user)):
-    attendance_ref = db.collection("attendance").stream()
-    result = {}
+# One write per child plus the day doc and the days index must fit one batch
+MAX_BULK_ENTRIES = 498
 
-    for doc in attendance_ref:
-        doc_id = doc.id
-        data = doc.to_dict()
-        result[doc_id] = child_id in data.get("children", [])
+class BulkAttendanceEntry(BaseModel):
+    childid: str
+    present: bool
+    image: Optional[str] = None  # base64 data URL
 
-    return result
+class BulkAttendanceRequest(BaseModel):
+    classid: str
+    date: str
+    entries: List[BulkAttendanceEntry]
+
+def _validate_attendance(childid: str, date: str):
+    if not childid or not date:
+        raise HTTPException(status_code=400, detail="Missing childid or date")
+    try:
+        datetime.strptime(date, "%d%m%Y")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date must be in ddmmyyyy format")
+
+def _decode_bulk_image(entry: BulkAttendanceEntry):
+    if not entry.present or not entry.image or ";base64," not in entry.image:
+        return None
+    try:
+        decoded_image = base64.b64decode(entry.image.split(";base64,", 1)[1], validate=True)
+    except (binascii.Error, ValueError):
+        decoded_image = b""
+    if not decoded_image:
+        raise HTTPException(status_code=400, detail=f"Invalid image data for child {entry.childid}")
+    return decoded_image
+
+async def _upload_attendance_image(image) -> str:
+    try:
+        upload_result = await media_uploader.upload_image(image)
+        return upload_result.get("secure_url", "null")
+    except UploadError as e:
+        print("Image upload failed:", e)
+        return "null"
+
+@router.get("/attendance-records/{child_id}")
+async def get_attendance_by_child(child_id: str, start: str = None, end: str = None, user=Depends(get_current_user), db=Depends(get_db)):
+    return await attendance_store.child_history(db, child_id, start, end)
 
 @router.get("/attendance/{date}")
-def get_attendance_by_date(date: str, childid: str = None, user=Depends(get_current_user)):
-    doc = db.collection("attendance").document(date).get()
+async def get_attendance_by_date(date: str, childid: str = None, user=Depends(get_current_user), db=Depends(get_db)):
+    refs = [attendance_store.day_ref(db, date)]
+    if childid:
+        # Fetch the day and the child together in one round trip
+        refs.append(db.collection("children").document(childid))
+    doc, *child_docs = await get_all_in_order(db, refs)
+
     if not doc.exists:
         raise HTTPException(status_code=404, detail="No attendance record for that date")
 
-    data = doc.to_dict()
-    children = data.get("children", [])
-    images = data.get("childrenimage", [])
+    records = attendance_store.day_records(doc.to_dict())
 
     if childid:
-        present = childid in children
-        image = "null"
-        if present:
-            index = children.index(childid)
-            image = images[index] if index < len(images) else "null"
+        present = childid in records
+        image = attendance_store.record_image(records, childid)
 
-        child_doc = db.collection("children").document(childid).get()
+        child_doc = child_docs[0]
         if child_doc.exists:
             child_data = child_doc.to_dict()
             return [{
                 "childid": childid,
                 "present": present,
                 "image": image,
+                "imageThumbnail": thumbnail_url(image),
                 "name": child_data.get("name", ""),
                 "class": child_data.get("class", ""),
                 "grade": child_data.get("grade", ""),
-                "profilepic": child_data.get("profilepic", "")
+                "profilepic": child_data.get("profilepic", ""),
+                "profilepicThumbnail": thumbnail_url(child_data.get("profilepic", ""))
             }]
         else:
             return []
 
-    all_children_docs = db.collection("children") \
-        .where("fatherid", "==", user["uid"]) \
-        .stream()
-    mother_docs = db.collection("children") \
-        .where("motherid", "==", user["uid"]) \
-        .stream()
-    all_docs = list(all_children_docs) + list(mother_docs)
-
-    results = []
-    for doc in all_docs:
-        cdata = doc.to_dict()
-        cid = doc.id
-        present = cid in children
-        image = "null"
-        if present:
-            index = children.index(cid)
-            image = images[index] if index < len(images) else "null"
-
-        results.append({
-            "childid": cid,
-            "present": present,
-            "image": image
-        })
-
-    return results
+    children = await children_of_parent(db, user["uid"])
+    return [attendance_store.child_attendance(records, child["id"]) for child in children]
 
 @router.get("/attendance-for-date/{date}")
-def get_attendance_for_date(date: str, user=Depends(get_current_user)):
-    doc = db.collection("attendance").document(date).get()
+async def get_attendance_for_date(date: str, user=Depends(get_current_user), db=Depends(get_db)):
+    doc = await attendance_store.day_ref(db, date).get()
     if not doc.exists:
         return []
 
-    data = doc.to_dict()
-    children = data.get("children", [])
-    images = data.get("childrenimage", [])
+    records = attendance_store.day_records(doc.to_dict())
 
     results = []
-    for index, cid in enumerate(children):
+    for cid, record in records.items():
         results.append({
             "childid": cid,
             "present": True,
-            "image": images[index] if index < len(images) else "null"
+            "image": record.get("image", "null"),
+            "imageThumbnail": thumbnail_url(record.get("image", "null"))
         })
 
     return results
@@ -105,41 +124,23 @@ async def update_attendance(
     date: str = Form(...),
     present: bool = Form(...),
     image: UploadFile = File(None),
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    db=Depends(get_db),
 ):
-    doc_ref = db.collection("attendance").document(date)
-    doc = doc_ref.get()
-
-    children = []
-    childrenimage = []
-
-    if doc.exists:
-        data = doc.to_dict()
-        children = data.get("children", [])
-        childrenimage = data.get("childrenimage", [])
-
-    if childid in children:
-        index = children.index(childid)
-        children.pop(index)
-        childrenimage.pop(index)
-
-    if present:
-        children.append(childid)
-        if image:
-            try:
-                upload_result = cloudinary.uploader.upload(image.file)
-                image_url = upload_result.get("secure_url", "null")
-            except Exception as e:
-                print("Image upload failed:", e)
-                image_url = "null"
-        else:
-            image_url = "null"
-        childrenimage.append(image_url)
+    _validate_attendance(childid, date)
+    doc_ref = attendance_store.day_ref(db, date)
+
+    image_url = "null"
+    if present and image:
+        image_url = await _upload_attendance_image(image.file)
 
-    doc_ref.set({
-        "children": children,
-        "childrenimage": childrenimage,
-    })
+    # Blind writes: no read of the day document, so each mark is O(1)
+    batch = db.batch()
+    attendance_store.mark_attendance(batch, doc_ref, {childid: image_url if present else None})
+    attendance_store.index_child(db, batch, childid, date, present)
+    attendance_store.index_day(db, batch, date)
+    await batch.commit()
+    attendance_store.day_indexed(date)
 
     return {
         "success": True,
@@ -148,38 +149,77 @@ async def update_attendance(
         "image": image_url if present else None
     }
 
+@firestore.async_transactional
+async def _toggle_in_transaction(transaction, db, doc_ref, childid: str, date: str) -> bool:
+    snapshot = await doc_ref.get(transaction=transaction)
+    records = attendance_store.day_records(snapshot.to_dict()) if snapshot.exists else {}
+
+    present = childid not in records
+    attendance_store.mark_attendance(transaction, doc_ref, {childid: "null" if present else None})
+    attendance_store.index_child(db, transaction, childid, date, present)
+    # A day document that exists was indexed when it was created
+    if not snapshot.exists:
+        attendance_store.index_day(db, transaction, date)
+    return present
+
 @router.post("/attendance/toggle")
-def toggle_attendance(data: dict = Body(...), user=Depends(get_current_user)):
+async def toggle_attendance(data: dict = Body(...), user=Depends(get_current_user), db=Depends(get_db)):
     childid = data.get("childid")
     date = data.get("date")
+    _validate_attendance(childid, date)
 
-    if not childid or not date:
-        raise HTTPException(status_code=400, detail="Missing childid or date")
+    doc_ref = attendance_store.day_ref(db, date)
+    present = await _toggle_in_transaction(db.transaction(), db, doc_ref, childid, date)
+    attendance_store.day_indexed(date)
+
+    return {"status": "present" if present else "absent"}
+
+@router.post("/attendance/bulk")
+async def bulk_update_attendance(data: BulkAttendanceRequest, user=Depends(get_current_user), db=Depends(get_db)):
+    if len(data.entries) > MAX_BULK_ENTRIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ENTRIES} entries per request")
+
+    for entry in data.entries:
+        _validate_attendance(entry.childid, data.date)
+
+    class_doc = await db.collection("class").document(data.classid).get()
+    if not class_doc.exists:
+        raise HTTPException(status_code=404, detail="Class not found")
+
+    class_children = set(class_doc.to_dict().get("children", []))
+    outsiders = [entry.childid for entry in data.entries if entry.childid not in class_children]
+    if outsiders:
+        raise HTTPException(status_code=400, detail=f"Children not in class: {', '.join(outsiders)}")
 
-    doc_ref = db.collection("attendance").document(date)
-    doc = doc_ref.get()
-
-    children = []
-    childrenimage = []
-
-    if doc.exists:
-        data = doc.to_dict()
-        children = data.get("children", [])
-        childrenimage = data.get("childrenimage", [])
-
-    if childid in children:
-        index = children.index(childid)
-        children.pop(index)
-        childrenimage.pop(index)
-        new_status = "absent"
-    else:
-        children.append(childid)
-        childrenimage.append("null")
-        new_status = "present"
-
-    doc_ref.set({
-        "children": children,
-        "childrenimage": childrenimage,
-    })
-
-    return {"status": new_status}
+    # Decode every photo up front, so one bad entry fails the request before anything is uploaded
+    images = [_decode_bulk_image(entry) for entry in data.entries]
+
+    async def upload(image) -> str:
+        return "null" if image is None else await _upload_attendance_image(image)
+
+    # Photos go to Cloudinary in parallel, then everything lands in one batch
+    image_urls = await asyncio.gather(*(upload(image) for image in images))
+
+    marks = {}
+    batch = db.batch()
+    for entry, image_url in zip(data.entries, image_urls):
+        marks[entry.childid] = image_url if entry.present else None
+        attendance_store.index_child(db, batch, entry.childid, data.date, entry.present)
+
+    attendance_store.mark_attendance(batch, attendance_store.day_ref(db, data.date), marks)
+    attendance_store.index_day(db, batch, data.date)
+    await batch.commit()
+    attendance_store.day_indexed(data.date)
+
+    return {
+        "success": True,
+        "date": data.date,
+        "results": [
+            {
+                "childid": entry.childid,
+                "present": entry.present,
+                "image": image_url if entry.present else None,
+            }
+            for entry, image_url in zip(data.entries, image_urls)
+        ],
+    }
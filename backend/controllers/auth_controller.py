@@ -3,17 +3,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from firebase_admin import firestore
 from services.firebase_auth import get_current_user
+from services.database import get_db
 
 router = APIRouter()
 
-db = firestore.client()
-
 @router.post("/registerparent")
-def register_parent(data: dict, current_user=Depends(get_current_user)):
+async def register_parent(data: dict, current_user=Depends(get_current_user), db=Depends(get_db)):
     uid = current_user["uid"]
     email = current_user["email"]
 
-    db.collection("users").document(uid).set({
+    await db.collection("users").document(uid).set({
         "name": data["name"],
         "phone": data["phone"],
         "email": email,
@@ -31,11 +30,11 @@ def register_parent(data: dict, current_user=Depends(get_current_user)):
 
 
 @router.post("/registerteacher")
-def register_teacher(data: dict, current_user=Depends(get_current_user)):
+async def register_teacher(data: dict, current_user=Depends(get_current_user), db=Depends(get_db)):
     uid = current_user["uid"]
     email = current_user["email"]
 
-    db.collection("users").document(uid).set({
+    await db.collection("users").document(uid).set({
         "name": data["name"],
         "phone": data["phone"],
         "email": email,
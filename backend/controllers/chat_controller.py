@@ -1,33 +1,48 @@
 # controllers/chat_controller.py
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, File, Form, UploadFile, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from firebase_admin import firestore
-from services.firebase_auth import get_current_user
-import cloudinary.uploader
+from services.firebase_auth import get_current_user, FirebaseAuthService
+from services.database import get_db
+from services.media_upload import media_uploader, upload_form_file, UploadTooLargeError
+from services.batch_reads import get_all_in_order
+from services.chat_hub import chat_hub
+from services.image_processing import thumbnail_url
+import asyncio
 import base64
-from datetime import datetime
+from datetime import datetime, timezone
 
 router = APIRouter()
-db = firestore.client()
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
 
 @router.get("/findchats")
-async def find_chats(user_data=Depends(get_current_user)):
+async def find_chats(user_data=Depends(get_current_user), db=Depends(get_db)):
     user_id = user_data["uid"]
     chats_ref = db.collection("chat")
 
     query1 = chats_ref.where("userID1", "==", user_id).stream()
     query2 = chats_ref.where("userID2", "==", user_id).stream()
+    chat_docs = [doc async for doc in query1] + [doc async for doc in query2]
 
-    chats = []
-    for doc in list(query1) + list(query2):
+    other_user_ids = []
+    for doc in chat_docs:
         chat_data = doc.to_dict()
-        chat_data["id"] = doc.id
-
-        other_user_id = (
+        other_user_ids.append(
             chat_data["userID2"] if chat_data["userID1"] == user_id else chat_data["userID1"]
         )
 
-        other_user_doc = db.collection("users").document(other_user_id).get()
+    # One batched read for every participant instead of a get per chat
+    user_refs = [db.collection("users").document(uid) for uid in other_user_ids]
+    other_user_docs = await get_all_in_order(db, user_refs)
+
+    chats = []
+    for doc, other_user_doc in zip(chat_docs, other_user_docs):
+        chat_data = doc.to_dict()
+        chat_data["id"] = doc.id
+
         if other_user_doc.exists:
             other_data = other_user_doc.to_dict()
             chat_data["otherUserName"] = other_data.get("name", "Unknown User")
@@ -35,81 +50,210 @@ async def find_chats(user_data=Depends(get_current_user)):
         else:
             chat_data["otherUserName"] = "Unknown User"
             chat_data["otherUserPic"] = ""
+        chat_data["otherUserPicThumbnail"] = thumbnail_url(chat_data["otherUserPic"])
 
-        messages_ref = db.collection("chat").document(doc.id).collection("messages")
-        unread = messages_ref.where("receiver", "==", user_id).where("isRead", "==", False).limit(1).stream()
-        has_unread = any(True for _ in unread)
-        chat_data["isRead"] = not has_unread
+        unread = chat_data.pop("unread", None) or {}
+        if user_id in unread:
+            chat_data["isRead"] = unread[user_id] == 0
+        else:
+            # No counter for this user yet: chats from before the counters,
+            # where only the other side has received a message since
+            messages_ref = db.collection("chat").document(doc.id).collection("messages")
+            pending = messages_ref.where("receiver", "==", user_id).where("isRead", "==", False).limit(1).stream()
+            chat_data["isRead"] = not [msg async for msg in pending]
 
         chats.append(chat_data)
 
     return chats
 
 @router.get("/findspecificchat/{chat_id}")
-async def find_specific_chat(chat_id: str, user=Depends(get_current_user)):
+async def find_specific_chat(
+    chat_id: str,
+    limit: int = None,
+    before: str = None,
+    after: str = None,
+    user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    Without paging parameters, returns the whole history (oldest first).
+    With limit/before/after, returns one page in chronological order:
+    - no cursor: the latest `limit` messages
+    - before=<cursor>: the `limit` messages older than the cursor
+    - after=<cursor>: the `limit` messages newer than the cursor
+    Cursors are message ids, taken from the `before`/`after` fields of a page.
+    """
     messages_ref = db.collection("chat").document(chat_id).collection("messages")
-    messages = messages_ref.order_by("timestamp").stream()
-    return [dict(m.to_dict()) for m in messages]
+
+    if limit is None and before is None and after is None:
+        messages = messages_ref.order_by("timestamp").stream()
+        return [dict(m.to_dict()) async for m in messages]
+
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+
+    cursor_id = before or after
+    newest_first = after is None
+    direction = firestore.Query.DESCENDING if newest_first else firestore.Query.ASCENDING
+    query = messages_ref.order_by("timestamp", direction=direction)
+
+    if cursor_id:
+        cursor = await messages_ref.document(cursor_id).get()
+        if not cursor.exists:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.start_after(cursor)
+
+    # One extra message tells us whether another page exists
+    docs = await query.limit(limit + 1).get()
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    if newest_first:
+        docs.reverse()
+
+    messages = []
+    for m in docs:
+        data = m.to_dict() | {"id": m.id}
+        data["imageThumbnail"] = thumbnail_url(data.get("image", ""))
+        messages.append(data)
+    oldest_id = docs[0].id if docs else cursor_id
+    newest_id = docs[-1].id if docs else cursor_id
+
+    return {
+        "messages": messages,
+        "before": oldest_id if (has_more or not newest_first) and docs else None,
+        "after": newest_id,
+    }
+
+async def _send_message(db, user_id: str, chat_id: str, message: str, upload_image=None):
+    """
+    Stores a message and pushes it to both users. upload_image, if given,
+    is awaited once the chat is known to exist and returns the upload result.
+    """
+    receiver = None
+    chat_ref = db.collection("chat").document(chat_id)
+    chat_doc = await chat_ref.get()
+    if chat_doc.exists:
+        chat_data = chat_doc.to_dict()
+        receiver = chat_data["userID2"] if chat_data["userID1"] == user_id else chat_data["userID1"]
+    else:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    image_url = ""
+    if upload_image is not None:
+        result = await upload_image()
+        image_url = result["secure_url"]
+
+    message_data = {
+        "sender": user_id,
+        "receiver": receiver,
+        "message": message,
+        "image": image_url,
+        "timestamp": firestore.SERVER_TIMESTAMP,
+        "isRead": False,
+    }
+    # The message and its unread count land together, so a concurrent
+    # mark-as-read sees both or neither
+    message_ref = chat_ref.collection("messages").document()
+    batch = db.batch()
+    batch.set(message_ref, message_data)
+    batch.update(chat_ref, {
+        "lastMessage": message,
+        "lastUpdated": firestore.SERVER_TIMESTAMP,
+        "lastSender": user_id,
+        f"unread.{receiver}": firestore.Increment(1),
+    })
+    await batch.commit()
+
+    await chat_hub.publish([user_id, receiver], {
+        "type": "message",
+        "chatId": chat_id,
+        "message": message_data | {
+            "id": message_ref.id,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+    })
 
 @router.post("/sendmessage")
-def send_message(data: dict = Body(...), user=Depends(get_current_user)):
+async def send_message(data: dict = Body(...), user=Depends(get_current_user), db=Depends(get_db)):
     try:
-        user_id = user["uid"]
-        chat_id = data["chatId"]
-        message = data.get("message", "")
         image = data.get("image", "")
+        upload_image = None
+        if isinstance(image, str) and image.startswith("data:image"):
+            decoded_image = base64.b64decode(image.split(";base64,")[1])
+            upload_image = lambda: media_uploader.upload_image(decoded_image)
 
-        receiver = None
-        chat_ref = db.collection("chat").document(chat_id)
-        chat_doc = chat_ref.get()
-        if chat_doc.exists:
-            chat_data = chat_doc.to_dict()
-            receiver = chat_data["userID2"] if chat_data["userID1"] == user_id else chat_data["userID1"]
-        else:
-            raise HTTPException(status_code=404, detail="Chat not found")
+        await _send_message(db, user["uid"], data["chatId"], data.get("message", ""), upload_image)
+        return {"message": "Message sent successfully"}
 
-        image_url = ""
-        if isinstance(image, str) and image.startswith("data:image"):
-            base64_str = image.split(";base64,")[1]
-            decoded_image = base64.b64decode(base64_str)
-            result = cloudinary.uploader.upload(decoded_image)
-            image_url = result["secure_url"]
-
-        message_data = {
-            "sender": user_id,
-            "receiver": receiver,
-            "message": message,
-            "image": image_url,
-            "timestamp": firestore.SERVER_TIMESTAMP,
-            "isRead": False,
-        }
-        messages_ref = chat_ref.collection("messages")
-        messages_ref.add(message_data)
-
-        chat_ref.update({
-            "lastMessage": message,
-            "lastUpdated": firestore.SERVER_TIMESTAMP,
-            "lastSender": user_id
-        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("❌ Error sending message:", e)
+        raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/sendmessage/upload")
+async def send_message_upload(
+    chatId: str = Form(...),
+    message: str = Form(""),
+    image: UploadFile = File(None),
+    user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    Multipart variant of /sendmessage: the image streams to storage from
+    its spooled file instead of arriving as a base64 string in JSON.
+    """
+    try:
+        upload_image = (lambda: upload_form_file(image, process_image=True)) if image else None
+        await _send_message(db, user["uid"], chatId, message, upload_image)
         return {"message": "Message sent successfully"}
 
+    except HTTPException:
+        raise
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print("❌ Error sending message:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@firestore.async_transactional
+async def _mark_read_in_transaction(transaction, chat_ref, user_id: str):
+    # Reading the chat doc in the transaction holds back a concurrent send
+    # (its message and Increment commit together), so the reset below can't
+    # swallow a message this query didn't see
+    await chat_ref.get(transaction=transaction)
+    unread_messages = (
+        chat_ref.collection("messages")
+        .where("receiver", "==", user_id)
+        .where("isRead", "==", False)
+        .stream(transaction=transaction)
+    )
+    message_refs = [msg.reference async for msg in unread_messages]
+
+    for msg_ref in message_refs:
+        transaction.update(msg_ref, {"isRead": True})
+    transaction.update(chat_ref, {f"unread.{user_id}": 0})
+
 @router.post("/markread/{chat_id}")
-def mark_chat_as_read(chat_id: str, user=Depends(get_current_user)):
+async def mark_chat_as_read(chat_id: str, user=Depends(get_current_user), db=Depends(get_db)):
+    user_id = user["uid"]
+    chat_ref = db.collection("chat").document(chat_id)
+    chat_doc = await chat_ref.get()
+    if not chat_doc.exists:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
     try:
-        user_id = user["uid"]
-        messages_ref = db.collection("chat").document(chat_id).collection("messages")
-        unread_messages = messages_ref.where("receiver", "==", user_id).where("isRead", "==", False).stream()
+        await _mark_read_in_transaction(db.transaction(), chat_ref, user_id)
 
-        batch = db.batch()
-        for msg in unread_messages:
-            msg_ref = msg.reference
-            batch.update(msg_ref, {"isRead": True})
-        batch.commit()
+        chat_data = chat_doc.to_dict()
+        await chat_hub.publish([chat_data["userID1"], chat_data["userID2"]], {
+            "type": "read",
+            "chatId": chat_id,
+            "reader": user_id,
+        })
 
         return {"message": "Marked as read"}
     except Exception as e:
@@ -117,22 +261,22 @@ def mark_chat_as_read(chat_id: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/chat/{chat_id}/otheruser")
-def get_other_user_profile(chat_id: str, user=Depends(get_current_user)):
+async def get_other_user_profile(chat_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     user_id = user["uid"]
-    chat_doc = db.collection("chat").document(chat_id).get()
+    chat_doc = await db.collection("chat").document(chat_id).get()
     if not chat_doc.exists:
         raise HTTPException(status_code=404, detail="Chat not found")
 
     chat = chat_doc.to_dict()
     other_user_id = chat["userID2"] if chat["userID1"] == user_id else chat["userID1"]
-    other_user_doc = db.collection("users").document(other_user_id).get()
+    other_user_doc = await db.collection("users").document(other_user_id).get()
     if other_user_doc.exists:
         return other_user_doc.to_dict()
     else:
         raise HTTPException(status_code=404, detail="User not found")
 
 @router.get("/startchatwith/{other_user_id}")
-async def start_chat_with(other_user_id: str, user=Depends(get_current_user)):
+async def start_chat_with(other_user_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     current_user_id = user["uid"]
 
     if current_user_id == other_user_id:
@@ -143,15 +287,70 @@ async def start_chat_with(other_user_id: str, user=Depends(get_current_user)):
     existing_query1 = chats_ref.where("userID1", "==", current_user_id).where("userID2", "==", other_user_id).stream()
     existing_query2 = chats_ref.where("userID1", "==", other_user_id).where("userID2", "==", current_user_id).stream()
 
-    for doc in list(existing_query1) + list(existing_query2):
+    async for doc in existing_query1:
+        return {"id": doc.id}
+    async for doc in existing_query2:
         return {"id": doc.id}
 
     new_chat_ref = chats_ref.document()
-    new_chat_ref.set({
+    await new_chat_ref.set({
         "userID1": current_user_id,
         "userID2": other_user_id,
         "lastMessage": "",
         "lastUpdated": datetime.now(),
+        "unread": {current_user_id: 0, other_user_id: 0},
     })
 
     return {"id": new_chat_ref.id}
+
+def _task_error(task):
+    """
+    Retrieves a finished task's exception, so it is never reported as unretrieved.
+    """
+    return task.exception() if task.done() and not task.cancelled() else None
+
+@router.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket, token: str):
+    """
+    Pushes new messages and read receipts for every chat the user is in.
+    The Firebase ID token is passed as a query parameter since browsers and
+    React Native cannot set headers on a WebSocket handshake.
+    """
+    try:
+        user = await run_in_threadpool(FirebaseAuthService.verify_token, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    async with chat_hub.connect(user["uid"]) as queue:
+        async def forward_events():
+            while True:
+                await websocket.send_json(await queue.get())
+
+        async def receive_until_closed():
+            # Client frames are only keep-alives; this loop ends on disconnect
+            try:
+                while True:
+                    await websocket.receive_text()
+            except WebSocketDisconnect:
+                pass
+
+        # Whichever side stops first ends the socket, so a failed send is not left unnoticed
+        sender = asyncio.create_task(forward_events())
+        receiver = asyncio.create_task(receive_until_closed())
+        try:
+            await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # No await here: the handler may itself be cancelled on shutdown
+            sender.cancel()
+            receiver.cancel()
+            error = _task_error(sender) or _task_error(receiver)
+
+    if error is not None:
+        print(f"❌ Chat socket for {user['uid']} failed:", repr(error))
+        try:
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        except RuntimeError:
+            pass  # already closed
@@ -1,72 +1,43 @@
 # controllers/child_controller.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from firebase_admin import firestore
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services.batch_reads import get_documents
+from services.image_processing import thumbnail_url
+from services.children import children_of_parent
 
 router = APIRouter()
-db = firestore.client()
 
 @router.get("/mychildren")
-def get_my_children(user=Depends(get_current_user)):
-    uid = user["uid"]
-
-    father_query = db.collection("children").where("fatherid", "==", uid).stream()
-    mother_query = db.collection("children").where("motherid", "==", uid).stream()
-
-    children = []
-
-    for child in father_query:
-        children.append(child.to_dict() | {"id": child.id})
-
-    for child in mother_query:
-        if child.id not in [c["id"] for c in children]:
-            children.append(child.to_dict() | {"id": child.id})
+async def get_my_children(user=Depends(get_current_user), db=Depends(get_db)):
+    children = await children_of_parent(db, user["uid"])
+    for child in children:
+        child["profilepicThumbnail"] = thumbnail_url(child.get("profilepic", ""))
 
     return children
 
 @router.get("/child/{child_id}")
-def get_child_by_id(child_id: str, user=Depends(get_current_user)):
-    doc = db.collection("children").document(child_id).get()
+async def get_child_by_id(child_id: str, user=Depends(get_current_user), db=Depends(get_db)):
+    doc = await db.collection("children").document(child_id).get()
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Child not found")
     return doc.to_dict() | {"id": doc.id}
 
 @router.get("/childrenof/{user_id}")
-def get_children_of_user(user_id: str, user=Depends(get_current_user)):
-    father_query = db.collection("children").where("fatherid", "==", user_id).stream()
-    mother_query = db.collection("children").where("motherid", "==", user_id).stream()
-
-    children = []
-    seen = set()
-
-    for child in father_query:
-        data = child.to_dict()
-        data["id"] = child.id
-        children.append(data)
-        seen.add(child.id)
-
-    for child in mother_query:
-        if child.id not in seen:
-            data = child.to_dict()
-            data["id"] = child.id
-            children.append(data)
-
-    return children
+async def get_children_of_user(user_id: str, user=Depends(get_current_user), db=Depends(get_db)):
+    return await children_of_parent(db, user_id)
 
 @router.get("/class/{class_id}/children")
-def get_children_of_class(class_id: str, user=Depends(get_current_user)):
-    class_doc = db.collection("class").document(class_id).get()
+async def get_children_of_class(class_id: str, user=Depends(get_current_user), db=Depends(get_db)):
+    class_doc = await db.collection("class").document(class_id).get()
     if not class_doc.exists:
         raise HTTPException(status_code=404, detail="Class not found")
 
     class_data = class_doc.to_dict()
     child_ids = class_data.get("children", [])
-    children_data = []
-
-    for child_id in child_ids:
-        child_doc = db.collection("children").document(child_id).get()
-        if child_doc.exists:
-            children_data.append({**child_doc.to_dict(), "id": child_doc.id})
 
-    return children_data
+    return [
+        {**child_doc.to_dict(), "id": child_doc.id}
+        for child_doc in await get_documents(db, "children", child_ids)
+    ]
@@ -1,23 +1,22 @@
 #child_mode_auth_route.py
 
 from fastapi import APIRouter, Depends, HTTPException, Body
-from firebase_admin import firestore
 from services.firebase_auth import get_current_user
+from services.database import get_db
 from pydantic import BaseModel
 
 router = APIRouter()
-db = firestore.client()
 
 class PasswordUpdateRequest(BaseModel):
     password: str
 
 @router.get("/childmode-password/{child_id}")
-def get_childmode_password(child_id: str, user=Depends(get_current_user)):
+async def get_childmode_password(child_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     """
     Fetch the child mode password stored in the child_mode_auth collection.
     Access allowed only if the user is the parent of the child.
     """
-    child_doc = db.collection("children").document(child_id).get()
+    child_doc = await db.collection("children").document(child_id).get()
     if not child_doc.exists:
         raise HTTPException(status_code=404, detail="Child not found")
 
@@ -27,19 +26,19 @@ def get_childmode_password(child_id: str, user=Depends(get_current_user)):
     if parent_id not in [child_data.get("fatherid"), child_data.get("motherid")]:
         raise HTTPException(status_code=403, detail="Unauthorized access")
 
-    password_doc = db.collection("child_mode_auth").document(child_id).get()
+    password_doc = await db.collection("child_mode_auth").document(child_id).get()
     if not password_doc.exists:
         raise HTTPException(status_code=404, detail="Password not set")
 
     return password_doc.to_dict()
 
 @router.post("/childmode-password/{child_id}")
-def update_childmode_password(child_id: str, request: PasswordUpdateRequest, user=Depends(get_current_user)):
+async def update_childmode_password(child_id: str, request: PasswordUpdateRequest, user=Depends(get_current_user), db=Depends(get_db)):
     """
     Update or set the child mode password for a given child.
     Only the parent (father or mother) can perform this operation.
     """
-    child_doc = db.collection("children").document(child_id).get()
+    child_doc = await db.collection("children").document(child_id).get()
     if not child_doc.exists:
         raise HTTPException(status_code=404, detail="Child not found")
 
@@ -49,7 +48,7 @@ def update_childmode_password(child_id: str, request: PasswordUpdateRequest, use
     if parent_id not in [child_data.get("fatherid"), child_data.get("motherid")]:
         raise HTTPException(status_code=403, detail="Unauthorized access")
 
-    db.collection("child_mode_auth").document(child_id).set({
+    await db.collection("child_mode_auth").document(child_id).set({
         "password": request.password
     })
 
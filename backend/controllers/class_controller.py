@@ -1,14 +1,14 @@
 # controllers/class_controller.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from firebase_admin import firestore
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services.document_cache import document_cache
 
 router = APIRouter()
-db = firestore.client()
 
 @router.get("/myclasses")
-def get_my_classes(user=Depends(get_current_user)):
+async def get_my_classes(user=Depends(get_current_user), db=Depends(get_db)):
     uid = user["uid"]
     print(f"🔍 Looking for classes with teacherId or subteachers containing: {uid}")
 
@@ -19,7 +19,7 @@ def get_my_classes(user=Depends(get_current_user)):
     result = []
     seen = set()
 
-    for doc in form_teacher_query:
+    async for doc in form_teacher_query:
         data = doc.to_dict()
         print(f"✅ Found as Form Teacher: {data.get('name')}")
         data["id"] = doc.id
@@ -27,7 +27,7 @@ def get_my_classes(user=Depends(get_current_user)):
         result.append(data)
         seen.add(doc.id)
 
-    for doc in sub_teacher_query:
+    async for doc in sub_teacher_query:
         if doc.id not in seen:
             data = doc.to_dict()
             print(f"✅ Found as Sub Teacher: {data.get('name')}")
@@ -39,29 +39,30 @@ def get_my_classes(user=Depends(get_current_user)):
     return result
 
 @router.get("/classbyname/{classname}")
-def get_class_by_name(classname: str, user=Depends(get_current_user)):
-    class_ref = db.collection("class").where("name", "==", classname).limit(1).stream()
-    for doc in class_ref:
-        return doc.to_dict()
-    raise HTTPException(status_code=404, detail="Class not found")
+async def get_class_by_name(classname: str, user=Depends(get_current_user), db=Depends(get_db)):
+    found = await document_cache.find_one(db, "class", "name", classname)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Class not found")
+    return found[1]
 
 @router.get("/classbynamewithid/{classname}")
-def get_class_by_name_with_id(classname: str, user=Depends(get_current_user)):
-    class_ref = db.collection("class").where("name", "==", classname).limit(1).stream()
-    for doc in class_ref:
-        return doc.to_dict() | {"id": doc.id}
-    raise HTTPException(status_code=404, detail="Class not found")
+async def get_class_by_name_with_id(classname: str, user=Depends(get_current_user), db=Depends(get_db)):
+    found = await document_cache.find_one(db, "class", "name", classname)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Class not found")
+    class_id, class_data = found
+    return class_data | {"id": class_id}
 
 @router.get("/class/{class_id}")
-def get_class_by_id(class_id: str, user=Depends(get_current_user)):
-    class_doc = db.collection("class").document(class_id).get()
-    if not class_doc.exists:
+async def get_class_by_id(class_id: str, user=Depends(get_current_user), db=Depends(get_db)):
+    class_data = await document_cache.get(db, "class", class_id)
+    if class_data is None:
         raise HTTPException(status_code=404, detail="Class not found")
 
-    return class_doc.to_dict() | {"id": class_doc.id}
+    return class_data | {"id": class_id}
 
 @router.get("/classesof/{user_id}")
-def get_classes_of_user(user_id: str, user=Depends(get_current_user)):
+async def get_classes_of_user(user_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     print(f"🔍 Looking for classes for user ID: {user_id}")
     classes_ref = db.collection("class")
 
@@ -71,14 +72,14 @@ def get_classes_of_user(user_id: str, user=Depends(get_current_user)):
     result = []
     seen = set()
 
-    for doc in form_teacher_query:
+    async for doc in form_teacher_query:
         data = doc.to_dict()
         data["id"] = doc.id
         data["role"] = "Form Teacher"
         result.append(data)
         seen.add(doc.id)
 
-    for doc in sub_teacher_query:
+    async for doc in sub_teacher_query:
         if doc.id not in seen:
             data = doc.to_dict()
             data["id"] = doc.id
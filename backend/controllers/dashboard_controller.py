@@ -0,0 +1,93 @@
+# controllers/dashboard_controller.py
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from services.firebase_auth import get_current_user
+from services.database import get_db
+from services import attendance_store
+from services.children import children_of_parent
+from services.class_feed import list_for_class
+from services.document_cache import document_cache
+from services.image_processing import thumbnail_url
+from services.profiles import load_profile
+from datetime import datetime
+import asyncio
+import hashlib
+import json
+
+router = APIRouter(tags=["Dashboard"])
+
+async def _class_feed(db, classname: str, lang: str):
+    found = await document_cache.find_one(db, "class", "name", classname)
+    if found is None:
+        return None
+
+    classid, class_data = found
+    homework, announcements = await asyncio.gather(
+        list_for_class(db, "homework", classid, lang),
+        list_for_class(db, "announcements", classid, lang),
+    )
+    return {
+        "classid": classid,
+        "name": classname,
+        "teacherId": class_data.get("teacherId"),
+        "homework": homework,
+        "announcements": announcements,
+    }
+
+@router.get("/dashboard/parent")
+async def get_parent_dashboard(request: Request, date: str = None, lang: str = None, user=Depends(get_current_user), db=Depends(get_db)):
+    """
+    Everything the parent home screen shows, in one round trip: profile,
+    children, their schools, the day's attendance and each class's homework
+    and announcements. Children are resolved once; the reads that depend on
+    them run concurrently. Responds 304 when the client's ETag still matches.
+    """
+    date = date or datetime.now().strftime("%d%m%Y")
+    try:
+        datetime.strptime(date, "%d%m%Y")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date must be in ddmmyyyy format")
+
+    uid = user["uid"]
+    profile, children, day_doc = await asyncio.gather(
+        load_profile(db, uid),
+        children_of_parent(db, uid),
+        attendance_store.day_ref(db, date).get(),
+    )
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    school_names = sorted({child["school"] for child in children if child.get("school")})
+    class_names = sorted({child["class"] for child in children if child.get("class")})
+    schools, *classes = await asyncio.gather(
+        document_cache.get_many(db, "schoolapi", school_names),
+        *(_class_feed(db, classname, lang) for classname in class_names),
+    )
+    class_ids = {feed["name"]: feed["classid"] for feed in classes if feed}
+
+    records = attendance_store.day_records(day_doc.to_dict()) if day_doc.exists else {}
+    attendance = []
+    for child in children:
+        child["profilepicThumbnail"] = thumbnail_url(child.get("profilepic", ""))
+        child["classid"] = class_ids.get(child.get("class"))
+        attendance.append(attendance_store.child_attendance(records, child["id"]))
+
+    payload = jsonable_encoder({
+        "profile": profile,
+        "children": children,
+        "schools": [info | {"school_name": name} for name, info in schools],
+        "attendance": {"date": date, "records": attendance},
+        "classes": [feed for feed in classes if feed],
+    })
+
+    # The reads still happen; an unchanged dashboard just isn't sent again.
+    # Keys are sorted because Firestore does not keep field order stable.
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    etag = f'"{hashlib.sha256(canonical.encode("utf-8")).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=payload, headers=headers)
@@ -1,21 +1,21 @@
 # controllers/document_controller.py
 
-from fastapi import APIRouter, Depends, HTTPException, Body
-from firebase_admin import firestore
+from fastapi import APIRouter, Depends, HTTPException, Body, File, Form, UploadFile
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services.media_upload import media_uploader, upload_form_file, UploadTooLargeError
 from datetime import datetime
+import asyncio
 import base64
-import cloudinary.uploader
 
 router = APIRouter()
-db = firestore.client()
 
 @router.get("/documents/{childid}")
-def get_documents_for_child(childid: str, user=Depends(get_current_user)):
+async def get_documents_for_child(childid: str, user=Depends(get_current_user), db=Depends(get_db)):
     docs = db.collection("documents").where("childrenid", "==", childid).stream()
 
     results = []
-    for doc in docs:
+    async for doc in docs:
         data = doc.to_dict()
         data["id"] = doc.id
         results.append(data)
@@ -23,9 +23,9 @@ def get_documents_for_child(childid: str, user=Depends(get_current_user)):
     return results
 
 @router.patch("/documents/{doc_id}/toggle")
-def toggle_document_status(doc_id: str, user=Depends(get_current_user)):
+async def toggle_document_status(doc_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     doc_ref = db.collection("documents").document(doc_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Document not found")
 
@@ -34,60 +34,90 @@ def toggle_document_status(doc_id: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not allowed")
 
     new_status = "closed" if data["status"] == "open" else "open"
-    doc_ref.update({"status": new_status})
+    await doc_ref.update({"status": new_status})
     return {"status": new_status}
 
+async def _create_document(db, user_id: str, doc: dict, uploads: dict) -> dict:
+    """
+    Runs the pending image/file uploads side by side, then stores the document.
+    """
+    results = dict(zip(uploads, await asyncio.gather(*uploads.values(), return_exceptions=True)))
+    for kind, result in results.items():
+        if isinstance(result, UploadTooLargeError):
+            raise HTTPException(status_code=413, detail=str(result))
+        if isinstance(result, Exception):
+            print(f"❌ Document {kind} upload failed:", result)
+            raise HTTPException(status_code=500, detail=f"{kind.capitalize()} upload failed")
+    image_url = results.get("image", {}).get("secure_url", "")
+    file_url = results.get("file", {}).get("secure_url", "")
+
+    new_doc = {
+        "name": doc.get("name", ""),
+        "content": doc.get("content", ""),
+        "image": image_url,
+        "file": file_url,
+        "status": "open",
+        "createdby": user_id,
+        "childrenid": doc.get("childid"),
+        "created": datetime.now(),
+    }
+
+    created_ref = db.collection("documents").document()
+    await created_ref.set(new_doc)
+
+    return {"message": "Document created", "id": created_ref.id}
+
 @router.post("/createdocument")
-def create_document(doc: dict = Body(...), user=Depends(get_current_user)):
+async def create_document(doc: dict = Body(...), user=Depends(get_current_user), db=Depends(get_db)):
     try:
-        image_url = ""
-        file_url = ""
-
+        uploads = {}
         image_data = doc.get("image")
         if isinstance(image_data, str) and "base64" in image_data:
-            try:
-                base64_str = image_data.split(";base64,")[1]
-                decoded_image = base64.b64decode(base64_str)
-
-                result = cloudinary.uploader.upload(
-                    decoded_image,
-                    folder="documentation/images",
-                    resource_type="image"
-                )
-                image_url = result.get("secure_url", "")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail="Image upload failed")
+            decoded_image = base64.b64decode(image_data.split(";base64,")[1])
+            uploads["image"] = media_uploader.upload_image(
+                decoded_image, folder="documentation/images", resource_type="image"
+            )
 
         file_data = doc.get("file")
         if isinstance(file_data, str) and "base64" in file_data:
-            try:
-                base64_str = file_data.split(";base64,")[1]
-                decoded_file = base64.b64decode(base64_str)
-
-                result = cloudinary.uploader.upload(
-                    decoded_file,
-                    folder="documentation/files",
-                    resource_type="raw"
-                )
-                file_url = result.get("secure_url", "")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail="File upload failed")
-
-        new_doc = {
-            "name": doc.get("name", ""),
-            "content": doc.get("content", ""),
-            "image": image_url,
-            "file": file_url,
-            "status": "open",
-            "createdby": user["uid"],
-            "childrenid": doc.get("childid"),
-            "created": datetime.now(),
-        }
-
-        created_ref = db.collection("documents").document()
-        created_ref.set(new_doc)
-
-        return {"message": "Document created", "id": created_ref.id}
+            decoded_file = base64.b64decode(file_data.split(";base64,")[1])
+            uploads["file"] = media_uploader.upload(
+                decoded_file, folder="documentation/files", resource_type="raw"
+            )
+
+        return await _create_document(db, user["uid"], doc, uploads)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/createdocument/upload")
+async def create_document_upload(
+    name: str = Form(""),
+    content: str = Form(""),
+    childid: str = Form(None),
+    image: UploadFile = File(None),
+    file: UploadFile = File(None),
+    user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    Multipart variant of /createdocument: image and file arrive as file
+    parts and stream to storage without a base64 copy in memory.
+    """
+    uploads = {}
+    if image:
+        uploads["image"] = upload_form_file(
+            image, process_image=True, folder="documentation/images", resource_type="image"
+        )
+    if file:
+        uploads["file"] = upload_form_file(file, folder="documentation/files", resource_type="raw")
+
+    try:
+        doc = {"name": name, "content": content, "childid": childid}
+        return await _create_document(db, user["uid"], doc, uploads)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,14 @@
 # controllers/homework_controller.py
 
-from fastapi import APIRouter, Depends, HTTPException, Body
-from firebase_admin import firestore
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services.pretranslation import DEFAULT_SOURCE_LANGUAGE, pretranslate_document
+from services.class_feed import list_for_class
 from datetime import datetime
 from pydantic import BaseModel
 
 router = APIRouter()
-db = firestore.client()
 
 class HomeworkRequest(BaseModel):
     classid: str
@@ -16,13 +17,14 @@ class HomeworkRequest(BaseModel):
     duedate: str  # ISO format or convertable
     subject: str
     teacherid: str
+    language: str = DEFAULT_SOURCE_LANGUAGE
 
 @router.post("/addhomework")
-def add_homework(data: HomeworkRequest, user=Depends(get_current_user)):
+async def add_homework(data: HomeworkRequest, background_tasks: BackgroundTasks, user=Depends(get_current_user), db=Depends(get_db)):
     try:
         duedate_obj = datetime.fromisoformat(data.duedate.replace("Z", "+00:00"))
         homework_ref = db.collection("homework").document()
-        homework_ref.set({
+        await homework_ref.set({
             "name": data.name,
             "content": data.content,
             "duedate": duedate_obj,
@@ -31,26 +33,23 @@ def add_homework(data: HomeworkRequest, user=Depends(get_current_user)):
             "status": "open",
             "teacherid": data.teacherid,
         })
+
+        background_tasks.add_task(
+            pretranslate_document, db, homework_ref, data.classid,
+            {"name": data.name, "content": data.content}, data.language,
+        )
         return {"success": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/homework/{classid}")
-def get_homework_by_class(classid: str, user=Depends(get_current_user)):
-    homework_docs = db.collection("homework").where("classid", "==", classid).stream()
-    result = []
-
-    for doc in homework_docs:
-        hw = doc.to_dict()
-        hw["id"] = doc.id
-        result.append(hw)
-
-    return result
+async def get_homework_by_class(classid: str, lang: str = None, user=Depends(get_current_user), db=Depends(get_db)):
+    return await list_for_class(db, "homework", classid, lang)
 
 @router.patch("/homework/{homework_id}/toggle")
-def toggle_homework_status(homework_id: str, user=Depends(get_current_user)):
+async def toggle_homework_status(homework_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     doc_ref = db.collection("homework").document(homework_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
 
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Homework not found")
@@ -61,5 +60,5 @@ def toggle_homework_status(homework_id: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not allowed")
 
     new_status = "closed" if data["status"] == "open" else "open"
-    doc_ref.update({"status": new_status})
+    await doc_ref.update({"status": new_status})
     return {"status": new_status}
@@ -1,16 +1,15 @@
 # location_routes.py
 
 from fastapi import APIRouter, Body, HTTPException, Depends
-from firebase_admin import firestore
 from datetime import datetime
 from services.firebase_auth import get_current_user
+from services.database import get_db
 
 router = APIRouter()
-db = firestore.client()
 
 
 @router.post("/location/update")
-async def update_location(data: dict = Body(...), user=Depends(get_current_user)):
+async def update_location(data: dict = Body(...), user=Depends(get_current_user), db=Depends(get_db)):
     """
     Updates the current location of a child in Firestore.
     Stores it in 'locations/{childid}' document.
@@ -28,7 +27,7 @@ async def update_location(data: dict = Body(...), user=Depends(get_current_user)
 
         doc_ref = db.collection("locations").document(child_id)
 
-        doc_ref.set({
+        await doc_ref.set({
             "latitude": lat,
             "longitude": lng,
             "istracking": istracking,
@@ -43,7 +42,7 @@ async def update_location(data: dict = Body(...), user=Depends(get_current_user)
 
 
 @router.post("/location/stop")
-async def stop_location_tracking(data: dict = Body(...), user=Depends(get_current_user)):
+async def stop_location_tracking(data: dict = Body(...), user=Depends(get_current_user), db=Depends(get_db)):
     """
     Stops location tracking for the given child by setting istracking to false.
     """
@@ -54,7 +53,7 @@ async def stop_location_tracking(data: dict = Body(...), user=Depends(get_curren
 
         doc_ref = db.collection("locations").document(child_id)
 
-        doc_ref.set({
+        await doc_ref.set({
             "istracking": False,
             "timestamp": datetime.now(),
         }, merge=True)
@@ -67,12 +66,12 @@ async def stop_location_tracking(data: dict = Body(...), user=Depends(get_curren
 
 
 @router.get("/location/{childid}")
-def get_latest_location(childid: str, user=Depends(get_current_user)):
+async def get_latest_location(childid: str, user=Depends(get_current_user), db=Depends(get_db)):
     """
     Retrieves the latest location for the given childid.
     """
     try:
-        doc = db.collection("locations").document(childid).get()
+        doc = await db.collection("locations").document(childid).get()
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Location not found")
         return doc.to_dict()
@@ -82,7 +81,7 @@ def get_latest_location(childid: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Failed to fetch location")
     
 @router.post("/location/set-tracking")
-async def set_tracking_flag(data: dict = Body(...), user=Depends(get_current_user)):
+async def set_tracking_flag(data: dict = Body(...), user=Depends(get_current_user), db=Depends(get_db)):
     """
     Sets only the tracking flag (istracking) for the given childid.
     """
@@ -95,7 +94,7 @@ async def set_tracking_flag(data: dict = Body(...), user=Depends(get_current_use
 
         doc_ref = db.collection("locations").document(child_id)
 
-        doc_ref.set({
+        await doc_ref.set({
             "istracking": istracking,
             "timestamp": datetime.now(),
         }, merge=True)
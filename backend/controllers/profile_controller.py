@@ -1,37 +1,36 @@
 # controllers/profile_controller.py
 
-from fastapi import APIRouter, Depends, HTTPException, Body
-from firebase_admin import firestore
+from fastapi import APIRouter, Depends, HTTPException, Body, File, Form, UploadFile
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services.media_upload import media_uploader, upload_form_file, UploadTooLargeError
+from services.profiles import load_profile
 import base64
-import cloudinary.uploader
 
 router = APIRouter()
 
-db = firestore.client()
-
 @router.get("/profile")
-async def get_profile(user=Depends(get_current_user)):
-    uid = user.get("uid")
-    doc_ref = db.collection("users").document(uid)
-    doc = doc_ref.get()
-    if not doc.exists:
+async def get_profile(user=Depends(get_current_user), db=Depends(get_db)):
+    profile = await load_profile(db, user.get("uid"))
+    if profile is None:
         raise HTTPException(status_code=404, detail="User not found")
+    return profile
 
-    profile = doc.to_dict()
-    return {
-        "user_id": uid,
-        "email": profile.get("email"),
-        "role": profile.get("role"),
-        "name": profile.get("name"),
-        "profilepic": profile.get("profilepic", ""),
-        "message": f"Hello, {profile.get('name', 'User')}"
+async def _update_profile(db, user_id: str, data: dict, image_url: str) -> dict:
+    update_data = {
+        "phone": data.get("phone", ""),
+        "workPhone": data.get("workPhone", ""),
+        "address": data.get("address", ""),
+        "profilepic": image_url,
     }
 
+    await db.collection("users").document(user_id).update(update_data)
+
+    return {"message": "Profile updated successfully", "profilepic": image_url}
+
 @router.post("/updateprofile")
-def update_profile(data: dict = Body(...), user=Depends(get_current_user)):
+async def update_profile(data: dict = Body(...), user=Depends(get_current_user), db=Depends(get_db)):
     try:
-        user_id = user["uid"]
         image_url = data.get("profilepic", "")
 
         if isinstance(image_url, str) and image_url.startswith("data:image"):
@@ -39,21 +38,43 @@ def update_profile(data: dict = Body(...), user=Depends(get_current_user)):
             base64_str = image_url.split(";base64,")[1]
             decoded_image = base64.b64decode(base64_str)
 
-            result = cloudinary.uploader.upload(decoded_image)
+            result = await media_uploader.upload_image(decoded_image)
             image_url = result["secure_url"]
             print("✅ Uploaded profile picture to:", image_url)
 
-        update_data = {
-            "phone": data.get("phone", ""),
-            "workPhone": data.get("workPhone", ""),
-            "address": data.get("address", ""),
-            "profilepic": image_url,
-        }
+        return await _update_profile(db, user["uid"], data, image_url)
+
+    except Exception as e:
+        print("❌ Error in /updateprofile:", str(e))
+        raise HTTPException(status_code=500, detail=str(e))
 
-        db.collection("users").document(user_id).update(update_data)
+@router.post("/updateprofile/upload")
+async def update_profile_upload(
+    phone: str = Form(""),
+    workPhone: str = Form(""),
+    address: str = Form(""),
+    profilepic: str = Form(""),
+    image: UploadFile = File(None),
+    user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """
+    Multipart variant of /updateprofile: a new picture is sent as a file
+    part and streamed to storage; otherwise profilepic keeps the given URL.
+    """
+    try:
+        image_url = profilepic
+        if image:
+            print("📸 Uploading new profile picture to Cloudinary...")
+            result = await upload_form_file(image, process_image=True)
+            image_url = result["secure_url"]
+            print("✅ Uploaded profile picture to:", image_url)
 
-        return {"message": "Profile updated successfully", "profilepic": image_url}
+        data = {"phone": phone, "workPhone": workPhone, "address": address}
+        return await _update_profile(db, user["uid"], data, image_url)
 
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        print("❌ Error in /updateprofile:", str(e))
+        print("❌ Error in /updateprofile/upload:", str(e))
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,19 +1,24 @@
 # controllers/school_controller.py
 
-import requests
 from fastapi import APIRouter, HTTPException, Depends
-from firebase_admin import firestore
 from services.firebase_auth import get_current_user
+from services.database import get_db
+from services.document_cache import document_cache
+from services.children import children_of_parent
+from services.geocoding import GeocodingError, GeocodingUnavailableError, geocode_postal_code
 
 router = APIRouter(tags=["Schools"])
-db = firestore.client()
 
 @router.get("/school/child/{child_id}")
-def get_school_by_child_id(child_id: str, user=Depends(get_current_user)):
+async def get_school_by_child_id(child_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     """
-    Retrieves the school details for a specific child by child_id, enriched with lat/lng via OneMap.
+    Retrieves the school details for a specific child by child_id, enriched with lat/lng.
+    Coordinates come from the schoolapi document; OneMap is only asked for
+    schools that have not been geocoded yet, and the answer is saved back.
+    Schools OneMap has no location for are marked as such, like the preload
+    does, and not looked up again until their record changes.
     """
-    child_doc = db.collection("children").document(child_id).get()
+    child_doc = await db.collection("children").document(child_id).get()
     if not child_doc.exists:
         raise HTTPException(status_code=404, detail="Child not found")
 
@@ -22,33 +27,35 @@ def get_school_by_child_id(child_id: str, user=Depends(get_current_user)):
     if not school_name:
         raise HTTPException(status_code=404, detail="No school assigned to this child")
 
-    school_doc = db.collection("schoolapi").document(school_name).get()
-    if not school_doc.exists:
+    school_data = await document_cache.get(db, "schoolapi", school_name)
+    if school_data is None:
         raise HTTPException(status_code=404, detail="School not found")
 
-    school_data = school_doc.to_dict()
-    postal_code = school_data.get("postal_code")
-    if not postal_code:
-        raise HTTPException(status_code=400, detail="School has no postal code")
+    latitude = school_data.get("latitude")
+    longitude = school_data.get("longitude")
 
-    try:
-        onemap_url = (
-            f"https://www.onemap.gov.sg/api/common/elastic/search"
-            f"?searchVal={postal_code}&returnGeom=Y&getAddrDetails=Y&pageNum=1"
-        )
-        response = requests.get(onemap_url)
-        response.raise_for_status()
-        onemap_data = response.json()
+    if latitude is None or longitude is None:
+        postal_code = school_data.get("postal_code")
+        if not postal_code:
+            raise HTTPException(status_code=400, detail="School has no postal code")
 
-        results = onemap_data.get("results")
-        if not results:
+        content_hash = school_data.get("content_hash")
+        if content_hash and school_data.get("geocode_failed_hash") == content_hash:
             raise HTTPException(status_code=404, detail="Postal code not found in OneMap")
 
-        latitude = float(results[0]["LATITUDE"])
-        longitude = float(results[0]["LONGITUDE"])
+        school_ref = db.collection("schoolapi").document(school_name)
+        try:
+            latitude, longitude = await geocode_postal_code(postal_code)
+        except GeocodingUnavailableError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except GeocodingError as e:
+            if content_hash:
+                await school_ref.update({"geocode_failed_hash": content_hash})
+                document_cache.invalidate("schoolapi", school_name)
+            raise HTTPException(status_code=404, detail=str(e))
 
-    except requests.RequestException as e:
-        raise HTTPException(status_code=500, detail=f"OneMap API error: {str(e)}")
+        await school_ref.update({"latitude": latitude, "longitude": longitude})
+        document_cache.invalidate("schoolapi", school_name)
 
     return {
         "school_name": school_name,
@@ -58,29 +65,13 @@ def get_school_by_child_id(child_id: str, user=Depends(get_current_user)):
     }
 
 @router.get("/schoolsinfo")
-def get_schools_info(user=Depends(get_current_user)):
-    uid = user["uid"]
-    schools = set()
-
-    father_query = db.collection("children").where("fatherid", "==", uid).stream()
-    mother_query = db.collection("children").where("motherid", "==", uid).stream()
-
-    for doc in father_query:
-        data = doc.to_dict()
-        if "school" in data:
-            schools.add(data["school"])
-
-    for doc in mother_query:
-        data = doc.to_dict()
-        if "school" in data:
-            schools.add(data["school"])
+async def get_schools_info(user=Depends(get_current_user), db=Depends(get_db)):
+    children = await children_of_parent(db, user["uid"])
+    schools = {child["school"] for child in children if "school" in child}
 
     school_infos = []
-    for school_name in schools:
-        doc = db.collection("schoolapi").document(school_name).get()
-        if doc.exists:
-            info = doc.to_dict()
-            info["school_name"] = school_name
-            school_infos.append(info)
+    for school_name, info in await document_cache.get_many(db, "schoolapi", sorted(schools)):
+        info["school_name"] = school_name
+        school_infos.append(info)
 
     return school_infos
@@ -1,61 +1,101 @@
 #speech_to_text.py
 
-from fastapi import APIRouter, UploadFile, File
+from fastapi import APIRouter, UploadFile, File, Form, WebSocket
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
-import os
-import uuid
-import tempfile
+import asyncio
 import traceback
 from google.cloud import speech
-from google.oauth2 import service_account
-
-
+from services import audio_format
+from services.stt_service import (
+    StreamingSession,
+    UploadTooLargeError,
+    read_upload,
+    transcribe,
+)
 
 router = APIRouter(tags=["Speech to Text"])
 
-# Load credentials (ensure this path is correct in your deployment)
-credentials = service_account.Credentials.from_service_account_file("speech-to-text-key.json")
-speech_client = speech.SpeechClient(credentials=credentials)
+def _recognition_config(sample_rate: int = 16000, language_code: str = "en-US", encoding: str = "LINEAR16", channels: int = 1):
+    return speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding[encoding],
+        sample_rate_hertz=sample_rate,
+        audio_channel_count=channels,
+        language_code=language_code,
+    )
+
+def _prepare_audio(content: bytes):
+    """
+    Detects the upload's format from its header. WAV is converted to mono
+    16-bit PCM at a supported rate; compressed formats the recognizer reads
+    natively are passed through with their detected settings.
+    """
+    info = audio_format.detect(content)
+    if info.container == "wav":
+        pcm, sample_rate = audio_format.to_linear16(content, info)
+        return pcm, "LINEAR16", sample_rate, 1
+    return content, info.encoding, info.sample_rate, info.channels
 
 @router.post("/transcribe")
-async def transcribe_audio(file: UploadFile = File(...)):
+async def transcribe_audio(file: UploadFile = File(...), language: str = Form("en-US")):
     try:
-        # Save uploaded file temporarily
-        suffix = os.path.splitext(file.filename)[1]
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            temp_file.write(await file.read())
-            temp_file_path = temp_file.name
-
-        # Read the file content
-        with open(temp_file_path, "rb") as audio_file:
-            content = audio_file.read()
-
-        # Setup recognition config (adjust if needed)
-        audio = speech.RecognitionAudio(content=content)
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,  # Adjust depending on your recording
-            language_code="en-US"
-        )
+        # Read straight from the upload; no temp file round trip
+        content = await read_upload(file)
         print(f"[DEBUG] File size: {len(content)} bytes")
 
-        response = speech_client.recognize(config=config, audio=audio)
-        print(f"[DEBUG] Transcription results: {response.results}")
-
-
-        # Cleanup temp file
-        os.remove(temp_file_path)
-
-        if not response.results:
-            return JSONResponse(status_code=200, content={"text": ""})
-
-        transcript = " ".join([result.alternatives[0].transcript for result in response.results])
+        audio, encoding, sample_rate, channels = await run_in_threadpool(_prepare_audio, content)
+        config = _recognition_config(sample_rate, language, encoding, channels)
 
+        transcript = await transcribe(audio, config)
         return {"text": transcript}
 
+    except UploadTooLargeError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except audio_format.UnsupportedAudioError as e:
+        return JSONResponse(status_code=415, content={"error": str(e)})
     except Exception as e:
         traceback.print_exc()
         return JSONResponse(status_code=500, content={
             "error": str(e),
             "trace": traceback.format_exc()
-        })
\ No newline at end of file
+        })
+
+@router.websocket("/transcribe/stream")
+async def transcribe_stream(websocket: WebSocket, language: str = "en-US", sample_rate: int = 16000):
+    """
+    Streaming recognition: the client sends raw LINEAR16 audio as binary
+    frames and a text frame "end" when done; partial and final transcripts
+    are sent back as {"text", "isFinal"} JSON messages as they arrive.
+    """
+    await websocket.accept()
+    session = StreamingSession(_recognition_config(sample_rate, language))
+
+    async def send_results():
+        async for result in session.results():
+            await websocket.send_json(result)
+
+    sender = asyncio.create_task(send_results())
+    disconnected = False
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                disconnected = True
+                break
+            if message.get("bytes"):
+                session.feed(message["bytes"])
+            elif message.get("text") == "end":
+                break
+
+        # Flush the final transcripts before closing
+        session.close()
+        if not disconnected:
+            await sender
+            await websocket.close()
+    except Exception:
+        traceback.print_exc()
+        if not disconnected:
+            await websocket.close(code=1011)
+    finally:
+        session.close()
+        sender.cancel()
@@ -1,9 +1,16 @@
 #translation_routes.py
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import httpx
+from typing import List
 import traceback
+from services.translation_service import (
+    MAX_BATCH_TEXTS,
+    TranslationError,
+    translate,
+    translate_many,
+    translation_stats,
+)
 
 router = APIRouter(tags=["Chat"])
 
@@ -12,31 +19,41 @@ class TranslateRequest(BaseModel):
     source: str
     target: str
 
+class BatchTranslateRequest(BaseModel):
+    texts: List[str]
+    source: str
+    target: str
+
 @router.post("/translate")
 async def translate_text(req: TranslateRequest):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://translate-text-565810748414.asia-southeast1.run.app/translate",  # Your Cloud Run URL
-                json={  # Send the payload directly (not under 'request')
-                    "text": req.text,
-                    "source": req.source,
-                    "target": req.target
-                },
-                timeout=10
-            )
-
-            if response.status_code != 200:
-                return {
-                    "error": f"Translation API failed with status {response.status_code}",
-                    "detail": response.text
-                }
-
-            result = response.json()
-            return {"translatedText": result.get("translatedText", "NO_TRANSLATION")}
+        translated = await translate(req.text, req.source, req.target)
+        return {"translatedText": translated}
 
+    except TranslationError as e:
+        return {
+            "error": str(e),
+            "detail": e.detail
+        }
     except Exception as e:
         return {
             "error": f"Exception occurred: {str(e)}",
             "trace": traceback.format_exc()
         }
+
+@router.post("/translate/batch")
+async def translate_batch(req: BatchTranslateRequest):
+    if len(req.texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TEXTS} texts per batch")
+
+    results = await translate_many(req.texts, req.source, req.target)
+    return {
+        "results": [
+            {"translatedText": translated} if error is None else {"error": error}
+            for translated, error in results
+        ]
+    }
+
+@router.get("/translate/metrics")
+async def translate_metrics():
+    return translation_stats()
@@ -1,51 +1,60 @@
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse
-from google.cloud import texttospeech
-from google.oauth2 import service_account
-import os
+from fastapi.responses import JSONResponse, StreamingResponse
+from services.tts_service import (
+    TTSBusyError,
+    audio_cache,
+    audio_url,
+    get_or_synthesize,
+    stream_speech,
+    synthesis_limiter,
+)
 
 router = APIRouter(tags=["Text to Speech"])
 
-# Load service account credentials
-credentials = service_account.Credentials.from_service_account_file("speech-to-text-key.json")
-tts_client = texttospeech.TextToSpeechClient(credentials=credentials)
-
-# Fixed reusable temp file
-TEMP_AUDIO_DIR = "static/audio"
-os.makedirs(TEMP_AUDIO_DIR, exist_ok=True)
-FIXED_FILENAME = "tts_output.mp3"
-FIXED_FILE_PATH = os.path.join(TEMP_AUDIO_DIR, FIXED_FILENAME)
-
 @router.post("/speak")
 async def speak_text(request: Request):
     try:
         body = await request.json()
         text = body.get("text")
         language_code = body.get("language_code", "en-US")
+        voice_name = body.get("voice")
 
         if not text:
             raise HTTPException(status_code=400, detail="Text is required")
 
-        input_text = texttospeech.SynthesisInput(text=text)
-        voice = texttospeech.VoiceSelectionParams(
-            language_code=language_code,
-            ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL,
-        )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3
-        )
-
-        response = tts_client.synthesize_speech(
-            input=input_text, voice=voice, audio_config=audio_config
-        )
+        if body.get("stream"):
+            return await _stream_response(text, language_code, voice_name)
 
-        # Overwrite the fixed output file
-        with open(FIXED_FILE_PATH, "wb") as out:
-            out.write(response.audio_content)
-
-        base_url = str(request.base_url).rstrip("/")
-        audio_url = f"{base_url}/static/audio/{FIXED_FILENAME}"
-        return {"audio_url": audio_url}
+        # The URL is content-addressed; the file behind it is served as immutable
+        key = await get_or_synthesize(text, language_code, voice_name)
+        return {"audio_url": audio_url(str(request.base_url), key)}
 
+    except HTTPException:
+        raise
+    except TTSBusyError as e:
+        return JSONResponse(status_code=429, content={"error": str(e)}, headers={"Retry-After": "1"})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+async def _stream_response(text: str, language_code: str, voice_name: str):
+    """
+    Sends the audio bytes back directly instead of a URL, so playback starts
+    without a second request. The first sentence is synthesized before the
+    response starts, so saturation still surfaces as a 429.
+    """
+    chunks = stream_speech(text, language_code, voice_name)
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
+
+    async def body():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(body(), media_type="audio/mpeg")
+
+@router.get("/speak/stats")
+async def speak_stats():
+    return {"cache": audio_cache.stats(), "queue": synthesis_limiter.stats()}
@@ -1,5 +1,6 @@
 # main.py
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -27,6 +28,12 @@ from controllers.tts_controller import router as tts_router
 from controllers.stt_controller import router as stt_router
 from controllers.translation_controller import router as translation_router
 from controllers.location_controller import router as location_router
+from controllers.dashboard_controller import router as dashboard_router
+from services.firebase_auth import cert_store, get_token_cache_stats
+from services import geocoding, translation_service
+from services.media_upload import media_uploader
+from services.document_cache import document_cache
+from services.tts_service import AUDIO_DIR, AUDIO_URL_PATH, AudioFiles
 
 # ------------------------------
 # Firebase Admin Initialization
@@ -42,7 +49,21 @@ db = firestore.client()
 # ------------------------------
 # FastAPI Initialization
 # ------------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Signing certs are fetched and rotated in the background from startup on
+    cert_store.start()
+    # Shared outbound HTTP clients live for the whole app, not per request
+    translation_service.get_client()
+    # Opt-in: push class/school edits made outside this app into the cache
+    if os.getenv("DOCUMENT_CACHE_WATCH") == "1":
+        document_cache.watch(db)
+    yield
+    document_cache.close()
+    await translation_service.close_client()
+    await geocoding.close_client()
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS (adjust for production)
 app.add_middleware(
@@ -53,7 +74,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serve static files (e.g., audio output)
+# Serve static files (e.g., audio output); cached audio first, with long-lived caching
+app.mount(AUDIO_URL_PATH, AudioFiles(directory=AUDIO_DIR), name="audio")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # ------------------------------
@@ -74,6 +96,7 @@ app.include_router(tts_router)
 app.include_router(stt_router)
 app.include_router(translation_router)
 app.include_router(location_router)
+app.include_router(dashboard_router)
 
 # ------------------------------
 # Utility: IP Detection for Expo Frontend
@@ -106,3 +129,15 @@ async def get_ip():
         return ip_data
     except FileNotFoundError:
         return {"error": "IP file not found"}
+
+@app.get("/metrics/auth")
+async def auth_metrics():
+    return get_token_cache_stats()
+
+@app.get("/metrics/uploads")
+async def upload_metrics():
+    return media_uploader.stats()
+
+@app.get("/metrics/documents")
+async def document_cache_metrics():
+    return document_cache.stats()
@@ -0,0 +1,130 @@
+from firebase_admin import firestore
+from services.cache import TTLCache
+from services.image_processing import thumbnail_url
+
+# attendance/{ddmmyyyy} holds records: {childid: {"image": url}} for present children
+# and {childid: {"absent": True}} for children marked absent.
+# attendance_by_child/{childid} lists the child's present dates, and
+# attendance_meta/days lists every recorded day, so history reads are O(1) docs.
+ATTENDANCE_COLLECTION = "attendance"
+ATTENDANCE_INDEX = "attendance_by_child"
+ATTENDANCE_META = "attendance_meta"
+
+# An absence is stored rather than deleted, so it also overrides a child
+# still listed in a not-yet-migrated day's children list
+ABSENT_RECORD = {"absent": True}
+
+# Days this process has already written to attendance_meta/days. Every mark
+# rewriting that one document would make it a school-wide hotspot
+_indexed_days = TTLCache(maxsize=400, ttl=24 * 3600)
+
+
+def day_ref(db, date: str):
+    return db.collection(ATTENDANCE_COLLECTION).document(date)
+
+
+def days_ref(db):
+    return db.collection(ATTENDANCE_META).document("days")
+
+
+def child_index_ref(db, childid: str):
+    return db.collection(ATTENDANCE_INDEX).document(childid)
+
+
+def date_sort_key(date: str) -> str:
+    # Attendance dates are stored as ddmmyyyy
+    return date[4:] + date[2:4] + date[:2]
+
+
+def day_records(data: dict) -> dict:
+    """
+    Returns {childid: {"image": url}} for the children present on an
+    attendance day, built once so every lookup after it is a dict hit.
+    Days written before the records map existed have the parallel
+    children/childrenimage lists, where a missing image means "null";
+    entries in records, absences included, take precedence over them.
+    """
+    children = data.get("children", [])
+    images = data.get("childrenimage", [])
+    images = images + ["null"] * (len(children) - len(images))
+
+    records = {cid: {"image": image} for cid, image in zip(children, images)}
+    records.update(data.get("records", {}))
+    return {cid: record for cid, record in records.items() if not record.get("absent")}
+
+
+def record_image(records: dict, childid: str) -> str:
+    record = records.get(childid)
+    return record.get("image", "null") if record else "null"
+
+
+def child_attendance(records: dict, childid: str) -> dict:
+    """
+    One child's entry in /attendance/{date} and the parent dashboard.
+    """
+    image = record_image(records, childid)
+    return {
+        "childid": childid,
+        "present": childid in records,
+        "image": image,
+        "imageThumbnail": thumbnail_url(image),
+    }
+
+
+def mark_attendance(writer, doc_ref, marks: dict):
+    """
+    Applies {childid: image_url} marks to a day document, where an image of
+    None marks the child absent. Field-level merge, so concurrent markers
+    never overwrite each other's children.
+    """
+    # merge=True merges nested maps too, so a present mark has to clear
+    # an earlier absence explicitly
+    records = {
+        childid: ABSENT_RECORD if image_url is None else {"image": image_url, "absent": firestore.DELETE_FIELD}
+        for childid, image_url in marks.items()
+    }
+    writer.set(doc_ref, {"records": records}, merge=True)
+
+
+def index_child(db, writer, childid: str, date: str, present: bool):
+    change = firestore.ArrayUnion([date]) if present else firestore.ArrayRemove([date])
+    writer.set(child_index_ref(db, childid), {"dates": change}, merge=True)
+
+
+def index_day(db, writer, date: str):
+    """
+    Adds date to the days index in writer, unless this process already has.
+    Call day_indexed() once the write has committed.
+    """
+    if _indexed_days.get(date) is None:
+        writer.set(days_ref(db), {"dates": firestore.ArrayUnion([date])}, merge=True)
+
+
+def day_indexed(date: str):
+    _indexed_days.set(date, True)
+
+
+async def child_history(db, childid: str, start: str = None, end: str = None) -> dict:
+    """
+    Returns {date: present} for every recorded day in [start, end], oldest first.
+    """
+    index_ref = child_index_ref(db, childid)
+    meta_ref = days_ref(db)
+    snapshots = {doc.reference.path: doc async for doc in db.get_all([index_ref, meta_ref])}
+
+    days_doc = snapshots.get(meta_ref.path)
+    index_doc = snapshots.get(index_ref.path)
+    days = days_doc.to_dict().get("dates", []) if days_doc and days_doc.exists else []
+    present = set(index_doc.to_dict().get("dates", [])) if index_doc and index_doc.exists else set()
+
+    lower = date_sort_key(start) if start else None
+    upper = date_sort_key(end) if end else None
+
+    result = {}
+    for date in sorted(days, key=date_sort_key):
+        key = date_sort_key(date)
+        if (lower and key < lower) or (upper and key > upper):
+            continue
+        result[date] = date in present
+
+    return result
@@ -0,0 +1,219 @@
+import struct
+import sys
+from array import array
+from typing import NamedTuple, Optional
+
+try:
+    import audioop  # C implementation; removed from the stdlib in Python 3.13
+except ImportError:
+    audioop = None
+
+# Sample rates the recognizer accepts for raw PCM; anything else is resampled
+MIN_PCM_RATE = 8000
+MAX_PCM_RATE = 48000
+TARGET_PCM_RATE = 16000
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class UnsupportedAudioError(Exception):
+    pass
+
+
+class AudioInfo(NamedTuple):
+    container: str  # wav, flac, ogg, webm, amr, amr-wb, mp3
+    encoding: str  # RecognitionConfig.AudioEncoding name
+    sample_rate: int
+    channels: int = 1
+    bits_per_sample: Optional[int] = None
+    pcm_format: Optional[int] = None  # WAV fmt tag: 1 = integer PCM, 3 = float
+    data_offset: int = 0
+    data_size: Optional[int] = None
+
+
+def detect(content: bytes) -> AudioInfo:
+    """
+    Identifies the container/codec and sample rate from the file header.
+    """
+    if content[:4] == b"RIFF" and content[8:12] == b"WAVE":
+        return _detect_wav(content)
+    if content[:4] == b"fLaC":
+        return _detect_flac(content)
+    if content[:4] == b"OggS":
+        return _detect_ogg(content)
+    if content[:4] == b"\x1a\x45\xdf\xa3":
+        return AudioInfo("webm", "WEBM_OPUS", 48000)
+    if content.startswith(b"#!AMR-WB\n"):
+        return AudioInfo("amr-wb", "AMR_WB", 16000)
+    if content.startswith(b"#!AMR\n"):
+        return AudioInfo("amr", "AMR", 8000)
+    if content[:3] == b"ID3" or (len(content) > 1 and content[0] == 0xFF and content[1] & 0xE0 == 0xE0):
+        return _detect_mp3(content)
+    raise UnsupportedAudioError("Unrecognised audio format")
+
+
+def _detect_wav(content: bytes) -> AudioInfo:
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(content):
+        chunk_id = content[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", content, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            if chunk_size < 16 or body + chunk_size > len(content):
+                raise UnsupportedAudioError("WAV fmt chunk is truncated")
+            fmt = struct.unpack_from("<HHIIHH", content, body)
+            if fmt[0] == 0xFFFE and chunk_size >= 40:
+                # WAVE_FORMAT_EXTENSIBLE keeps the real tag in the sub-format GUID
+                fmt = (struct.unpack_from("<H", content, body + 24)[0],) + fmt[1:]
+        elif chunk_id == b"data":
+            if fmt is None:
+                break
+            tag, channels, sample_rate, _, _, bits = fmt
+            if tag not in (1, 3):
+                raise UnsupportedAudioError(f"Unsupported WAV sample format {tag}")
+            if not channels or not sample_rate:
+                raise UnsupportedAudioError("WAV header has no channels or sample rate")
+            if bits not in ((32, 64) if tag == 3 else (8, 16, 24, 32)):
+                raise UnsupportedAudioError(f"Unsupported WAV sample size of {bits} bits")
+            size = min(chunk_size, len(content) - body)
+            return AudioInfo("wav", "LINEAR16", sample_rate, channels, bits, tag, body, size)
+        offset = body + chunk_size + (chunk_size & 1)
+    raise UnsupportedAudioError("WAV file has no audio data")
+
+
+def _detect_flac(content: bytes) -> AudioInfo:
+    # STREAMINFO is always the first metadata block
+    if len(content) < 22:
+        raise UnsupportedAudioError("FLAC header is truncated")
+    packed = int.from_bytes(content[18:21], "big")
+    sample_rate = packed >> 4
+    channels = ((packed >> 1) & 0x7) + 1
+    return AudioInfo("flac", "FLAC", sample_rate, channels)
+
+
+def _detect_ogg(content: bytes) -> AudioInfo:
+    head = content.find(b"OpusHead", 0, 256)
+    if head < 0:
+        raise UnsupportedAudioError("Only Opus is supported in Ogg")
+    if head + 16 > len(content) or not content[head + 9]:
+        raise UnsupportedAudioError("Opus header is truncated")
+    channels = content[head + 9]
+    input_rate = struct.unpack_from("<I", content, head + 12)[0]
+    return AudioInfo("ogg", "OGG_OPUS", input_rate if input_rate in OPUS_RATES else 48000, channels)
+
+
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _detect_mp3(content: bytes) -> AudioInfo:
+    offset = 0
+    if content[:3] == b"ID3":
+        if len(content) < 10:
+            raise UnsupportedAudioError("ID3 tag is truncated")
+        size = content[6:10]
+        offset = 10 + ((size[0] << 21) | (size[1] << 14) | (size[2] << 7) | size[3])
+
+    while offset + 4 <= len(content):
+        if content[offset] == 0xFF and content[offset + 1] & 0xE0 == 0xE0:
+            version = (content[offset + 1] >> 3) & 0x3
+            rate_index = (content[offset + 2] >> 2) & 0x3
+            if version in _MP3_RATES and rate_index < 3:
+                channels = 1 if content[offset + 3] >> 6 == 3 else 2
+                return AudioInfo("mp3", "MP3", _MP3_RATES[version][rate_index], channels)
+        offset += 1
+    raise UnsupportedAudioError("No MP3 frame found")
+
+
+def to_linear16(content: bytes, info: AudioInfo) -> tuple:
+    """
+    Converts WAV audio to mono 16-bit little-endian PCM at a rate the
+    recognizer accepts. Returns (pcm_bytes, sample_rate).
+    """
+    data = content[info.data_offset:info.data_offset + info.data_size]
+    width = info.bits_per_sample // 8
+    data = data[:len(data) - len(data) % (width * info.channels)]
+
+    if audioop is not None and info.pcm_format == 1:
+        return _convert_with_audioop(data, info, width)
+    return _convert_with_array(data, info, width)
+
+
+def _target_rate(sample_rate: int) -> int:
+    return sample_rate if MIN_PCM_RATE <= sample_rate <= MAX_PCM_RATE else TARGET_PCM_RATE
+
+
+def _convert_with_audioop(data: bytes, info: AudioInfo, width: int) -> tuple:
+    if width == 1:
+        data = audioop.bias(data, 1, -128)  # WAV 8-bit samples are unsigned
+    if info.channels == 2:
+        data = audioop.tomono(data, width, 0.5, 0.5)
+    elif info.channels > 2:
+        data = _downmix(array("h", audioop.lin2lin(data, width, 2)), info.channels).tobytes()
+        width = 2
+    if width != 2:
+        data = audioop.lin2lin(data, width, 2)
+
+    rate = _target_rate(info.sample_rate)
+    if rate != info.sample_rate:
+        data, _ = audioop.ratecv(data, 2, 1, info.sample_rate, rate, None)
+    if sys.byteorder == "big":
+        data = audioop.byteswap(data, 2)
+    return data, rate
+
+
+def _convert_with_array(data: bytes, info: AudioInfo, width: int) -> tuple:
+    samples = _decode_samples(data, info.pcm_format, width)
+    if info.channels > 1:
+        samples = _downmix(samples, info.channels)
+
+    rate = _target_rate(info.sample_rate)
+    if rate != info.sample_rate:
+        samples = _resample(samples, info.sample_rate, rate)
+
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples.tobytes(), rate
+
+
+def _decode_samples(data: bytes, pcm_format: int, width: int) -> array:
+    """
+    Decodes little-endian PCM of any common width into 16-bit samples.
+    """
+    if pcm_format == 3:
+        floats = array("f" if width == 4 else "d", data)
+        if sys.byteorder == "big":
+            floats.byteswap()
+        return array("h", (max(-32768, min(32767, int(value * 32767))) for value in floats))
+    if width == 2:
+        samples = array("h", data)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        return samples
+    if width == 1:
+        return array("h", ((value - 128) << 8 for value in data))
+    # 24/32-bit: keep the most significant two bytes of each sample
+    view = memoryview(data)
+    return array("h", (
+        int.from_bytes(view[i + width - 2:i + width], "little", signed=True)
+        for i in range(0, len(data), width)
+    ))
+
+
+def _downmix(samples: array, channels: int) -> array:
+    lanes = [samples[c::channels] for c in range(channels)]
+    return array("h", (sum(frame) // channels for frame in zip(*lanes)))
+
+
+def _resample(samples: array, src_rate: int, dst_rate: int) -> array:
+    # Linear interpolation is plenty for speech recognition
+    count = int(len(samples) * dst_rate / src_rate)
+    step = src_rate / dst_rate
+    last = len(samples) - 1
+    out = array("h", bytes(2 * count))
+    for i in range(count):
+        position = i * step
+        left = int(position)
+        right = min(left + 1, last)
+        frac = position - left
+        out[i] = int(samples[left] + (samples[right] - samples[left]) * frac)
+    return out
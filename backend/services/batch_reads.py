@@ -0,0 +1,26 @@
+# Firestore's BatchGetDocuments is kept well under its request size limits
+GET_ALL_CHUNK_SIZE = 100
+
+
+async def get_all_in_order(db, refs: list, chunk_size: int = GET_ALL_CHUNK_SIZE) -> list:
+    """
+    Fetches many document references with batched get_all calls and returns
+    the snapshots in the same order as refs. Missing documents come back as
+    snapshots with exists == False.
+    """
+    snapshots = {}
+    unique_refs = list({ref.path: ref for ref in refs}.values())
+
+    for start in range(0, len(unique_refs), chunk_size):
+        async for snapshot in db.get_all(unique_refs[start:start + chunk_size]):
+            snapshots[snapshot.reference.path] = snapshot
+
+    return [snapshots[ref.path] for ref in refs]
+
+
+async def get_documents(db, collection: str, ids: list) -> list:
+    """
+    Returns the existing documents of a collection for the given ids, in id order.
+    """
+    refs = [db.collection(collection).document(doc_id) for doc_id in ids]
+    return [snapshot for snapshot in await get_all_in_order(db, refs) if snapshot.exists]
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+# Per-socket buffer; a client that falls this far behind starts dropping events
+SUBSCRIBER_QUEUE_SIZE = 100
+REDIS_CHANNEL_PREFIX = "chat:user:"
+
+
+class InMemoryBackend:
+    """
+    Delivers events to sockets connected to this process only.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+
+    async def publish(self, user_id: str, event: dict):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id: str, event: dict):
+        for queue in list(self._subscribers.get(user_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                print(f"⚠️ Dropping chat event for slow subscriber {user_id}")
+
+    async def subscribe(self, user_id: str, queue: asyncio.Queue):
+        self._subscribers.setdefault(user_id, set()).add(queue)
+
+    async def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+
+class RedisBackend(InMemoryBackend):
+    """
+    Publishes through Redis so every uvicorn worker sees every event, then
+    delivers locally to the sockets each worker holds.
+    """
+
+    def __init__(self, url: str):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._listener = None
+
+    async def publish(self, user_id: str, event: dict):
+        await self._redis.publish(REDIS_CHANNEL_PREFIX + user_id, json.dumps(event, default=str))
+
+    async def subscribe(self, user_id: str, queue: asyncio.Queue):
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        await super().subscribe(user_id, queue)
+
+    async def _listen(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(REDIS_CHANNEL_PREFIX + "*")
+        async for item in pubsub.listen():
+            if item["type"] != "pmessage":
+                continue
+            channel = item["channel"].decode("utf-8")
+            self.deliver(channel[len(REDIS_CHANNEL_PREFIX):], json.loads(item["data"]))
+
+
+class ChatHub:
+    """
+    Fans chat events out to every socket the target users have open.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def publish(self, user_ids, event: dict):
+        # Push is best effort: the write already succeeded, clients can re-fetch
+        try:
+            for user_id in set(user_ids):
+                await self.backend.publish(user_id, event)
+        except Exception as e:
+            print("❌ Error publishing chat event:", e)
+
+    @asynccontextmanager
+    async def connect(self, user_id: str):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        await self.backend.subscribe(user_id, queue)
+        try:
+            yield queue
+        finally:
+            await self.backend.unsubscribe(user_id, queue)
+
+
+def _create_backend():
+    url = os.getenv("CHAT_PUBSUB_URL")
+    if url and url.startswith("redis"):
+        return RedisBackend(url)
+    return InMemoryBackend()
+
+
+chat_hub = ChatHub(_create_backend())
@@ -0,0 +1,23 @@
+import asyncio
+
+
+async def _stream(query) -> list:
+    return [doc async for doc in query.stream()]
+
+
+async def children_of_parent(db, uid: str) -> list:
+    """
+    Returns every child whose father or mother is uid, once each, with
+    "id" set. The father and mother queries run concurrently.
+    """
+    children_ref = db.collection("children")
+    father_docs, mother_docs = await asyncio.gather(
+        _stream(children_ref.where("fatherid", "==", uid)),
+        _stream(children_ref.where("motherid", "==", uid)),
+    )
+
+    children = {}
+    for doc in father_docs + mother_docs:
+        if doc.id not in children:
+            children[doc.id] = doc.to_dict() | {"id": doc.id}
+    return list(children.values())
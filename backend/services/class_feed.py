@@ -0,0 +1,13 @@
+from services.pretranslation import localize
+
+
+async def list_for_class(db, collection: str, classid: str, lang: str = None) -> list:
+    """
+    Returns a class's homework or announcements, in lang where a
+    translation exists, each with "id" set. The standalone endpoints and
+    the parent dashboard both use it.
+    """
+    items = []
+    async for doc in db.collection(collection).where("classid", "==", classid).stream():
+        items.append(localize(doc.to_dict(), lang) | {"id": doc.id})
+    return items
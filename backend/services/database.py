@@ -0,0 +1,16 @@
+from firebase_admin import firestore_async
+
+# One AsyncClient per process: its gRPC channel is shared by every request,
+# and awaiting it lets concurrent requests overlap their Firestore I/O
+_client = None
+
+
+async def get_db():
+    """
+    FastAPI dependency returning the shared async Firestore client. A
+    coroutine so FastAPI calls it on the event loop, not in the threadpool.
+    """
+    global _client
+    if _client is None:
+        _client = firestore_async.client()
+    return _client
@@ -0,0 +1,137 @@
+import os
+
+from services.batch_reads import get_all_in_order
+from services.cache import TTLCache
+from services.singleflight import SingleFlight
+
+# Class and school documents change a few times a term; keep them for minutes, not seconds
+DOCUMENT_CACHE_TTLS = {
+    "class": int(os.getenv("CLASS_CACHE_TTL", "600")),
+    "schoolapi": int(os.getenv("SCHOOL_CACHE_TTL", "3600")),
+}
+DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "2000"))
+NEGATIVE_TTL = 30  # how long "no such document" is remembered
+
+_MISSING = object()
+
+
+class DocumentCache:
+    """
+    Read-through cache of whole Firestore documents, one LRU/TTL cache per
+    collection. Writers call invalidate(); watch() additionally listens to
+    Firestore so edits made elsewhere (scripts, the console) drop entries.
+    """
+
+    def __init__(self, ttls: dict, maxsize: int = DOCUMENT_CACHE_SIZE):
+        self._documents = {collection: TTLCache(maxsize=maxsize, ttl=ttl) for collection, ttl in ttls.items()}
+        # (field, value) -> document id, for lookups by something other than the id
+        self._lookups = {collection: TTLCache(maxsize=maxsize, ttl=ttl) for collection, ttl in ttls.items()}
+        self._generations = {collection: 0 for collection in ttls}
+        self._flight = SingleFlight()
+        self._watches = []
+
+    async def get(self, db, collection: str, doc_id: str):
+        """
+        Returns a copy of the document's data, or None if it does not exist.
+        """
+        data = self._documents[collection].get(doc_id)
+        if data is None:
+            data = await self._flight.do((collection, doc_id), lambda: self._load(db, collection, doc_id))
+        return None if data is _MISSING else dict(data)
+
+    async def get_many(self, db, collection: str, doc_ids) -> list:
+        """
+        Returns (doc_id, data) for each id that exists, in the order given.
+        Cached documents are served locally; the rest come in one batched read.
+        """
+        cache = self._documents[collection]
+        found = {doc_id: cache.get(doc_id) for doc_id in dict.fromkeys(doc_ids)}
+        misses = [doc_id for doc_id, data in found.items() if data is None]
+
+        if misses:
+            generation = self._generations[collection]
+            refs = [db.collection(collection).document(doc_id) for doc_id in misses]
+            for doc in await get_all_in_order(db, refs):
+                found[doc.id] = self._store(collection, doc.id, doc, generation)
+
+        return [(doc_id, dict(data)) for doc_id, data in found.items() if data is not _MISSING]
+
+    async def find_one(self, db, collection: str, field: str, value):
+        """
+        Returns (doc_id, data) for the first document where field == value,
+        or None. Only the id is remembered per value; the data itself comes
+        from the document cache and is re-checked against the value.
+        """
+        lookups = self._lookups[collection]
+        doc_id = lookups.get((field, value))
+        if doc_id is not None:
+            data = await self.get(db, collection, doc_id)
+            if data is not None and data.get(field) == value:
+                return doc_id, data
+            lookups.pop((field, value))
+
+        async def query():
+            generation = self._generations[collection]
+            async for doc in db.collection(collection).where(field, "==", value).limit(1).stream():
+                self._store(collection, doc.id, doc, generation)
+                return doc.id
+            return None
+
+        doc_id = await self._flight.do((collection, field, value), query)
+        if doc_id is None:
+            return None
+        lookups.set((field, value), doc_id)
+        data = await self.get(db, collection, doc_id)
+        return (doc_id, data) if data is not None else None
+
+    async def _load(self, db, collection: str, doc_id: str):
+        generation = self._generations[collection]
+        doc = await db.collection(collection).document(doc_id).get()
+        return self._store(collection, doc_id, doc, generation)
+
+    def _store(self, collection: str, doc_id: str, doc, generation: int):
+        data = doc.to_dict() if doc.exists else _MISSING
+        # Skip the write if an invalidation landed while the read was in flight
+        if self._generations[collection] == generation:
+            cache = self._documents[collection]
+            cache.set(doc_id, data, ttl=None if doc.exists else min(NEGATIVE_TTL, cache.ttl))
+        return data
+
+    def invalidate(self, collection: str, doc_id: str = None):
+        """
+        Drops one document, or the whole collection when doc_id is None.
+        """
+        self._generations[collection] += 1
+        if doc_id is None:
+            self._documents[collection].clear()
+            self._lookups[collection].clear()
+        else:
+            self._documents[collection].pop(doc_id)
+
+    def watch(self, client, collections=None):
+        """
+        Subscribes to Firestore changes on the cached collections. Needs the
+        sync client, as the async one has no on_snapshot. The first snapshot
+        reads every document in the collection once.
+        """
+        for collection in collections or self._documents:
+            def on_change(snapshot, changes, read_time, collection=collection):
+                for change in changes:
+                    self.invalidate(collection, change.document.id)
+
+            self._watches.append(client.collection(collection).on_snapshot(on_change))
+            print(f"👀 Watching `{collection}` for cache invalidation")
+
+    def close(self):
+        for watch in self._watches:
+            watch.unsubscribe()
+        self._watches.clear()
+
+    def stats(self) -> dict:
+        return {
+            collection: dict(cache.stats(), lookups=self._lookups[collection].stats())
+            for collection, cache in self._documents.items()
+        }
+
+
+document_cache = DocumentCache(DOCUMENT_CACHE_TTLS)
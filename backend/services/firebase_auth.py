@@ -1,32 +1,166 @@
 import firebase_admin
-from firebase_admin import credentials, auth
+from firebase_admin import credentials
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer
+from google.auth import jwt
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from services.cache import TTLCache
 from typing import Dict
+import hashlib
+import json
 import os
+import re
+import threading
+import time
 
 # Load Firebase Service Account Key
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SERVICE_ACCOUNT_PATH = os.path.join(BASE_DIR, "..", "serviceAccountKey.json")
+SERVICE_ACCOUNT_PATH = os.getenv("FIREBASE_SERVICE_ACCOUNT", os.path.join(BASE_DIR, "..", "serviceAccountKey.json"))
 
 cred = credentials.Certificate(SERVICE_ACCOUNT_PATH)
 firebase_admin.initialize_app(cred)
 
+PROJECT_ID = cred.project_id
+ID_TOKEN_ISSUER = f"https://securetoken.google.com/{PROJECT_ID}"
+ID_TOKEN_CERT_URI = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+# Verified tokens are kept until they expire, so repeat requests skip signature checks
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+CLOCK_SKEW_SECONDS = 10
+
 # HTTP Bearer Token Security
 bearer_scheme = HTTPBearer()
 
+
+class GoogleCertStore:
+    """
+    Keeps Google's token signing certs in memory and, once start() is
+    called, refreshes them in a background thread before they expire, so
+    verification never waits on a cert download.
+    """
+
+    DEFAULT_MAX_AGE = 3600
+    MIN_REFRESH_INTERVAL = 60
+
+    def __init__(self, cert_url: str):
+        self.cert_url = cert_url
+        self._request = GoogleAuthRequest()
+        self._certs = {}
+        self._expires_at = 0.0
+        self._last_attempt = float("-inf")
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get(self) -> Dict:
+        if not self._certs:
+            return self.refresh_on_demand()
+        return self._certs
+
+    def refresh(self) -> Dict:
+        with self._lock:
+            self._fetch()
+        return self._certs
+
+    def refresh_on_demand(self) -> Dict:
+        """
+        Refresh asked for by a request, e.g. for a kid we have not seen.
+        Anyone can send a token with a made-up kid, so this downloads at most
+        once per MIN_REFRESH_INTERVAL; in between, the current certs are
+        returned and such tokens are rejected.
+        """
+        with self._lock:
+            if time.monotonic() - self._last_attempt >= self.MIN_REFRESH_INTERVAL:
+                self._fetch()
+        return self._certs
+
+    def _fetch(self):
+        # Failed attempts count too, so an outage is not retried per request
+        self._last_attempt = time.monotonic()
+        response = self._request(self.cert_url, method="GET")
+        if response.status != 200:
+            raise RuntimeError(f"Failed to fetch signing certs: {response.status}")
+
+        self._certs = json.loads(response.data.decode("utf-8"))
+        self._expires_at = time.monotonic() + self._max_age(response.headers)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._thread.start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print("❌ Error refreshing Firebase signing certs:", e)
+            # Rotate at half-life so a fresh set is always in place before expiry
+            remaining = self._expires_at - time.monotonic()
+            time.sleep(max(remaining / 2, self.MIN_REFRESH_INTERVAL))
+
+    def _max_age(self, headers) -> int:
+        match = re.search(r"max-age=(\d+)", headers.get("cache-control", ""))
+        return int(match.group(1)) if match else self.DEFAULT_MAX_AGE
+
+
+cert_store = GoogleCertStore(ID_TOKEN_CERT_URI)
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE)
+
+
 class FirebaseAuthService:
     @staticmethod
     def verify_token(token: str) -> Dict:
         """
         Verifies Firebase ID token and extracts user info.
         """
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
-            decoded_token = auth.verify_id_token(token)
-            return decoded_token
+            decoded_token = FirebaseAuthService._decode(token)
         except Exception:
             raise HTTPException(status_code=401, detail="Invalid Firebase token")
 
+        token_cache.set(key, decoded_token, ttl=decoded_token["exp"] - time.time())
+        return decoded_token
+
+    @staticmethod
+    def _decode(token: str) -> Dict:
+        header = jwt.decode_header(token)
+        if header.get("alg") != "RS256" or not header.get("kid"):
+            raise ValueError("Unexpected token header")
+
+        certs = cert_store.get()
+        if header["kid"] not in certs:
+            # Google may have rotated keys since the last refresh
+            certs = cert_store.refresh_on_demand()
+        if header["kid"] not in certs:
+            raise ValueError("Unknown signing key")
+
+        claims = jwt.decode(
+            token,
+            certs=certs,
+            audience=PROJECT_ID,
+            clock_skew_in_seconds=CLOCK_SKEW_SECONDS,
+        )
+
+        subject = claims.get("sub")
+        if claims.get("iss") != ID_TOKEN_ISSUER:
+            raise ValueError("Unexpected token issuer")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise ValueError("Invalid token subject")
+
+        claims["uid"] = subject
+        return claims
+
+
+def get_token_cache_stats() -> Dict:
+    return token_cache.stats()
+
+
 # FastAPI Dependency for Authentication
 def get_current_user(token: str = Security(bearer_scheme)):
     """
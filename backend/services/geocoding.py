@@ -0,0 +1,142 @@
+import threading
+import time
+
+import httpx
+from services.cache import TTLCache
+
+ONEMAP_SEARCH_URL = "https://www.onemap.gov.sg/api/common/elastic/search"
+ONEMAP_TIMEOUT = 5
+
+# Postal codes do not move. lat/lng stored on schoolapi docs is the main cache;
+# this in-process one covers schools that have not been backfilled yet
+GEOCODE_CACHE_TTL = 30 * 24 * 3600
+# "Not found" is remembered too, for less long: OneMap does add new addresses
+NOT_FOUND_TTL = 24 * 3600
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30
+
+
+class GeocodingError(Exception):
+    pass
+
+
+class GeocodingUnavailableError(GeocodingError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for reset_seconds after
+    failure_threshold consecutive failures, then lets one trial call through.
+    Other callers are rejected while the trial runs; its result closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            # A trial that never reported back (e.g. cancelled) gives way after reset_seconds
+            if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+                return False
+            if now - self._opened_at >= self.reset_seconds:
+                self._trial_started = now  # half-open: one trial call
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_started is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_started = None
+
+
+geocode_cache = TTLCache(maxsize=2048, ttl=GEOCODE_CACHE_TTL)
+onemap_breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+_client = None
+_NOT_FOUND = "not-found"
+
+
+def _search_params(postal_code: str) -> dict:
+    return {"searchVal": postal_code, "returnGeom": "Y", "getAddrDetails": "Y", "pageNum": 1}
+
+
+def parse_onemap_response(data: dict) -> tuple:
+    results = data.get("results")
+    if not results:
+        raise GeocodingError("Postal code not found in OneMap")
+    return float(results[0]["LATITUDE"]), float(results[0]["LONGITUDE"])
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=ONEMAP_TIMEOUT)
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def geocode_postal_code(postal_code: str) -> tuple:
+    """
+    Returns (latitude, longitude) for a Singapore postal code. Raises
+    GeocodingError when OneMap has no location for it, and
+    GeocodingUnavailableError when OneMap cannot be asked or answers
+    something unreadable. Locations and "not found" are cached.
+    """
+    cached = geocode_cache.get(postal_code)
+    if cached == _NOT_FOUND:
+        raise GeocodingError("Postal code not found in OneMap")
+    if cached is not None:
+        return cached
+
+    if not onemap_breaker.allow():
+        raise GeocodingUnavailableError("OneMap is unavailable, try again later")
+
+    try:
+        response = await get_client().get(ONEMAP_SEARCH_URL, params=_search_params(postal_code))
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        onemap_breaker.record_failure()
+        raise GeocodingUnavailableError(f"OneMap API error: {str(e)}")
+
+    onemap_breaker.record_success()
+    try:
+        location = parse_onemap_response(response.json())
+    except GeocodingError:
+        geocode_cache.set(postal_code, _NOT_FOUND, ttl=NOT_FOUND_TTL)
+        raise
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+        raise GeocodingUnavailableError(f"Unexpected OneMap response: {e!r}")
+    geocode_cache.set(postal_code, location)
+    return location
+
+
+def geocode_postal_code_sync(session, postal_code: str) -> tuple:
+    """
+    Blocking variant for batch jobs, using a caller-owned requests.Session.
+    """
+    response = session.get(ONEMAP_SEARCH_URL, params=_search_params(postal_code), timeout=ONEMAP_TIMEOUT)
+    response.raise_for_status()
+    return parse_onemap_response(response.json())
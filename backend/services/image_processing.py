@@ -0,0 +1,51 @@
+import io
+import os
+
+from PIL import Image, ImageOps
+
+# Longest edge kept for stored photos; phones shoot 4000px+, screens show ~1200
+MAX_IMAGE_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "1600"))
+JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "82"))
+
+# List screens load this rendition. Cloudinary builds it eagerly at upload
+# time, and the same URL works on demand for images uploaded before that.
+THUMBNAIL_SIZE = 320
+THUMBNAIL_EAGER = {"crop": "limit", "width": THUMBNAIL_SIZE, "height": THUMBNAIL_SIZE, "quality": "auto"}
+THUMBNAIL_TRANSFORMATION = f"c_limit,h_{THUMBNAIL_SIZE},q_auto,w_{THUMBNAIL_SIZE}"
+
+
+def prepare_image(source) -> bytes:
+    """
+    Re-encodes an uploaded photo for storage: applies the EXIF orientation,
+    drops all metadata, downscales to MAX_IMAGE_DIMENSION and saves as
+    progressive JPEG (PNG if it has transparency). source is bytes or a
+    binary file object. Raises if Pillow cannot read it.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    with Image.open(source) as image:
+        if getattr(image, "n_frames", 1) > 1:
+            raise ValueError("Animated images are stored as uploaded")
+
+        # JPEGs decode straight at a reduced scale, far cheaper than full size
+        image.draft("RGB", (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.Resampling.LANCZOS)
+
+        out = io.BytesIO()
+        if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+            image.save(out, "PNG", optimize=True)
+        else:
+            image.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+def thumbnail_url(url: str) -> str:
+    """
+    Returns the thumbnail rendition of a Cloudinary image URL. Anything
+    else (empty, "null", other hosts) is returned unchanged.
+    """
+    if not isinstance(url, str) or "/image/upload/" not in url:
+        return url
+    return url.replace("/image/upload/", f"/image/upload/{THUMBNAIL_TRANSFORMATION}/", 1)
@@ -0,0 +1,159 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.exceptions
+import cloudinary.uploader
+from services.image_processing import THUMBNAIL_EAGER, prepare_image
+from services.metrics import LatencyMetrics
+
+# Uploads running at once across all requests; the rest wait in the pool queue
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", "8"))
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", "60"))  # per HTTP request to Cloudinary
+UPLOAD_ATTEMPTS = int(os.getenv("UPLOAD_ATTEMPTS", "3"))
+UPLOAD_BACKOFF = 0.5  # seconds before the first retry, doubled after each
+
+# Multipart files are spooled to disk by Starlette; larger ones are sent to
+# Cloudinary in chunks so the whole file never sits in memory
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024  # Cloudinary wants chunks of at least 5 MB
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class TransientUploadError(Exception):
+    """
+    A failure worth retrying: the request never got a usable answer.
+    """
+
+
+# Cloudinary raises a bare Error for everything; these prefixes are the
+# ones it uses for connection, timeout and unparseable (5xx page) failures
+_TRANSIENT_PREFIXES = ("Unexpected error", "Socket error", "Error parsing server response")
+
+
+def _file_size(file) -> int:
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+def _cloudinary_upload(file, **options) -> dict:
+    try:
+        if hasattr(file, "read") and _file_size(file) > UPLOAD_CHUNK_SIZE:
+            options.setdefault("resource_type", "auto")
+            return cloudinary.uploader.upload_large(file, chunk_size=UPLOAD_CHUNK_SIZE, **options)
+        return cloudinary.uploader.upload(file, **options)
+    except cloudinary.exceptions.Error as e:
+        if str(e).startswith(_TRANSIENT_PREFIXES):
+            raise TransientUploadError(str(e)) from e
+        raise
+
+
+class MediaUploader:
+    """
+    Runs blocking uploads on a bounded thread pool so handlers can await
+    them, and several uploads from one request can run side by side.
+    The timeout is passed to the upload call itself, so an attempt has
+    stopped before the next one starts. Only TransientUploadError is
+    retried, with backoff, and every attempt reuses one public_id so a
+    retry after a lost response overwrites rather than duplicates.
+    The upload function is injectable so it can be swapped for a fake.
+    """
+
+    def __init__(self, upload_fn=_cloudinary_upload, max_workers: int = UPLOAD_MAX_WORKERS,
+                 timeout: float = UPLOAD_TIMEOUT, attempts: int = UPLOAD_ATTEMPTS,
+                 backoff: float = UPLOAD_BACKOFF):
+        self.upload_fn = upload_fn
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.attempts = attempts
+        self.backoff = backoff
+        self.metrics = LatencyMetrics()
+        self.retries = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload")
+        self._lock = threading.Lock()
+
+    async def upload(self, file, **options) -> dict:
+        """
+        Uploads one file and returns the provider's result dict.
+        Raises UploadError when the upload is rejected or every attempt failed.
+        """
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        options.setdefault("public_id", uuid.uuid4().hex)
+        options.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.attempts):
+            if attempt:
+                with self._lock:
+                    self.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                if hasattr(file, "seek"):
+                    file.seek(0)
+            try:
+                result = await loop.run_in_executor(self._executor, lambda: self.upload_fn(file, **options))
+                self.metrics.record(time.perf_counter() - started, True)
+                return result
+            except TransientUploadError as e:
+                error = e
+                print(f"⚠️ Upload attempt {attempt + 1}/{self.attempts} failed: {e}")
+            except Exception as e:
+                self.metrics.record(time.perf_counter() - started, False)
+                raise UploadError(f"Upload rejected: {e}") from e
+
+        self.metrics.record(time.perf_counter() - started, False)
+        raise UploadError(f"Upload failed after {self.attempts} attempts: {error}")
+
+    async def upload_image(self, file, **options) -> dict:
+        """
+        Downscales and strips the photo before uploading it, and asks for the
+        thumbnail rendition to be generated eagerly. Images Pillow cannot
+        read are uploaded as they are.
+        """
+        loop = asyncio.get_running_loop()
+        file = await loop.run_in_executor(self._executor, self._prepare_image, file)
+        options.setdefault("eager", [THUMBNAIL_EAGER])
+        return await self.upload(file, **options)
+
+    @staticmethod
+    def _prepare_image(file):
+        try:
+            return prepare_image(file)
+        except Exception as e:
+            print("⚠️ Uploading image unprocessed:", e)
+            if hasattr(file, "seek"):
+                file.seek(0)
+            return file
+
+    def stats(self) -> dict:
+        return dict(self.metrics.stats(), retries=self.retries, max_workers=self.max_workers)
+
+
+media_uploader = MediaUploader()
+
+
+async def upload_form_file(upload, process_image: bool = False, **options) -> dict:
+    """
+    Uploads a multipart UploadFile straight from its spooled file, without
+    reading it into memory. Raises UploadTooLargeError past MAX_UPLOAD_BYTES.
+    With process_image, the photo goes through upload_image.
+    """
+    size = upload.size if upload.size is not None else _file_size(upload.file)
+    if size > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f"File larger than {MAX_UPLOAD_BYTES} bytes")
+    upload.file.seek(0)
+    if process_image:
+        return await media_uploader.upload_image(upload.file, **options)
+    return await media_uploader.upload(upload.file, **options)
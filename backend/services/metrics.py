@@ -0,0 +1,39 @@
+import threading
+from collections import deque
+
+LATENCY_SAMPLES = 500
+
+
+class LatencyMetrics:
+    """
+    Request/error counters plus p50/p99 latency over the most recent calls.
+    """
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self.requests = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self._latencies.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms_p50": percentile(0.50),
+            "latency_ms_p99": percentile(0.99),
+        }
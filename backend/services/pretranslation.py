@@ -0,0 +1,53 @@
+from services.translation_service import translate_many
+
+# Teachers write in English unless a request says otherwise
+DEFAULT_SOURCE_LANGUAGE = "en"
+
+# The languages the app offers (models/chatModel.ts LANGUAGES). A class can
+# narrow this with a `languages` list on its document; see scripts/addClass.py.
+SUPPORTED_LANGUAGES = ["en", "zh", "ms", "ta"]
+
+
+async def pretranslate_document(db, doc_ref, classid: str, fields: dict, source: str = DEFAULT_SOURCE_LANGUAGE):
+    """
+    Translates a new announcement/homework into every language configured on
+    its class (class.languages, else SUPPORTED_LANGUAGES) and stores them
+    under translations.{lang}, so reads never have to call the translation service.
+    Runs as a background task after the create request has returned.
+    """
+    try:
+        class_doc = await db.collection("class").document(classid).get()
+        if not class_doc.exists:
+            return
+
+        configured = class_doc.to_dict().get("languages") or SUPPORTED_LANGUAGES
+        languages = [lang for lang in configured if lang != source]
+        names = list(fields.keys())
+        texts = [fields[name] for name in names]
+
+        translations = {}
+        for lang in languages:
+            results = await translate_many(texts, source, lang)
+            if any(error for _, error in results):
+                print(f"❌ Pre-translation to {lang} failed for {doc_ref.id}")
+                continue
+            translations[lang] = {name: translated for name, (translated, _) in zip(names, results)}
+
+        if translations:
+            await doc_ref.update({f"translations.{lang}": value for lang, value in translations.items()})
+            print(f"✅ Pre-translated {doc_ref.id} into {', '.join(translations)}")
+
+    except Exception as e:
+        print("❌ Error pre-translating document:", e)
+
+
+def localize(data: dict, lang: str = None) -> dict:
+    """
+    Swaps in the stored translation for lang, if there is one, and drops the
+    translations map from the payload.
+    """
+    translations = data.pop("translations", None) or {}
+    if lang and lang in translations:
+        data.update(translations[lang])
+        data["language"] = lang
+    return data
@@ -0,0 +1,22 @@
+from services.image_processing import thumbnail_url
+
+
+async def load_profile(db, uid: str):
+    """
+    Returns the profile as /profile and the parent dashboard send it, or
+    None if the user has no document.
+    """
+    doc = await db.collection("users").document(uid).get()
+    if not doc.exists:
+        return None
+
+    profile = doc.to_dict()
+    return {
+        "user_id": uid,
+        "email": profile.get("email"),
+        "role": profile.get("role"),
+        "name": profile.get("name"),
+        "profilepic": profile.get("profilepic", ""),
+        "profilepicThumbnail": thumbnail_url(profile.get("profilepic", "")),
+        "message": f"Hello, {profile.get('name', 'User')}",
+    }
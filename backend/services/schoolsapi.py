@@ -1,25 +1,162 @@
+import argparse
+import hashlib
+import json
+import os
+
 import requests
 from firebase_admin import firestore
+from services.geocoding import GeocodingError, geocode_postal_code_sync
+
+DATASET_ID = "d_688b934f82c1059ed0a6993d2a829089"
+DATASTORE_URL = "https://data.gov.sg/api/action/datastore_search"
+PAGE_SIZE = 1000
+BATCH_LIMIT = 500  # Firestore max writes per batch
+REQUEST_TIMEOUT = 30
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".schoolsapi_checkpoint.json")
+
+
+def school_doc_id(record: dict) -> str:
+    school_name = record.get("school_name", "Unnamed School")
+    # Safe Firestore document ID
+    return school_name.replace("/", "_").replace(".", "").strip()
+
+
+def content_hash(record: dict) -> str:
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
 
-def preload_school_data():
+def fetch_page(session, offset: int, limit: int = PAGE_SIZE) -> dict:
+    response = session.get(
+        DATASTORE_URL,
+        params={"resource_id": DATASET_ID, "limit": limit, "offset": offset},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()["result"]
+
+
+def _load_checkpoint(path: str) -> int:
+    try:
+        with open(path) as file:
+            return json.load(file).get("offset", 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _save_checkpoint(path: str, offset: int):
+    with open(path, "w") as file:
+        json.dump({"offset": offset}, file)
+
+
+def preload_school_data(db=None, session=None, resume: bool = False, checkpoint_path: str = DEFAULT_CHECKPOINT) -> dict:
+    """
+    Syncs the full data.gov.sg school dataset into the schoolapi collection.
+    Pages through every record, skips schools whose content hash is
+    unchanged, and writes the rest in chunked batches. Progress is saved
+    after each page, so an interrupted run can pick up with resume=True.
+    Returns counts of fetched, written and unchanged records.
+    """
     print("📦 Preloading all school data into Firestore (collection: schoolapi)...")
 
-    db = firestore.client()
-    dataset_id = "d_688b934f82c1059ed0a6993d2a829089"
-    url = f"https://data.gov.sg/api/action/datastore_search?resource_id={dataset_id}&limit=1000"
+    db = db or firestore.client()
+    session = session or requests.Session()
+    offset = _load_checkpoint(checkpoint_path) if resume else 0
+    stats = {"fetched": 0, "written": 0, "unchanged": 0}
+
+    # One read of the stored hashes instead of a get per school
+    # geocode_failed_hash marks a version OneMap had no location for, so it
+    # is not looked up (and rewritten) again until the record itself changes
+    stored = {}
+    for doc in db.collection("schoolapi").select(["content_hash", "latitude", "geocode_failed_hash"]).stream():
+        data = doc.to_dict()
+        stored[doc.id] = (data.get("content_hash"), data.get("latitude") is not None, data.get("geocode_failed_hash"))
+
+    while True:
+        try:
+            page = fetch_page(session, offset, PAGE_SIZE)
+        except requests.RequestException as e:
+            print(f"❌ Failed to fetch school data at offset {offset}:", e)
+            return stats
+
+        records = page.get("records", [])
+        batch = db.batch()
+        pending = 0
+
+        for record in records:
+            doc_id = school_doc_id(record)
+            digest = content_hash(record)
+            stored_hash, geocoded, failed_hash = stored.get(doc_id, (None, False, None))
+            postal_code = record.get("postal_code")
+            changed = stored_hash != digest
+            stats["fetched"] += 1
+
+            if not changed and (geocoded or not postal_code or failed_hash == digest):
+                stats["unchanged"] += 1
+                continue
+
+            update = dict(record, content_hash=digest)
+            located = geocoded and not changed
+            if postal_code and not located:
+                try:
+                    update["latitude"], update["longitude"] = geocode_postal_code_sync(session, postal_code)
+                    located = True
+                except (GeocodingError, KeyError, ValueError) as e:
+                    print(f"⚠️ No location for {record.get('school_name')}: {e}")
+                    update["geocode_failed_hash"] = digest
+                except requests.RequestException as e:
+                    # OneMap unreachable: try again next run, and don't
+                    # rewrite a record whose content has not changed
+                    print(f"⚠️ Could not geocode {record.get('school_name')}: {e}")
+                    if not changed:
+                        stats["unchanged"] += 1
+                        continue
+
+            if not located:
+                # Coordinates of an earlier version may be for another address;
+                # without them the next run (or the first request) looks it up again
+                update["latitude"] = update["longitude"] = firestore.DELETE_FIELD
+
+            batch.set(db.collection("schoolapi").document(doc_id), update, merge=True)
+            stored[doc_id] = (digest, located, update.get("geocode_failed_hash", failed_hash))
+            pending += 1
+            stats["written"] += 1
+
+            if pending == BATCH_LIMIT:
+                batch.commit()
+                batch = db.batch()
+                pending = 0
+
+        if pending:
+            batch.commit()
+
+        offset += len(records)
+        _save_checkpoint(checkpoint_path, offset)
+
+        total = page.get("total", 0)
+        if not records or len(records) < PAGE_SIZE or offset >= total:
+            break
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    print(
+        f"✅ Synced {stats['fetched']} school records into `schoolapi`: "
+        f"{stats['written']} written, {stats['unchanged']} unchanged."
+    )
+    return stats
 
-    response = requests.get(url)
-    if not response.ok:
-        print("❌ Failed to fetch school data:", response.status_code)
-        return
 
-    records = response.json()["result"]["records"]
+# ✅ Run it: python -m services.schoolsapi [--resume]
+if __name__ == "__main__":
+    import firebase_admin
+    from firebase_admin import credentials
 
-    for record in records:
-        school_name = record.get("school_name", "Unnamed School")
-        # Safe Firestore document ID
-        doc_id = school_name.replace("/", "_").replace(".", "").strip()
+    parser = argparse.ArgumentParser(description="Sync the data.gov.sg school dataset into Firestore.")
+    parser.add_argument("--resume", action="store_true", help="continue from the last saved page")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="checkpoint file path")
+    args = parser.parse_args()
 
-        db.collection("schoolapi").document(doc_id).set(record, merge=True)
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate("serviceAccountKey.json"))
 
-    print(f"✅ Preloaded {len(records)} full school records into Firestore collection `schoolapi`.")
+    preload_school_data(resume=args.resume, checkpoint_path=args.checkpoint)
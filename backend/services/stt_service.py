@@ -0,0 +1,107 @@
+import asyncio
+import queue
+import threading
+
+from google.cloud import speech
+from google.oauth2 import service_account
+
+# Synchronous recognize accepts at most 10 MB of inline audio
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Load credentials (ensure this path is correct in your deployment)
+credentials = service_account.Credentials.from_service_account_file("speech-to-text-key.json")
+speech_client = speech.SpeechClient(credentials=credentials)
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+async def read_upload(file, limit: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Reads an UploadFile in chunks, refusing to buffer more than limit bytes.
+    """
+    content = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return bytes(content)
+        if len(content) + len(chunk) > limit:
+            raise UploadTooLargeError(f"Audio larger than {limit} bytes")
+        content.extend(chunk)
+
+
+def recognize(content: bytes, config: speech.RecognitionConfig) -> str:
+    audio = speech.RecognitionAudio(content=content)
+    response = speech_client.recognize(config=config, audio=audio)
+    return " ".join(result.alternatives[0].transcript for result in response.results)
+
+
+async def transcribe(content: bytes, config: speech.RecognitionConfig) -> str:
+    # The Speech client is blocking; keep it off the event loop
+    return await asyncio.to_thread(recognize, content, config)
+
+
+class StreamingSession:
+    """
+    Bridges an async audio source to the blocking streaming_recognize call.
+    Audio chunks are fed in with feed(); transcripts come out of results()
+    as {"text", "isFinal"} dicts, in order, until the stream ends.
+    """
+
+    _END = object()
+
+    def __init__(self, config: speech.RecognitionConfig, interim_results: bool = True):
+        self.streaming_config = speech.StreamingRecognitionConfig(
+            config=config, interim_results=interim_results
+        )
+        self._audio = queue.Queue()
+        self._results = asyncio.Queue()
+        self.done = False
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def feed(self, chunk: bytes):
+        # Audio arrives in real time, so the queue stays a few chunks deep
+        if not self.done:
+            self._audio.put_nowait(chunk)
+
+    def close(self):
+        self._audio.put_nowait(self._END)
+
+    async def results(self):
+        while True:
+            item = await self._results.get()
+            if item is self._END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _requests(self):
+        while True:
+            chunk = self._audio.get()
+            if chunk is self._END:
+                return
+            yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+    def _emit(self, item):
+        self._loop.call_soon_threadsafe(self._results.put_nowait, item)
+
+    def _run(self):
+        try:
+            responses = speech_client.streaming_recognize(self.streaming_config, self._requests())
+            for response in responses:
+                for result in response.results:
+                    if result.alternatives:
+                        self._emit({
+                            "text": result.alternatives[0].transcript,
+                            "isFinal": result.is_final,
+                        })
+        except Exception as e:
+            self._emit(e)
+        finally:
+            self.done = True
+            self._emit(self._END)
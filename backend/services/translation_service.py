@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import httpx
+from services.cache import TTLCache
+from services.metrics import LatencyMetrics
+from services.singleflight import SingleFlight
+
+TRANSLATE_URL = os.getenv(
+    "TRANSLATE_URL",
+    "https://translate-text-565810748414.asia-southeast1.run.app/translate",  # Your Cloud Run URL
+)
+TRANSLATE_TIMEOUT = 10
+
+# Announcements and chat lines are re-read by many parents; keep their translations
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", str(24 * 3600)))
+
+# Upstream takes one text per request; cap how many a batch runs at once
+BATCH_UPSTREAM_CONCURRENCY = int(os.getenv("TRANSLATE_BATCH_CONCURRENCY", "8"))
+MAX_BATCH_TEXTS = 500
+
+
+class TranslationError(Exception):
+    def __init__(self, message: str, detail: str = ""):
+        super().__init__(message)
+        self.detail = detail
+
+
+translation_cache = TTLCache(maxsize=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL)
+upstream_metrics = LatencyMetrics()
+_translation_flight = SingleFlight()
+_batch_slots = asyncio.Semaphore(BATCH_UPSTREAM_CONCURRENCY)
+_client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    One pooled client for the app's lifetime: keep-alive connections and
+    HTTP/2 multiplexing instead of a new TCP+TLS handshake per call.
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=TRANSLATE_TIMEOUT,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def cache_key(text: str, source: str, target: str) -> tuple:
+    return (source, target, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+
+async def _fetch_translation(text: str, source: str, target: str) -> str:
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = await get_client().post(
+            TRANSLATE_URL,
+            json={  # Send the payload directly (not under 'request')
+                "text": text,
+                "source": source,
+                "target": target
+            },
+        )
+        if response.status_code != 200:
+            raise TranslationError(
+                f"Translation API failed with status {response.status_code}", response.text
+            )
+        try:
+            translated = response.json().get("translatedText")
+        except (ValueError, AttributeError):
+            translated = None
+        if not isinstance(translated, str):
+            # Never cache a reply we could not use
+            raise TranslationError("Translation API returned no translation", response.text)
+        ok = True
+        return translated
+    finally:
+        upstream_metrics.record(time.perf_counter() - started, ok)
+
+
+async def translate(text: str, source: str, target: str) -> str:
+    """
+    Cached translation; concurrent requests for the same text share one upstream call.
+    """
+    if source == target:
+        return text
+
+    key = cache_key(text, source, target)
+    cached = translation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    return await _translate_uncached(key, text, source, target)
+
+
+async def _translate_uncached(key: tuple, text: str, source: str, target: str) -> str:
+    async def fetch_and_store():
+        translated = await _fetch_translation(text, source, target)
+        translation_cache.set(key, translated)
+        return translated
+
+    return await _translation_flight.do(key, fetch_and_store)
+
+
+async def translate_many(texts: list, source: str, target: str) -> list:
+    """
+    Translates a list of texts, returning (translated, error) pairs in input
+    order. Duplicates are translated once, cached texts skip upstream, and
+    the rest go upstream concurrently under a shared concurrency cap. One
+    failing text does not fail the others.
+    """
+    unique = list(dict.fromkeys(texts))
+    results = {}
+    misses = []
+
+    for text in unique:
+        cached = text if source == target else translation_cache.get(cache_key(text, source, target))
+        if cached is not None:
+            results[text] = (cached, None)
+        else:
+            misses.append(text)
+
+    async def translate_one(text):
+        async with _batch_slots:
+            try:
+                translated = await _translate_uncached(cache_key(text, source, target), text, source, target)
+                results[text] = (translated, None)
+            except TranslationError as e:
+                results[text] = (None, f"{e}: {e.detail}" if e.detail else str(e))
+            except Exception as e:
+                results[text] = (None, f"Exception occurred: {e}")
+
+    await asyncio.gather(*(translate_one(text) for text in misses))
+    return [results[text] for text in texts]
+
+
+def translation_stats() -> dict:
+    return {
+        "cache": translation_cache.stats(),
+        "upstream": upstream_metrics.stats(),
+        "inflight": len(_translation_flight),
+    }
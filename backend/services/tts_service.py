@@ -0,0 +1,304 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from google.cloud import texttospeech
+from starlette.staticfiles import StaticFiles
+from services.singleflight import SingleFlight
+
+AUDIO_DIR = "static/audio"
+AUDIO_URL_PATH = "/static/audio"
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Syntheses running at once, and how many more may wait before we shed load
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+TTS_MAX_QUEUE = int(os.getenv("TTS_MAX_QUEUE", "16"))
+
+# Streaming mode synthesizes this many sentences ahead of the one being sent
+STREAM_LOOKAHEAD = 2
+STREAM_CHUNK_SIZE = 32 * 1024
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])")
+
+AUDIO_ENCODING = texttospeech.AudioEncoding.MP3
+AUDIO_EXTENSION = "mp3"
+CACHE_FILENAME = re.compile(r"^[0-9a-f]{64}\." + AUDIO_EXTENSION + "$")
+
+
+class StubTTSClient:
+    """
+    Offline stand-in for TextToSpeechClient (TTS_CLIENT=stub), so cache hit
+    rates and latency can be measured without calling Google.
+    """
+
+    def __init__(self, latency: float = None):
+        self.latency = float(os.getenv("TTS_STUB_LATENCY", "0.3")) if latency is None else latency
+        self.calls = 0
+
+    def synthesize_speech(self, input, voice, audio_config):
+        self.calls += 1
+        time.sleep(self.latency)
+        digest = hashlib.sha256(f"{voice.language_code}:{input.text}".encode("utf-8")).digest()
+        return SimpleNamespace(audio_content=b"ID3" + digest * 32)
+
+
+def create_tts_client():
+    if os.getenv("TTS_CLIENT") == "stub":
+        return StubTTSClient()
+
+    from google.oauth2 import service_account
+
+    credentials = service_account.Credentials.from_service_account_file("speech-to-text-key.json")
+    return texttospeech.TextToSpeechClient(credentials=credentials)
+
+
+class AudioCache:
+    """
+    Content-addressed audio files on disk with a total size bound; the least
+    recently used files are deleted first once the bound is exceeded.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._sizes = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        existing = [
+            entry for entry in os.scandir(directory)
+            if entry.is_file() and CACHE_FILENAME.match(entry.name)
+        ]
+        for entry in sorted(existing, key=lambda e: e.stat().st_atime):
+            self._sizes[entry.name] = entry.stat().st_size
+            self._total += entry.stat().st_size
+
+    @staticmethod
+    def key(text: str, language_code: str, voice: str, encoding) -> str:
+        raw = "\x00".join([text, language_code, voice or "", str(int(encoding))])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def filename(self, key: str) -> str:
+        return f"{key}.{AUDIO_EXTENSION}"
+
+    def lookup(self, key: str) -> bool:
+        name = self.filename(key)
+        with self._lock:
+            if name in self._sizes:
+                self._sizes.move_to_end(name)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def read(self, key: str):
+        """
+        Returns the cached audio bytes, or None if the file was evicted.
+        """
+        try:
+            with open(os.path.join(self.directory, self.filename(key)), "rb") as audio_file:
+                return audio_file.read()
+        except FileNotFoundError:
+            return None
+
+    def store(self, key: str, audio: bytes):
+        name = self.filename(key)
+        path = os.path.join(self.directory, name)
+        # Write then rename so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as out:
+            out.write(audio)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total += len(audio) - self._sizes.pop(name, 0)
+            self._sizes[name] = len(audio)
+            evicted = []
+            while self._total > self.max_bytes and len(self._sizes) > 1:
+                old_name, size = self._sizes.popitem(last=False)
+                self._total -= size
+                evicted.append(old_name)
+
+        for old_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old_name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            files = len(self._sizes)
+            total = self._total
+        lookups = self.hits + self.misses
+        return {
+            "files": files,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class AudioFiles(StaticFiles):
+    """
+    Serves the audio cache. A file's name is the hash of what it contains,
+    so a URL never changes meaning and clients can keep it forever.
+    Starlette's ETag/304 handling covers revalidation.
+    """
+
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class TTSBusyError(Exception):
+    pass
+
+
+class SynthesisLimiter:
+    """
+    Runs blocking synthesis on a bounded thread pool, off the event loop.
+    Work beyond the pool waits in the executor queue up to max_queue; past
+    that, callers are rejected with TTSBusyError instead of piling up.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="tts")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_concurrency + self.max_queue:
+                self.rejected += 1
+                raise TTSBusyError("Text-to-speech is saturated, retry shortly")
+            self.pending += 1
+
+        try:
+            future = self._executor.submit(self._call, fn, args)
+        except BaseException:
+            self._release()
+            raise
+        # Counted down when the job leaves the executor, not when this caller
+        # stops waiting: a cancelled request's job may still be queued or running
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+
+    def _call(self, fn, args):
+        with self._lock:
+            self.active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "queued": self.pending - self.active,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+tts_client = create_tts_client()
+synthesis_limiter = SynthesisLimiter(TTS_MAX_CONCURRENCY, TTS_MAX_QUEUE)
+audio_cache = AudioCache(AUDIO_DIR, AUDIO_CACHE_MAX_BYTES)
+_synthesis_flight = SingleFlight()
+
+
+def synthesize(text: str, language_code: str, voice_name: str = None) -> bytes:
+    input_text = texttospeech.SynthesisInput(text=text)
+    voice = texttospeech.VoiceSelectionParams(
+        language_code=language_code,
+        name=voice_name or "",
+        ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL,
+    )
+    audio_config = texttospeech.AudioConfig(audio_encoding=AUDIO_ENCODING)
+
+    response = tts_client.synthesize_speech(
+        input=input_text, voice=voice, audio_config=audio_config
+    )
+    return response.audio_content
+
+
+async def get_or_synthesize(text: str, language_code: str, voice_name: str = None) -> str:
+    """
+    Returns the cache key of the audio for this request, synthesizing it at
+    most once even when identical requests arrive concurrently.
+    """
+    key = AudioCache.key(text, language_code, voice_name, AUDIO_ENCODING)
+    if audio_cache.lookup(key):
+        return key
+
+    def synthesize_and_store():
+        audio_cache.store(key, synthesize(text, language_code, voice_name))
+        return key
+
+    return await _synthesis_flight.do(key, lambda: synthesis_limiter.run(synthesize_and_store))
+
+
+def audio_url(base_url: str, key: str) -> str:
+    return f"{base_url.rstrip('/')}{AUDIO_URL_PATH}/{audio_cache.filename(key)}"
+
+
+def split_sentences(text: str) -> list:
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+async def _sentence_audio(sentence: str, language_code: str, voice_name: str) -> bytes:
+    key = await get_or_synthesize(sentence, language_code, voice_name)
+    audio = await asyncio.to_thread(audio_cache.read, key)
+    if audio is None:
+        # Evicted between synthesis and read; synthesize once more without caching
+        audio = await synthesis_limiter.run(synthesize, sentence, language_code, voice_name)
+    return audio
+
+
+async def stream_speech(text: str, language_code: str, voice_name: str = None):
+    """
+    Yields MP3 audio sentence by sentence. Later sentences are synthesized
+    while earlier ones are being sent, so playback can start after the first.
+    """
+    pending = deque()
+    try:
+        for sentence in split_sentences(text):
+            pending.append(asyncio.ensure_future(_sentence_audio(sentence, language_code, voice_name)))
+            if len(pending) <= STREAM_LOOKAHEAD:
+                continue
+            audio = await pending.popleft()
+            for start in range(0, len(audio), STREAM_CHUNK_SIZE):
+                yield audio[start:start + STREAM_CHUNK_SIZE]
+
+        while pending:
+            audio = await pending.popleft()
+            for start in range(0, len(audio), STREAM_CHUNK_SIZE):
+                yield audio[start:start + STREAM_CHUNK_SIZE]
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,91 @@
+"""
+Builds small audio files in each format /transcribe accepts, so the
+fixtures are readable here instead of being checked-in binaries.
+"""
+import io
+import math
+import struct
+import wave
+from array import array
+
+
+def sine(rate: int, seconds: float = 0.1, frequency: float = 440.0, amplitude: float = 0.5) -> list:
+    return [amplitude * math.sin(2 * math.pi * frequency * i / rate) for i in range(int(rate * seconds))]
+
+
+def _pcm(samples: list, width: int) -> bytes:
+    if width == 1:
+        return bytes(int(round(128 + value * 127)) for value in samples)
+    if width == 2:
+        return array("h", (int(round(value * 32767)) for value in samples)).tobytes()
+    scale = 2 ** (8 * width - 1) - 1
+    return b"".join(int(round(value * scale)).to_bytes(width, "little", signed=True) for value in samples)
+
+
+def wav(samples: list, rate: int = 16000, width: int = 2, channels: int = 1) -> bytes:
+    """
+    Integer PCM WAV via the wave module; each sample is repeated on every channel.
+    """
+    out = io.BytesIO()
+    with wave.open(out, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(width)
+        writer.setframerate(rate)
+        interleaved = [value for value in samples for _ in range(channels)]
+        writer.writeframes(_pcm(interleaved, width))
+    return out.getvalue()
+
+
+def raw_wav(data: bytes, rate: int, tag: int = 1, width: int = 2, channels: int = 1,
+            extensible: bool = False, extra_chunks: bytes = b"", bits: int = None) -> bytes:
+    """
+    Hand-built WAV for what the wave module cannot write: float samples,
+    WAVE_FORMAT_EXTENSIBLE, other format tags, extra chunks and headers
+    that lie about their sample size.
+    """
+    block_align = width * channels
+    bits = 8 * width if bits is None else bits
+    fmt = struct.pack("<HHIIHH", 0xFFFE if extensible else tag, channels, rate, rate * block_align, block_align, bits)
+    if extensible:
+        guid_tail = b"\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71"
+        fmt += struct.pack("<HHI", 22, 8 * width, 0) + struct.pack("<H", tag) + guid_tail
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + extra_chunks
+    body += b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def float_wav(samples: list, rate: int = 16000) -> bytes:
+    return raw_wav(array("f", samples).tobytes(), rate, tag=3, width=4)
+
+
+def flac(rate: int = 44100, channels: int = 2) -> bytes:
+    packed = (rate << 4) | ((channels - 1) << 1)
+    streaminfo = bytes(10) + packed.to_bytes(3, "big") + bytes(21)
+    return b"fLaC" + b"\x00\x00\x00\x22" + streaminfo
+
+
+def ogg_opus(input_rate: int = 48000, channels: int = 1) -> bytes:
+    head = b"OpusHead" + bytes([1, channels]) + struct.pack("<HIhB", 312, input_rate, 0, 0)
+    return b"OggS" + bytes(24) + head
+
+
+def ogg_vorbis() -> bytes:
+    return b"OggS" + bytes(24) + b"\x01vorbis" + bytes(16)
+
+
+def webm() -> bytes:
+    return b"\x1a\x45\xdf\xa3" + bytes(32)
+
+
+def amr(wideband: bool = False) -> bytes:
+    return (b"#!AMR-WB\n" if wideband else b"#!AMR\n") + bytes(32)
+
+
+def mp3(version_bits: int = 3, rate_index: int = 0, mono: bool = False, id3: bool = True) -> bytes:
+    """
+    One MPEG audio frame header, optionally behind an ID3v2 tag.
+    version_bits 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5.
+    """
+    header = bytes([0xFF, 0xE0 | (version_bits << 3) | 0x03, 0x90 | (rate_index << 2), 0xC0 if mono else 0x00])
+    tag = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + bytes(20) if id3 else b""
+    return tag + header + bytes(64)
@@ -0,0 +1,10 @@
+import pytest
+
+from tests.support import configure_environment
+
+configure_environment()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
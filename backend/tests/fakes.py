@@ -0,0 +1,698 @@
+import asyncio
+import copy
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.watch import ChangeType
+
+# How long a transaction waits for a document another one has locked
+# before giving up, as Firestore does to break deadlocks
+LOCK_TIMEOUT = 5.0
+
+_MISSING = object()
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _transform(current, value):
+    if value is transforms.SERVER_TIMESTAMP:
+        return _now()
+    if isinstance(value, transforms.Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in result:
+                result.append(item)
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        return [item for item in current if item not in value.values] if isinstance(current, list) else []
+    if isinstance(value, dict):
+        return {key: _transform(None, item) for key, item in value.items()}
+    return copy.deepcopy(value)
+
+
+def _merge(target: dict, data: dict):
+    # set(merge=True): nested maps merge field by field
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and value:
+            if not isinstance(target.get(key), dict):
+                target[key] = {}
+            _merge(target[key], value)
+        else:
+            target[key] = _transform(target.get(key), value)
+
+
+def _update(target: dict, data: dict):
+    # update(): keys are dotted field paths, and a map value replaces the field
+    for field_path, value in data.items():
+        *parents, leaf = field_path.split(".")
+        node = target
+        for key in parents:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        if value is transforms.DELETE_FIELD:
+            node.pop(leaf, None)
+        else:
+            node[leaf] = _transform(node.get(leaf), value)
+
+
+def _field(data: dict, field_path: str):
+    value = data
+    for key in field_path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+_OPERATORS = {
+    "==": lambda value, operand: value == operand,
+    "!=": lambda value, operand: value != operand,
+    "<": lambda value, operand: value < operand,
+    "<=": lambda value, operand: value <= operand,
+    ">": lambda value, operand: value > operand,
+    ">=": lambda value, operand: value >= operand,
+    "in": lambda value, operand: value in operand,
+    "not-in": lambda value, operand: value not in operand,
+    "array_contains": lambda value, operand: isinstance(value, list) and operand in value,
+    "array_contains_any": lambda value, operand: isinstance(value, list) and any(item in value for item in operand),
+}
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self.exists else None
+
+    def get(self, field_path: str):
+        value = _field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class FakeFirestore:
+    """
+    In-memory stand-in for the async Firestore client. Supports documents
+    and subcollections, set (with merge), dotted-path update, delete, the
+    Increment/ArrayUnion/ArrayRemove/DELETE_FIELD/SERVER_TIMESTAMP
+    sentinels, batches, transactions, get_all and simple queries.
+
+    Every call yields to the event loop (after `latency` seconds), so
+    concurrent requests interleave the way they do against the server.
+    Transactions lock the documents they read until they commit, like the
+    server client's pessimistic transactions; other transactions and
+    batches touching those documents wait. reads and writes count
+    documents, the way Firestore bills them; commits counts batches and
+    path_writes the writes to each document.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self._query_class = FakeQuery
+        self.latency = latency
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.path_writes = Counter()
+        self._documents = {}
+        self._locks = {}
+
+    # --- client API ---
+
+    def collection(self, path: str):
+        return FakeCollection(self, path)
+
+    def document(self, path: str):
+        return FakeDocumentReference(self, path)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False):
+        return FakeTransaction(self, max_attempts, read_only)
+
+    async def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        await self._rpc()
+        for reference in references:
+            yield await self._read(reference, transaction)
+
+    # --- test helpers ---
+
+    def seed(self, path: str, data: dict):
+        self._documents[path] = copy.deepcopy(data)
+
+    def data(self, path: str):
+        return copy.deepcopy(self._documents.get(path))
+
+    def paths(self, collection: str) -> list:
+        return sorted(self._children(collection))
+
+    def reset_counts(self):
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.path_writes.clear()
+
+    def sync_client(self):
+        """
+        A blocking client of the same database, for on_snapshot listeners.
+        """
+        return FakeSyncFirestore(self.latency, documents=self._documents)
+
+    # --- internals ---
+
+    async def _rpc(self):
+        await asyncio.sleep(self.latency)
+
+    def _lock(self, path: str) -> asyncio.Lock:
+        return self._locks.setdefault(path, asyncio.Lock())
+
+    def _children(self, collection: str):
+        prefix = collection + "/"
+        return [path for path in self._documents if path.startswith(prefix) and "/" not in path[len(prefix):]]
+
+    async def _read(self, reference, transaction=None):
+        if transaction is not None:
+            await transaction._acquire(reference.path)
+        self.reads += 1
+        return FakeSnapshot(reference, copy.deepcopy(self._documents.get(reference.path)))
+
+    async def _commit(self, writes: list, held=()):
+        # Wait for any transaction holding these documents, in a fixed order
+        acquired = []
+        try:
+            for path in sorted({write[1] for write in writes} - set(held)):
+                await self._lock(path).acquire()
+                acquired.append(path)
+            self._apply(writes)
+        finally:
+            for path in acquired:
+                self._lock(path).release()
+
+    def _apply(self, writes: list):
+        # All or nothing: a failed update leaves every document untouched
+        staged = {}
+        for op, path, data, merge in writes:
+            current = staged[path] if path in staged else self._documents.get(path)
+            if op == "set":
+                if merge:
+                    document = copy.deepcopy(current) if current is not None else {}
+                    _merge(document, data)
+                else:
+                    document = _transform(None, data)
+                staged[path] = document
+            elif op == "update":
+                if current is None:
+                    raise exceptions.NotFound(f"No document to update: {path}")
+                document = copy.deepcopy(current)
+                _update(document, data)
+                staged[path] = document
+            elif op == "create":
+                if current is not None:
+                    raise exceptions.AlreadyExists(f"Document already exists: {path}")
+                staged[path] = _transform(None, data)
+            else:
+                staged[path] = None
+
+        for path, document in staged.items():
+            if document is None:
+                self._documents.pop(path, None)
+            else:
+                self._documents[path] = document
+        self.writes += len(writes)
+        self.path_writes.update(path for _, path, _, _ in writes)
+
+
+class _Writes:
+    def __init__(self):
+        self._writes = []
+
+    def set(self, reference, data: dict, merge: bool = False):
+        self._writes.append(("set", reference.path, data, merge))
+
+    def update(self, reference, data: dict):
+        self._writes.append(("update", reference.path, data, False))
+
+    def create(self, reference, data: dict):
+        self._writes.append(("create", reference.path, data, False))
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference.path, None, False))
+
+
+class FakeWriteBatch(_Writes):
+    def __init__(self, db: FakeFirestore):
+        super().__init__()
+        self._db = db
+
+    def __len__(self):
+        return len(self._writes)
+
+    async def commit(self):
+        writes, self._writes = self._writes, []
+        self._db.commits += 1
+        await self._db._rpc()
+        await self._db._commit(writes)
+        return writes
+
+
+class FakeTransaction(_Writes):
+    """
+    Drives the real @firestore.async_transactional decorator, which calls
+    the underscore methods below.
+    """
+
+    def __init__(self, db: FakeFirestore, max_attempts: int, read_only: bool):
+        super().__init__()
+        self._db = db
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._held = []
+        self.attempts = 0
+
+    async def _acquire(self, path: str):
+        if path in self._held:
+            return
+        try:
+            await asyncio.wait_for(self._db._lock(path).acquire(), LOCK_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise exceptions.Aborted(f"Timed out waiting for a lock on {path}")
+        self._held.append(path)
+
+    def _release(self):
+        for path in self._held:
+            self._db._lock(path).release()
+        self._held = []
+
+    def _clean_up(self):
+        self._release()
+        self._writes = []
+        self._id = None
+
+    async def _begin(self, retry_id=None):
+        self.attempts += 1
+        self._id = uuid.uuid4().bytes
+
+    async def _commit(self):
+        writes, self._writes = self._writes, []
+        try:
+            await self._db._rpc()
+            await self._db._commit(writes, held=self._held)
+        finally:
+            self._release()
+            self._id = None
+
+    async def _rollback(self):
+        self._clean_up()
+
+
+class FakeDocumentReference:
+    def __init__(self, db: FakeFirestore, path: str):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    @property
+    def parent(self):
+        return self._db.collection(self.path.rsplit("/", 1)[0])
+
+    def collection(self, name: str):
+        return self._db.collection(f"{self.path}/{name}")
+
+    async def get(self, field_paths=None, transaction=None):
+        await self._db._rpc()
+        return await self._db._read(self, transaction)
+
+    async def set(self, data: dict, merge: bool = False):
+        await self._db._rpc()
+        await self._db._commit([("set", self.path, data, merge)])
+
+    async def update(self, data: dict):
+        await self._db._rpc()
+        await self._db._commit([("update", self.path, data, False)])
+
+    async def create(self, data: dict):
+        await self._db._rpc()
+        await self._db._commit([("create", self.path, data, False)])
+
+    async def delete(self):
+        await self._db._rpc()
+        await self._db._commit([("delete", self.path, None, False)])
+
+
+class FakeQuery:
+    def __init__(self, db: FakeFirestore, path: str, filters=(), orders=(), limit=None, cursor=None, fields=None):
+        self._db = db
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._cursor = cursor
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit, cursor=self._cursor, fields=self._fields)
+        state.update(changes)
+        return self._db._query_class(self._db, self._path, **state)
+
+    def where(self, field_path: str, op_string: str, value):
+        return self._copy(filters=self._filters + ((field_path, _OPERATORS[op_string], value),))
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING"):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int):
+        return self._copy(limit=count)
+
+    def start_after(self, snapshot):
+        # Only snapshot cursors, taken from the same ordering
+        return self._copy(cursor=snapshot.reference.path)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    async def stream(self, transaction=None):
+        await self._db._rpc()
+        for path in self._matching_paths():
+            yield self._project(await self._db._read(self._db.document(path), transaction))
+
+    def _project(self, snapshot):
+        if self._fields is not None and snapshot.exists:
+            snapshot._data = {
+                field: value for field in self._fields
+                if (value := _field(snapshot._data, field)) is not _MISSING
+            }
+        return snapshot
+
+    async def get(self, transaction=None):
+        return [snapshot async for snapshot in self.stream(transaction=transaction)]
+
+    def _matching_paths(self) -> list:
+        documents = self._db._documents
+        paths = [
+            path for path in self._db._children(self._path)
+            if all(
+                (value := _field(documents[path], field)) is not _MISSING and test(value, operand)
+                for field, test, operand in self._filters
+            )
+        ]
+        paths.sort()
+        for field, direction in reversed(self._orders):
+            paths = [path for path in paths if _field(documents[path], field) is not _MISSING]
+            paths.sort(key=lambda path: _field(documents[path], field), reverse=direction == "DESCENDING")
+
+        if self._cursor is not None:
+            paths = paths[paths.index(self._cursor) + 1:] if self._cursor in paths else []
+        return paths if self._limit is None else paths[:self._limit]
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db: FakeFirestore, path: str):
+        super().__init__(db, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: str = None):
+        return self._db.document(f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    async def add(self, document_data: dict, document_id: str = None):
+        reference = self.document(document_id)
+        await reference.set(document_data)
+        return _now(), reference
+
+
+class FakeSyncFirestore(FakeFirestore):
+    """
+    Blocking flavour of the fake, like firestore.client(): every call
+    sleeps `latency` seconds in the calling thread. No transactions.
+    Passing another fake's `documents` makes both clients of one database.
+    Collections support on_snapshot; listeners are called in the writing
+    thread with the changed documents.
+    """
+
+    def __init__(self, latency: float = 0.0, documents: dict = None):
+        super().__init__(latency)
+        self._query_class = SyncQuery
+        if documents is not None:
+            self._documents = documents
+        self._listeners = {}
+
+    def collection(self, path: str):
+        return SyncCollection(self, path)
+
+    def document(self, path: str):
+        return SyncDocumentReference(self, path)
+
+    def batch(self):
+        return SyncWriteBatch(self)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        self._rpc_sync()
+        for reference in references:
+            yield self._read_sync(reference)
+
+    def _rpc_sync(self):
+        time.sleep(self.latency)
+
+    def _read_sync(self, reference):
+        self.reads += 1
+        return FakeSnapshot(reference, copy.deepcopy(self._documents.get(reference.path)))
+
+    def _write_sync(self, writes: list):
+        self._rpc_sync()
+        existed = {path: path in self._documents for _, path, _, _ in writes}
+        self._apply(writes)
+        self._notify(existed)
+
+    def _notify(self, existed: dict):
+        for collection, callbacks in list(self._listeners.items()):
+            for callback in list(callbacks):
+                self._deliver(callback, collection, existed)
+
+    def _deliver(self, callback, collection: str, existed: dict):
+        changes = []
+        for path, was_there in existed.items():
+            if path.rsplit("/", 1)[0] != collection:
+                continue
+            data = copy.deepcopy(self._documents.get(path))
+            kind = ChangeType.REMOVED if data is None else ChangeType.MODIFIED if was_there else ChangeType.ADDED
+            changes.append(SimpleNamespace(type=kind, document=FakeSnapshot(self.document(path), data)))
+        if changes:
+            callback([change.document for change in changes], changes, _now())
+
+
+class SyncWriteBatch(_Writes):
+    def __init__(self, db: FakeSyncFirestore):
+        super().__init__()
+        self._db = db
+
+    def __len__(self):
+        return len(self._writes)
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        self._db.commits += 1
+        self._db._write_sync(writes)
+        return writes
+
+
+class SyncDocumentReference(FakeDocumentReference):
+    def get(self, field_paths=None, transaction=None):
+        self._db._rpc_sync()
+        return self._db._read_sync(self)
+
+    def set(self, data: dict, merge: bool = False):
+        self._db._write_sync([("set", self.path, data, merge)])
+
+    def update(self, data: dict):
+        self._db._write_sync([("update", self.path, data, False)])
+
+    def create(self, data: dict):
+        self._db._write_sync([("create", self.path, data, False)])
+
+    def delete(self):
+        self._db._write_sync([("delete", self.path, None, False)])
+
+
+class SyncQuery(FakeQuery):
+    def stream(self, transaction=None):
+        self._db._rpc_sync()
+        for path in self._matching_paths():
+            yield self._project(self._db._read_sync(self._db.document(path)))
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+
+class SyncCollection(SyncQuery, FakeCollection):
+    def add(self, document_data: dict, document_id: str = None):
+        reference = self.document(document_id)
+        reference.set(document_data)
+        return _now(), reference
+
+    def on_snapshot(self, callback):
+        """
+        Like the real listener, the first call lists every document as added.
+        """
+        listeners = self._db._listeners.setdefault(self._path, [])
+        listeners.append(callback)
+        self._db._deliver(callback, self._path, dict.fromkeys(self._db._children(self._path), False))
+        return SimpleNamespace(unsubscribe=lambda: listeners.remove(callback))
+
+
+class FakeTTSClient:
+    """
+    Stands in for TextToSpeechClient. synthesize_speech blocks the calling
+    thread like the real one: for `latency` seconds, or, when gated, until
+    release() is called.
+    """
+
+    def __init__(self, latency: float = 0.0, gated: bool = False):
+        self.latency = latency
+        self.calls = 0
+        self._gate = threading.Event()
+        if not gated:
+            self._gate.set()
+        self._lock = threading.Lock()
+
+    def release(self):
+        self._gate.set()
+
+    def synthesize_speech(self, input, voice, audio_config):
+        with self._lock:
+            self.calls += 1
+        if not self._gate.wait(timeout=10):
+            raise TimeoutError("FakeTTSClient was never released")
+        time.sleep(self.latency)
+        return SimpleNamespace(audio_content=f"ID3:{voice.language_code}:{input.text}".encode("utf-8"))
+
+
+class FakeUploader:
+    """
+    Stands in for the Cloudinary upload call. Each attempt reads the whole
+    file like the real one, blocks for `latency` seconds, then raises the
+    next exception queued in `failures` or returns a Cloudinary-shaped
+    result. Records every attempt and the most that ran at once.
+    """
+
+    def __init__(self, latency: float = 0.0, failures=()):
+        self.latency = latency
+        self.failures = list(failures)
+        self.attempts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, file, **options):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            failure = self.failures.pop(0) if self.failures else None
+        started = time.monotonic()
+        content = b""
+        try:
+            content = file.read() if hasattr(file, "read") else bytes(file)
+            time.sleep(self.latency)
+            if failure:
+                raise failure
+            resource_type = options.get("resource_type", "image")
+            return {
+                "public_id": options["public_id"],
+                "secure_url": f"https://res.cloudinary.com/demo/{resource_type}/upload/v1/{options['public_id']}",
+                "bytes": len(content),
+            }
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.attempts.append(SimpleNamespace(
+                    options=options, content=content, started=started, finished=time.monotonic(),
+                ))
+
+
+class StubTranslationServer:
+    """
+    The translation upstream on a local port. Replies "[target] text", or
+    a 500 for texts starting "fail:" and a reply without translatedText for
+    texts starting "empty:". Counts requests and TCP connections, and can
+    hold every reply for `delay` seconds.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.delay = delay
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests.append(body)
+                time.sleep(stub.delay)
+
+                text = body["text"]
+                if text.startswith("fail:"):
+                    status, reply = 500, {"error": "upstream exploded"}
+                elif text.startswith("empty:"):
+                    status, reply = 200, {"detail": "nothing to say"}
+                else:
+                    status, reply = 200, {"translatedText": f"[{body['target']}] {text}"}
+
+                payload = json.dumps(reply).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/translate"
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_PROJECT_ID = "childconnect-test"
+
+_configured = False
+
+
+def _private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _private_pem(key) -> str:
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode("utf-8")
+
+
+def configure_environment():
+    """
+    Points the app at a throwaway service account and the stub TTS client,
+    so services import without real credentials. Must run before the first
+    `services` import; the tests' conftest and every benchmark call it.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    directory = tempfile.mkdtemp(prefix="childconnect-test-")
+    account_path = os.path.join(directory, "serviceAccountKey.json")
+    with open(account_path, "w") as file:
+        json.dump({
+            "type": "service_account",
+            "project_id": TEST_PROJECT_ID,
+            "private_key_id": uuid.uuid4().hex,
+            "private_key": _private_pem(_private_key()),
+            "client_email": f"test@{TEST_PROJECT_ID}.iam.gserviceaccount.com",
+            "client_id": "1",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }, file)
+
+    os.environ["FIREBASE_SERVICE_ACCOUNT"] = account_path
+    os.environ["TTS_CLIENT"] = "stub"
+    os.environ.setdefault("TTS_STUB_LATENCY", "0")
+
+    # The app resolves static/ and its key files relative to the backend directory
+    os.chdir(BACKEND_DIR)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+class TokenIssuer:
+    """
+    Signs Firebase-shaped ID tokens with a local key, standing in for Google.
+    """
+
+    def __init__(self, project_id: str = TEST_PROJECT_ID, kid: str = None):
+        from google.auth import crypt
+
+        self.project_id = project_id
+        self.kid = kid or uuid.uuid4().hex
+        key = _private_key()
+        self._signer = crypt.RSASigner.from_string(_private_pem(key), key_id=self.kid)
+        self.public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode("utf-8")
+
+    def certs(self) -> dict:
+        return {self.kid: self.public_pem}
+
+    def token(self, uid: str = "user-1", lifetime: int = 3600, **claims) -> str:
+        from google.auth import jwt
+
+        now = int(time.time())
+        payload = {
+            "iss": f"https://securetoken.google.com/{self.project_id}",
+            "aud": self.project_id,
+            "sub": uid,
+            "iat": now,
+            "auth_time": now,
+            "exp": now + lifetime,
+        }
+        payload.update(claims)
+        return jwt.encode(self._signer, payload).decode("utf-8")
+
+
+class FakeCertEndpoint:
+    """
+    Replaces GoogleCertStore's HTTP request; serves whatever certs are set
+    and counts the downloads.
+    """
+
+    def __init__(self, certs: dict = None, status: int = 200, max_age: int = 3600):
+        self.certs = dict(certs or {})
+        self.status = status
+        self.max_age = max_age
+        self.calls = 0
+
+    def __call__(self, url, method="GET", **kwargs):
+        from types import SimpleNamespace
+
+        self.calls += 1
+        return SimpleNamespace(
+            status=self.status,
+            data=json.dumps(self.certs).encode("utf-8"),
+            headers={"cache-control": f"public, max-age={self.max_age}"},
+        )
+
+
+def build_app(db, *routers, uid: str = "user-1"):
+    """
+    A FastAPI app with just the given routers, the Firestore fake injected
+    for get_db and every request authenticated as uid, or as the user
+    named in an X-Test-Uid header.
+    """
+    from fastapi import FastAPI, Request
+    from services.database import get_db
+    from services.firebase_auth import get_current_user
+
+    def current_user(request: Request):
+        return {"uid": request.headers.get("x-test-uid", uid)}
+
+    app = FastAPI()
+    for router in routers:
+        app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = current_user
+    return app
+
+
+def asgi_client(app):
+    import httpx
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from controllers.attendance_controller import router as attendance_router
+from services import attendance_store
+from services.cache import TTLCache
+from tests.fakes import FakeFirestore
+from tests.support import asgi_client, build_app
+
+pytestmark = pytest.mark.anyio
+
+DATE = "03032025"
+MARKERS = 200
+
+
+@pytest.fixture(autouse=True)
+def indexed_days(monkeypatch):
+    monkeypatch.setattr(attendance_store, "_indexed_days", TTLCache(maxsize=400, ttl=3600))
+
+
+@pytest.fixture
+def db():
+    # A little latency so concurrent requests really overlap
+    return FakeFirestore(latency=0.001)
+
+
+@pytest.fixture
+async def client(db):
+    async with asgi_client(build_app(db, attendance_router, uid="teacher-1")) as client:
+        yield client
+
+
+def test_day_records_reads_legacy_lists_with_missing_images():
+    records = attendance_store.day_records({
+        "children": ["a", "b", "c"],
+        "childrenimage": ["https://img/a.jpg"],
+    })
+    assert records == {"a": {"image": "https://img/a.jpg"}, "b": {"image": "null"}, "c": {"image": "null"}}
+
+
+def test_records_and_absences_override_legacy_lists():
+    records = attendance_store.day_records({
+        "children": ["a", "b"],
+        "childrenimage": ["null", "null"],
+        "records": {"a": attendance_store.ABSENT_RECORD, "c": {"image": "https://img/c.jpg"}},
+    })
+    assert records == {"b": {"image": "null"}, "c": {"image": "https://img/c.jpg"}}
+
+
+async def test_concurrent_markers_lose_no_marks(client, db):
+    async def mark(i):
+        response = await client.post("/attendance/update", data={
+            "childid": f"child-{i}", "date": DATE, "present": str(i % 4 != 0).lower(),
+        })
+        assert response.status_code == 200
+
+    await asyncio.gather(*(mark(i) for i in range(MARKERS)))
+
+    day = db.data(f"attendance/{DATE}")
+    assert len(day["records"]) == MARKERS
+    present = attendance_store.day_records(day)
+    assert set(present) == {f"child-{i}" for i in range(MARKERS) if i % 4 != 0}
+
+    assert db.data("attendance_meta/days")["dates"] == [DATE]
+    for i in range(MARKERS):
+        dates = db.data(f"attendance_by_child/child-{i}")["dates"]
+        assert dates == ([DATE] if i % 4 != 0 else [])
+
+
+async def test_read_modify_write_on_the_fake_does_lose_marks(db):
+    # The schema this replaced, to show the load test above can catch lost updates
+    async def mark(childid):
+        doc_ref = db.collection("attendance").document(DATE)
+        snapshot = await doc_ref.get()
+        data = snapshot.to_dict() if snapshot.exists else {"children": [], "childrenimage": []}
+        data["children"].append(childid)
+        data["childrenimage"].append("null")
+        await doc_ref.set(data)
+
+    await asyncio.gather(*(mark(f"child-{i}") for i in range(MARKERS)))
+    assert len(db.data(f"attendance/{DATE}")["children"]) < MARKERS
+
+
+async def test_concurrent_toggles_are_serialized(client, db):
+    async def toggle(childid):
+        response = await client.post("/attendance/toggle", json={"childid": childid, "date": DATE})
+        assert response.status_code == 200
+        return response.json()["status"]
+
+    # Fifty children toggled once each, plus one child toggled four times at once
+    statuses = await asyncio.gather(
+        *(toggle(f"child-{i}") for i in range(50)),
+        *(toggle("busy") for _ in range(4)),
+    )
+
+    assert statuses[:50] == ["present"] * 50
+    assert sorted(statuses[50:]) == ["absent", "absent", "present", "present"]
+
+    present = attendance_store.day_records(db.data(f"attendance/{DATE}"))
+    assert set(present) == {f"child-{i}" for i in range(50)}
+    assert db.data("attendance_by_child/busy")["dates"] == []
+
+
+async def test_days_index_is_written_once_per_day_not_per_mark(client, db):
+    days = "attendance_meta/days"
+    for i in range(10):
+        await client.post("/attendance/update", data={"childid": f"child-{i}", "date": DATE, "present": "true"})
+    assert db.path_writes[days] == 1
+
+    # A toggle on an existing day only touches the day and the child
+    await client.post("/attendance/toggle", json={"childid": "child-0", "date": DATE})
+    assert db.path_writes[days] == 1
+
+    # Another process creating a new day by toggle still indexes it
+    attendance_store._indexed_days.clear()
+    await client.post("/attendance/toggle", json={"childid": "child-0", "date": "04032025"})
+    await client.post("/attendance/toggle", json={"childid": "child-1", "date": DATE})
+    assert db.path_writes[days] == 2
+    assert db.data(days)["dates"] == [DATE, "04032025"]
+
+
+async def test_toggle_marks_a_legacy_present_child_absent(client, db):
+    db.seed(f"attendance/{DATE}", {"children": ["a", "b"], "childrenimage": ["null"]})
+
+    response = await client.post("/attendance/toggle", json={"childid": "b", "date": DATE})
+    assert response.json() == {"status": "absent"}
+
+    # The legacy list still names b; the stored absence overrides it
+    day = db.data(f"attendance/{DATE}")
+    assert day["children"] == ["a", "b"]
+    assert set(attendance_store.day_records(day)) == {"a"}
+
+
+async def test_marks_are_read_back_through_the_history_index(client, db):
+    for date, present in (("01032025", True), ("02032025", False), (DATE, True)):
+        await client.post("/attendance/update", data={"childid": "a", "date": date, "present": str(present).lower()})
+
+    response = await client.get("/attendance-records/a", params={"start": "02032025"})
+    assert response.json() == {"02032025": False, DATE: True}
+
+
+async def test_bulk_rejects_children_outside_the_class(client, db):
+    db.seed("class/c1", {"children": ["a", "b"]})
+
+    response = await client.post("/attendance/bulk", json={
+        "classid": "c1", "date": DATE,
+        "entries": [{"childid": "a", "present": True}, {"childid": "z", "present": True}],
+    })
+    assert response.status_code == 400
+    assert db.data(f"attendance/{DATE}") is None
@@ -0,0 +1,146 @@
+from array import array
+
+import pytest
+
+from services import audio_format
+from services.audio_format import UnsupportedAudioError, detect, to_linear16
+from tests import audio_samples
+
+
+@pytest.fixture(params=["audioop", "array"])
+def converter(request, monkeypatch):
+    # Both conversion paths, as audioop is gone from Python 3.13
+    if request.param == "array":
+        monkeypatch.setattr(audio_format, "audioop", None)
+    elif audio_format.audioop is None:
+        pytest.skip("audioop is not available on this Python")
+    return request.param
+
+
+def convert(content: bytes):
+    return to_linear16(content, detect(content))
+
+
+@pytest.mark.parametrize("content, expected", [
+    (audio_samples.wav(audio_samples.sine(16000)), ("wav", "LINEAR16", 16000, 1)),
+    (audio_samples.wav(audio_samples.sine(44100), rate=44100, channels=2), ("wav", "LINEAR16", 44100, 2)),
+    (audio_samples.float_wav(audio_samples.sine(48000), rate=48000), ("wav", "LINEAR16", 48000, 1)),
+    (audio_samples.flac(rate=44100, channels=2), ("flac", "FLAC", 44100, 2)),
+    (audio_samples.flac(rate=16000, channels=1), ("flac", "FLAC", 16000, 1)),
+    (audio_samples.ogg_opus(input_rate=16000), ("ogg", "OGG_OPUS", 16000, 1)),
+    (audio_samples.ogg_opus(input_rate=44100, channels=2), ("ogg", "OGG_OPUS", 48000, 2)),
+    (audio_samples.webm(), ("webm", "WEBM_OPUS", 48000, 1)),
+    (audio_samples.amr(), ("amr", "AMR", 8000, 1)),
+    (audio_samples.amr(wideband=True), ("amr-wb", "AMR_WB", 16000, 1)),
+    (audio_samples.mp3(version_bits=3, rate_index=0), ("mp3", "MP3", 44100, 2)),
+    (audio_samples.mp3(version_bits=2, rate_index=2, mono=True, id3=False), ("mp3", "MP3", 16000, 1)),
+])
+def test_detects_container_encoding_and_rate(content, expected):
+    info = detect(content)
+    assert (info.container, info.encoding, info.sample_rate, info.channels) == expected
+
+
+@pytest.mark.parametrize("content", [
+    b"",
+    b"not audio at all",
+    audio_samples.ogg_vorbis(),
+    audio_samples.raw_wav(bytes(100), 8000, tag=7, width=1),  # mu-law
+    audio_samples.raw_wav(b"", 8000)[:36],  # header only, no data chunk
+    audio_samples.raw_wav(bytes(100), 16000)[:30],  # fmt chunk cut short
+    audio_samples.raw_wav(bytes(100), 16000, width=0),  # 0 bits per sample
+    audio_samples.raw_wav(bytes(100), 16000, width=2, bits=12),
+    audio_samples.raw_wav(bytes(100), 16000, width=5),
+    audio_samples.raw_wav(bytes(100), 16000, tag=3, width=2),  # 16-bit float
+    audio_samples.raw_wav(bytes(100), 16000, channels=0),
+    audio_samples.raw_wav(bytes(100), 0),
+    audio_samples.flac()[:20],
+    audio_samples.ogg_opus()[:40],
+    audio_samples.ogg_opus(channels=0),
+    b"ID3\x04",
+])
+def test_rejects_what_cannot_be_sent(content):
+    with pytest.raises(UnsupportedAudioError):
+        detect(content)
+
+
+def test_zero_bit_wav_never_reaches_conversion():
+    # bits_per_sample of 0 used to get through detect and divide by zero later
+    content = audio_samples.raw_wav(bytes(100), 16000, width=0)
+    with pytest.raises(UnsupportedAudioError):
+        convert(content)
+
+
+def test_wav_chunks_before_the_data_are_skipped():
+    samples = audio_samples.sine(16000)
+    plain = audio_samples.wav(samples)
+    listed = audio_samples.raw_wav(plain[44:], 16000, extra_chunks=b"LIST" + (5).to_bytes(4, "little") + b"odd!!\x00")
+
+    info = detect(listed)
+    assert (info.data_size, convert(listed)) == (len(plain) - 44, convert(plain))
+
+
+def test_linear16_at_a_supported_rate_passes_through(converter):
+    content = audio_samples.wav(audio_samples.sine(16000))
+    assert convert(content) == (content[44:], 16000)
+
+
+@pytest.mark.parametrize("width", [1, 2, 3, 4])
+def test_sample_widths_become_16_bit(converter, width):
+    samples = audio_samples.sine(8000)
+    pcm, rate = convert(audio_samples.wav(samples, rate=8000, width=width))
+
+    expected = array("h", (int(round(value * 32767)) for value in samples))
+    assert rate == 8000
+    assert len(pcm) == 2 * len(samples)
+    # 8-bit input only keeps its own precision
+    tolerance = 300 if width == 1 else 2
+    assert max(abs(a - b) for a, b in zip(array("h", pcm), expected)) <= tolerance
+
+
+def test_float_samples_are_scaled_and_clipped():
+    pcm, _ = convert(audio_samples.float_wav([0.5, -0.5, 1.5, -1.5, 0.0]))
+    assert list(array("h", pcm)) == [16383, -16383, 32767, -32768, 0]
+
+
+@pytest.mark.parametrize("channels", [2, 6])
+def test_channels_are_mixed_down_to_mono(converter, channels):
+    samples = audio_samples.sine(16000)
+    pcm, rate = convert(audio_samples.wav(samples, channels=channels))
+
+    assert rate == 16000
+    assert len(pcm) == 2 * len(samples)
+    mono = convert(audio_samples.wav(samples))[0]
+    assert max(abs(a - b) for a, b in zip(array("h", pcm), array("h", mono))) <= 1
+
+
+def test_extensible_wav_uses_its_sub_format(converter):
+    data = audio_samples.wav(audio_samples.sine(16000))[44:]
+    content = audio_samples.raw_wav(data, 16000, extensible=True)
+
+    assert detect(content).pcm_format == 1
+    assert convert(content) == (data, 16000)
+
+
+@pytest.mark.parametrize("source_rate", [6000, 96000])
+def test_unsupported_rates_are_resampled_to_16k(converter, source_rate):
+    samples = audio_samples.sine(source_rate, seconds=0.5, frequency=200)
+    pcm, rate = convert(audio_samples.wav(samples, rate=source_rate))
+
+    assert rate == 16000
+    assert abs(len(pcm) // 2 - 8000) <= 16
+    # Still a 200 Hz tone: peak level survives the conversion
+    assert 14000 < max(array("h", pcm)) <= 16384
+
+
+def test_rates_in_range_are_kept(converter):
+    pcm, rate = convert(audio_samples.wav(audio_samples.sine(44100), rate=44100, channels=2))
+    assert rate == 44100
+    assert len(pcm) == 2 * 4410
+
+
+def test_trailing_partial_frame_is_dropped(converter):
+    content = audio_samples.wav(audio_samples.sine(16000), channels=2)
+    info = detect(content)
+    truncated = content + b"\x01\x02\x03"
+    pcm, _ = to_linear16(truncated, info._replace(data_size=info.data_size + 3))
+    assert len(pcm) == info.data_size // 2
@@ -0,0 +1,147 @@
+import asyncio
+from contextlib import ExitStack
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from controllers.chat_controller import router as chat_router
+from services.chat_hub import ChatHub, InMemoryBackend, SUBSCRIBER_QUEUE_SIZE, chat_hub
+from services.firebase_auth import FirebaseAuthService
+from tests.fakes import FakeFirestore
+from tests.support import build_app
+
+PAIRS = 50
+
+
+@pytest.fixture(autouse=True)
+def tokens(monkeypatch):
+    # Socket tokens are "token-<uid>"; anything else is rejected
+    def verify_token(token):
+        if not token.startswith("token-"):
+            raise HTTPException(status_code=401, detail="Invalid Firebase token")
+        return {"uid": token[len("token-"):]}
+
+    monkeypatch.setattr(FirebaseAuthService, "verify_token", staticmethod(verify_token))
+
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    for i in range(PAIRS):
+        db.seed(f"chat/chat-{i}", {"userID1": f"parent-{i}", "userID2": f"teacher-{i}", "unread": {}})
+    return db
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(build_app(db, chat_router)) as client:
+        yield client
+
+
+def connect(client, stack, uid):
+    return stack.enter_context(client.websocket_connect(f"/ws/chat?token=token-{uid}"))
+
+
+def send(client, uid, chat_id, message):
+    response = client.post("/sendmessage", json={"chatId": chat_id, "message": message}, headers={"X-Test-Uid": uid})
+    assert response.status_code == 200
+
+
+def test_every_socket_gets_its_own_chats_messages(client):
+    with ExitStack() as stack:
+        parents = [connect(client, stack, f"parent-{i}") for i in range(PAIRS)]
+        teachers = [connect(client, stack, f"teacher-{i}") for i in range(PAIRS)]
+
+        for i in range(PAIRS):
+            send(client, f"parent-{i}", f"chat-{i}", f"hello {i}")
+
+        for i in range(PAIRS):
+            for socket in (parents[i], teachers[i]):
+                event = socket.receive_json()
+                assert event["type"] == "message"
+                assert event["chatId"] == f"chat-{i}"
+                assert event["message"]["message"] == f"hello {i}"
+                assert event["message"]["receiver"] == f"teacher-{i}"
+
+    assert chat_hub.backend._subscribers == {}
+
+
+def test_every_device_of_a_user_is_pushed_to(client):
+    with ExitStack() as stack:
+        devices = [connect(client, stack, "teacher-0") for _ in range(3)]
+        send(client, "parent-0", "chat-0", "to all devices")
+
+        assert [device.receive_json()["message"]["message"] for device in devices] == ["to all devices"] * 3
+
+
+def test_read_receipts_reach_both_sides(client, db):
+    send(client, "parent-1", "chat-1", "unread")
+    assert db.data("chat/chat-1")["unread"] == {"teacher-1": 1}
+
+    with ExitStack() as stack:
+        parent, teacher = connect(client, stack, "parent-1"), connect(client, stack, "teacher-1")
+        response = client.post("/markread/chat-1", headers={"X-Test-Uid": "teacher-1"})
+        assert response.status_code == 200
+
+        for socket in (parent, teacher):
+            assert socket.receive_json() == {"type": "read", "chatId": "chat-1", "reader": "teacher-1"}
+
+    assert db.data("chat/chat-1")["unread"] == {"teacher-1": 0}
+    assert all(db.data(path)["isRead"] for path in db.paths("chat/chat-1/messages"))
+
+
+def test_sending_to_a_missing_chat_is_404(client):
+    headers = {"X-Test-Uid": "parent-0"}
+    responses = [
+        client.post("/sendmessage", json={"chatId": "no-such-chat", "message": "hi"}, headers=headers),
+        client.post("/sendmessage/upload", data={"chatId": "no-such-chat", "message": "hi"}, headers=headers),
+    ]
+
+    for response in responses:
+        assert (response.status_code, response.json()) == (404, {"detail": "Chat not found"})
+
+
+def test_socket_with_a_bad_token_is_closed(client):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/ws/chat?token=forged") as socket:
+            socket.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_failed_send_closes_the_socket(client):
+    with ExitStack() as stack:
+        socket = connect(client, stack, "teacher-0")
+        healthy = connect(client, stack, "parent-0")
+        # Not JSON serializable, so send_json raises in the sender task
+        client.portal.call(chat_hub.publish, ["teacher-0"], {"type": "message", "sent": object()})
+
+        with pytest.raises(WebSocketDisconnect) as closed:
+            socket.receive_json()
+        assert closed.value.code == 1011
+
+        send(client, "teacher-0", "chat-0", "still delivered")
+        assert healthy.receive_json()["message"]["message"] == "still delivered"
+
+    assert chat_hub.backend._subscribers == {}
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_drops_events_without_holding_up_others():
+    hub = ChatHub(InMemoryBackend())
+    async with hub.connect("slow") as slow, hub.connect("fast") as fast:
+        for i in range(SUBSCRIBER_QUEUE_SIZE + 10):
+            await hub.publish(["slow", "fast"], {"n": i})
+            await fast.get()
+
+        assert slow.qsize() == SUBSCRIBER_QUEUE_SIZE
+        assert fast.qsize() == 0
+
+
+@pytest.mark.anyio
+async def test_concurrent_sends_fan_out_in_order_per_chat():
+    hub = ChatHub(InMemoryBackend())
+    async with hub.connect("teacher") as queue:
+        await asyncio.gather(*(hub.publish(["parent", "teacher"], {"n": i}) for i in range(50)))
+        assert [queue.get_nowait()["n"] for _ in range(50)] == list(range(50))
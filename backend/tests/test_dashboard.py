@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from controllers import dashboard_controller, school_controller
+from controllers.announcement_controller import router as announcement_router
+from controllers.attendance_controller import router as attendance_router
+from controllers.child_controller import router as child_router
+from controllers.dashboard_controller import router as dashboard_router
+from controllers.homework_controller import router as homework_router
+from controllers.profile_controller import router as profile_router
+from controllers.school_controller import router as school_router
+from services.document_cache import DocumentCache
+from tests.fakes import FakeFirestore
+from tests.support import asgi_client, build_app
+
+pytestmark = pytest.mark.anyio
+
+DATE = "03032025"
+PARENT = "parent-1"
+PHOTO = "https://res.cloudinary.com/demo/image/upload/v1/p.jpg"
+
+
+@pytest.fixture(autouse=True)
+def document_cache(monkeypatch):
+    cache = DocumentCache({"class": 600, "schoolapi": 3600})
+    for controller in (dashboard_controller, school_controller):
+        monkeypatch.setattr(controller, "document_cache", cache)
+
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    db.seed(f"users/{PARENT}", {"name": "Mei", "email": "mei@example.com", "role": "parent", "profilepic": PHOTO})
+    db.seed("children/kid-1", {"name": "Wen", "fatherid": PARENT, "school": "AI TONG SCHOOL", "class": "P1 Courage", "profilepic": PHOTO})
+    db.seed("children/kid-2", {"name": "Jun", "motherid": PARENT, "school": "ADMIRALTY PRIMARY SCHOOL", "class": "P2 Grace"})
+    db.seed("class/c1", {"name": "P1 Courage", "teacherId": "teacher-1"})
+    db.seed("class/c2", {"name": "P2 Grace", "teacherId": "teacher-2"})
+    db.seed("schoolapi/AI TONG SCHOOL", {"postal_code": "579646"})
+    db.seed("schoolapi/ADMIRALTY PRIMARY SCHOOL", {"postal_code": "738907", "latitude": 1.44, "longitude": 103.8})
+    db.seed("homework/h1", {
+        "classid": "c1", "name": "Spelling", "content": "List 4", "status": "open",
+        "duedate": datetime(2025, 3, 7, tzinfo=timezone.utc),
+        "translations": {"zh": {"name": "听写", "content": "第四课"}},
+    })
+    db.seed("homework/h2", {"classid": "c2", "name": "Maths", "content": "Page 12", "status": "open"})
+    db.seed("announcements/a1", {"classid": "c1", "name": "Sports day", "content": "Wear PE kit", "status": "open"})
+    db.seed(f"attendance/{DATE}", {"records": {"kid-1": {"image": PHOTO}}})
+    return db
+
+
+@pytest.fixture
+async def client(db):
+    app = build_app(
+        db, dashboard_router, profile_router, child_router, school_router, attendance_router,
+        homework_router, announcement_router, uid=PARENT,
+    )
+    async with asgi_client(app) as client:
+        yield client
+
+
+async def get(client, path: str, **params):
+    response = await client.get(path, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("lang", [None, "zh"])
+async def test_dashboard_sections_match_the_standalone_endpoints(client, lang):
+    params = {"lang": lang} if lang else {}
+    dashboard = await get(client, "/dashboard/parent", date=DATE, **params)
+
+    assert dashboard["profile"] == await get(client, "/profile")
+    assert dashboard["profile"]["message"] == "Hello, Mei"
+    # The dashboard also sets each child's classid
+    assert [child | {"classid": None} for child in dashboard["children"]] == [
+        child | {"classid": None} for child in await get(client, "/mychildren")
+    ]
+    assert sorted(dashboard["schools"], key=lambda s: s["school_name"]) == sorted(
+        await get(client, "/schoolsinfo"), key=lambda s: s["school_name"]
+    )
+    assert dashboard["attendance"]["records"] == await get(client, f"/attendance/{DATE}")
+
+    assert [feed["classid"] for feed in dashboard["classes"]] == ["c1", "c2"]
+    assert dashboard["classes"][0]["homework"][0]["name"] == ("听写" if lang else "Spelling")
+    for feed in dashboard["classes"]:
+        assert feed["homework"] == await get(client, f"/homework/{feed['classid']}", **params)
+        assert feed["announcements"] == await get(client, f"/announcements/{feed['classid']}", **params)
+
+
+async def test_dashboard_for_a_user_without_a_profile_is_404(client):
+    response = await client.get("/dashboard/parent", params={"date": DATE}, headers={"X-Test-Uid": "nobody"})
+    assert (response.status_code, response.json()) == (404, {"detail": "User not found"})
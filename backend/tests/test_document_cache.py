@@ -0,0 +1,209 @@
+import asyncio
+import time
+
+import pytest
+
+from controllers import class_controller, school_controller
+from controllers.class_controller import router as class_router
+from controllers.school_controller import router as school_router
+from services import document_cache as document_cache_module
+from services.document_cache import DocumentCache
+from tests.fakes import FakeFirestore
+from tests.support import asgi_client, build_app
+
+pytestmark = pytest.mark.anyio
+
+TTLS = {"class": 600, "schoolapi": 3600}
+
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    db.seed("class/c1", {"name": "P1 Courage", "teacherId": "teacher-1"})
+    db.seed("class/c2", {"name": "P2 Grace", "teacherId": "teacher-2"})
+    db.seed("schoolapi/ADMIRALTY PRIMARY SCHOOL", {"postal_code": "738907", "latitude": 1.44, "longitude": 103.8})
+    db.seed("schoolapi/AI TONG SCHOOL", {"postal_code": "579646"})
+    return db
+
+
+@pytest.fixture
+def cache():
+    cache = DocumentCache(TTLS)
+    yield cache
+    cache.close()
+
+
+class InFlightReplies(FakeFirestore):
+    """
+    Reads the document at once but takes a while to deliver it, so a
+    write can land between the read and the caller seeing the reply.
+    """
+
+    async def _read(self, reference, transaction=None):
+        snapshot = await super()._read(reference, transaction)
+        await asyncio.sleep(0.05)
+        return snapshot
+
+
+async def test_documents_are_read_once_then_served_from_memory(db, cache):
+    first = await cache.get(db, "class", "c1")
+    first["name"] = "changed by the caller"
+    second = await cache.get(db, "class", "c1")
+
+    assert second == {"name": "P1 Courage", "teacherId": "teacher-1"}
+    assert db.reads == 1
+    assert (cache.stats()["class"]["hits"], cache.stats()["class"]["misses"]) == (1, 1)
+
+
+async def test_missing_documents_are_remembered_briefly(db, cache, monkeypatch):
+    monkeypatch.setattr(document_cache_module, "NEGATIVE_TTL", 0.05)
+    assert await cache.get(db, "class", "c9") is None
+    assert await cache.get(db, "class", "c9") is None
+    assert db.reads == 1
+
+    db.seed("class/c9", {"name": "P6 Hope"})
+    time.sleep(0.06)
+    assert await cache.get(db, "class", "c9") == {"name": "P6 Hope"}
+
+
+async def test_entries_expire_and_the_cache_stays_bounded(db):
+    cache = DocumentCache({"class": 0.05}, maxsize=1)
+    await cache.get(db, "class", "c1")
+    await cache.get(db, "class", "c2")
+    await cache.get(db, "class", "c2")
+    assert db.reads == 2
+
+    # c1 was evicted to make room for c2, and c2 has since expired
+    await cache.get(db, "class", "c1")
+    time.sleep(0.06)
+    await cache.get(db, "class", "c1")
+    assert db.reads == 4
+    assert cache.stats()["class"]["size"] == 1
+
+
+async def test_concurrent_misses_share_one_read(cache):
+    db = FakeFirestore(latency=0.02)
+    db.seed("class/c1", {"name": "P1 Courage"})
+
+    results = await asyncio.gather(*(cache.get(db, "class", "c1") for _ in range(20)))
+
+    assert all(result == {"name": "P1 Courage"} for result in results)
+    assert db.reads == 1
+
+
+async def test_get_many_keeps_order_and_reads_only_the_misses(db, cache):
+    await cache.get(db, "schoolapi", "AI TONG SCHOOL")
+    db.reset_counts()
+
+    names = ["AI TONG SCHOOL", "NO SUCH SCHOOL", "ADMIRALTY PRIMARY SCHOOL", "AI TONG SCHOOL"]
+    found = await cache.get_many(db, "schoolapi", names)
+
+    assert [name for name, _ in found] == ["AI TONG SCHOOL", "ADMIRALTY PRIMARY SCHOOL"]
+    assert found[1][1]["postal_code"] == "738907"
+    assert db.reads == 2
+
+    db.reset_counts()
+    assert await cache.get_many(db, "schoolapi", names) == found
+    assert db.reads == 0
+
+
+async def test_find_one_remembers_the_id_and_rechecks_the_value(db, cache):
+    assert await cache.find_one(db, "class", "name", "P1 Courage") == ("c1", {"name": "P1 Courage", "teacherId": "teacher-1"})
+    db.reset_counts()
+    assert (await cache.find_one(db, "class", "name", "P1 Courage"))[0] == "c1"
+    assert db.reads == 0
+
+    # Renamed: the remembered id no longer matches, so the name is looked up again
+    await db.document("class/c1").update({"name": "P1 Kindness"})
+    cache.invalidate("class", "c1")
+    assert await cache.find_one(db, "class", "name", "P1 Courage") is None
+    assert (await cache.find_one(db, "class", "name", "P1 Kindness"))[0] == "c1"
+    assert cache.stats()["class"]["lookups"]["size"] == 1
+
+
+async def test_invalidation_during_a_read_keeps_the_stale_reply_out(cache):
+    db = InFlightReplies()
+    db.seed("class/c1", {"name": "P1 Courage"})
+
+    pending = asyncio.ensure_future(cache.get(db, "class", "c1"))
+    await asyncio.sleep(0.01)
+    db.seed("class/c1", {"name": "P1 Kindness"})
+    cache.invalidate("class", "c1")
+
+    # The caller that raced the write gets what it read, but it is not cached
+    assert await pending == {"name": "P1 Courage"}
+    assert await cache.get(db, "class", "c1") == {"name": "P1 Kindness"}
+    assert db.reads == 2
+
+
+async def test_invalidating_a_collection_drops_documents_and_lookups(db, cache):
+    await cache.find_one(db, "class", "name", "P1 Courage")
+    await cache.get(db, "class", "c2")
+    await cache.get(db, "schoolapi", "AI TONG SCHOOL")
+
+    cache.invalidate("class")
+
+    stats = cache.stats()
+    assert (stats["class"]["size"], stats["class"]["lookups"]["size"]) == (0, 0)
+    assert stats["schoolapi"]["size"] == 1
+
+
+async def test_watch_drops_documents_edited_elsewhere(db, cache):
+    console = db.sync_client()
+    cache.watch(console, ["class"])
+    assert await cache.get(db, "class", "c1") == {"name": "P1 Courage", "teacherId": "teacher-1"}
+
+    console.document("class/c1").update({"teacherId": "teacher-3"})
+    assert (await cache.get(db, "class", "c1"))["teacherId"] == "teacher-3"
+
+    console.document("class/c1").delete()
+    assert await cache.get(db, "class", "c1") is None
+
+    cache.close()
+    console.document("class/c1").set({"name": "P1 Courage"})
+    # No longer listening: the remembered absence stands until it expires
+    assert await cache.get(db, "class", "c1") is None
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    cache = DocumentCache(TTLS)
+    # The controllers imported the name directly
+    monkeypatch.setattr(class_controller, "document_cache", cache)
+    monkeypatch.setattr(school_controller, "document_cache", cache)
+    return cache
+
+
+async def test_class_routes_share_the_cache(db, shared_cache):
+    async with asgi_client(build_app(db, class_router)) as client:
+        by_name = await client.get("/classbynamewithid/P1 Courage")
+        by_id = await client.get("/class/c1")
+        plain = await client.get("/classbyname/P1 Courage")
+        missing = await client.get("/class/c9")
+
+    assert by_name.json() == by_id.json() == {"name": "P1 Courage", "teacherId": "teacher-1", "id": "c1"}
+    assert plain.json() == {"name": "P1 Courage", "teacherId": "teacher-1"}
+    assert missing.status_code == 404
+    # One query for the name, one read for the missing class
+    assert db.reads == 2
+
+
+async def test_geocoding_a_school_invalidates_its_entry(db, shared_cache, monkeypatch):
+    geocoded = []
+
+    async def geocode(postal_code):
+        geocoded.append(postal_code)
+        return 1.37, 103.83
+
+    monkeypatch.setattr(school_controller, "geocode_postal_code", geocode)
+    db.seed("children/kid-1", {"school": "AI TONG SCHOOL", "fatherid": "user-1"})
+
+    async with asgi_client(build_app(db, school_router)) as client:
+        for _ in range(2):
+            school = (await client.get("/school/child/kid-1")).json()
+            assert (school["latitude"], school["longitude"]) == (1.37, 103.83)
+        schools = (await client.get("/schoolsinfo")).json()
+
+    assert geocoded == ["579646"]
+    assert db.data("schoolapi/AI TONG SCHOOL")["latitude"] == 1.37
+    assert schools == [{"postal_code": "579646", "latitude": 1.37, "longitude": 103.83, "school_name": "AI TONG SCHOOL"}]
@@ -0,0 +1,108 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from services import firebase_auth
+from services.firebase_auth import FirebaseAuthService, GoogleCertStore
+from tests.support import FakeCertEndpoint, TokenIssuer
+
+
+@pytest.fixture
+def issuer():
+    return TokenIssuer()
+
+
+@pytest.fixture
+def endpoint(monkeypatch, issuer):
+    endpoint = FakeCertEndpoint(issuer.certs())
+    store = GoogleCertStore(firebase_auth.ID_TOKEN_CERT_URI)
+    store._request = endpoint
+    monkeypatch.setattr(firebase_auth, "cert_store", store)
+    monkeypatch.setattr(firebase_auth, "token_cache", firebase_auth.TTLCache(maxsize=100))
+    return endpoint
+
+
+def test_verified_token_is_served_from_cache(endpoint, issuer):
+    token = issuer.token(uid="parent-1")
+
+    first = FirebaseAuthService.verify_token(token)
+    second = FirebaseAuthService.verify_token(token)
+
+    assert first["uid"] == second["uid"] == "parent-1"
+    assert firebase_auth.get_token_cache_stats()["hits"] == 1
+    assert firebase_auth.get_token_cache_stats()["misses"] == 1
+    assert endpoint.calls == 1
+
+
+def test_cache_entry_expires_with_the_token(endpoint, issuer):
+    token = issuer.token(lifetime=1)
+    FirebaseAuthService.verify_token(token)
+
+    time.sleep(1.1)
+    # Still within the clock skew allowance, so it verifies again rather than being served stale
+    FirebaseAuthService.verify_token(token)
+    assert firebase_auth.get_token_cache_stats()["hits"] == 0
+
+
+@pytest.mark.parametrize("claims", [
+    {"aud": "someone-else"},
+    {"iss": "https://securetoken.google.com/someone-else"},
+    {"sub": ""},
+    {"exp": int(time.time()) - 3600},
+])
+def test_invalid_tokens_are_rejected_and_not_cached(endpoint, issuer, claims):
+    token = issuer.token(**claims)
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as error:
+            FirebaseAuthService.verify_token(token)
+        assert error.value.status_code == 401
+    assert firebase_auth.get_token_cache_stats()["size"] == 0
+
+
+def test_token_signed_by_another_key_is_rejected(endpoint, issuer):
+    forger = TokenIssuer(kid=issuer.kid)
+
+    with pytest.raises(HTTPException):
+        FirebaseAuthService.verify_token(forger.token())
+
+
+def test_unknown_kids_refresh_at_most_once_per_interval(endpoint, issuer):
+    FirebaseAuthService.verify_token(issuer.token())
+    assert endpoint.calls == 1
+
+    # Certs were just downloaded, so made-up kids are rejected without another
+    stranger = TokenIssuer()
+    for uid in ("a", "b", "c"):
+        with pytest.raises(HTTPException):
+            FirebaseAuthService.verify_token(stranger.token(uid=uid))
+    assert endpoint.calls == 1
+
+    # Once the interval has passed, one of them triggers a single download
+    firebase_auth.cert_store._last_attempt -= GoogleCertStore.MIN_REFRESH_INTERVAL
+    for uid in ("d", "e"):
+        with pytest.raises(HTTPException):
+            FirebaseAuthService.verify_token(stranger.token(uid=uid))
+    assert endpoint.calls == 2
+
+
+def test_rotated_key_is_picked_up_on_demand(endpoint, issuer):
+    FirebaseAuthService.verify_token(issuer.token())
+
+    rotated = TokenIssuer()
+    endpoint.certs.update(rotated.certs())
+    firebase_auth.cert_store._last_attempt -= GoogleCertStore.MIN_REFRESH_INTERVAL
+
+    assert FirebaseAuthService.verify_token(rotated.token(uid="after-rotation"))["uid"] == "after-rotation"
+    assert endpoint.calls == 2
+
+
+def test_failed_refresh_keeps_serving_current_certs(endpoint, issuer):
+    store = firebase_auth.cert_store
+    store.refresh()
+    endpoint.status = 503
+
+    with pytest.raises(RuntimeError):
+        store.refresh()
+    assert issuer.kid in store.get()
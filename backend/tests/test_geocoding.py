@@ -0,0 +1,115 @@
+import httpx
+import pytest
+
+from controllers import school_controller
+from controllers.school_controller import router as school_router
+from services import geocoding
+from services.cache import TTLCache
+from services.document_cache import DocumentCache
+from tests.fakes import FakeFirestore
+from tests.support import asgi_client, build_app
+
+pytestmark = pytest.mark.anyio
+
+SCHOOL = "schoolapi/AI TONG SCHOOL"
+LOCATED = {"found": 1, "results": [{"LATITUDE": "1.3604", "LONGITUDE": "103.8338"}]}
+
+
+class OneMap:
+    """
+    Answers OneMap searches with `reply` and counts them.
+    """
+
+    def __init__(self, reply=LOCATED):
+        self.reply = reply
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        if isinstance(self.reply, int):
+            return httpx.Response(self.reply)
+        return httpx.Response(200, json=self.reply)
+
+
+@pytest.fixture
+async def onemap(monkeypatch):
+    onemap = OneMap()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(onemap))
+    monkeypatch.setattr(geocoding, "_client", client)
+    monkeypatch.setattr(geocoding, "geocode_cache", TTLCache(maxsize=100, ttl=3600))
+    monkeypatch.setattr(geocoding, "onemap_breaker", geocoding.CircuitBreaker(5, 30))
+    monkeypatch.setattr(school_controller, "document_cache", DocumentCache({"schoolapi": 3600}))
+    yield onemap
+    await client.aclose()
+
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    db.seed("children/kid-1", {"school": "AI TONG SCHOOL"})
+    return db
+
+
+async def locate(db, times: int = 3) -> list:
+    async with asgi_client(build_app(db, school_router)) as client:
+        return [await client.get("/school/child/kid-1") for _ in range(times)]
+
+
+async def test_a_school_is_geocoded_once_and_saved(db, onemap):
+    db.seed(SCHOOL, {"postal_code": "579646", "content_hash": "v1"})
+
+    responses = await locate(db)
+
+    assert [response.status_code for response in responses] == [200] * 3
+    assert responses[-1].json()["latitude"] == 1.3604
+    assert onemap.calls == 1
+    assert db.data(SCHOOL)["longitude"] == 103.8338
+
+
+async def test_schools_the_preload_could_not_place_are_not_looked_up(db, onemap):
+    db.seed(SCHOOL, {"postal_code": "579646", "content_hash": "v1", "geocode_failed_hash": "v1"})
+
+    responses = await locate(db)
+
+    assert [response.status_code for response in responses] == [404] * 3
+    assert onemap.calls == 0
+
+
+async def test_not_found_is_recorded_on_the_school(db, onemap):
+    onemap.reply = {"found": 0, "results": []}
+    db.seed(SCHOOL, {"postal_code": "579646", "content_hash": "v1", "geocode_failed_hash": "v0"})
+
+    responses = await locate(db)
+
+    assert [response.status_code for response in responses] == [404] * 3
+    assert onemap.calls == 1
+    assert db.data(SCHOOL)["geocode_failed_hash"] == "v1"
+
+
+async def test_not_found_is_cached_for_schools_without_a_hash(db, onemap):
+    onemap.reply = {"found": 0, "results": []}
+    db.seed(SCHOOL, {"postal_code": "579646"})
+
+    responses = await locate(db)
+
+    assert [response.status_code for response in responses] == [404] * 3
+    assert onemap.calls == 1
+    assert "geocode_failed_hash" not in db.data(SCHOOL)
+
+
+@pytest.mark.parametrize("reply", [
+    {"results": [{"LATITUDE": "1.36"}]},
+    {"results": [{"LATITUDE": "north", "LONGITUDE": "east"}]},
+    {"results": "none"},
+    ["not", "a", "dict"],
+    502,
+])
+async def test_unreadable_or_failed_replies_are_503_and_retried(db, onemap, reply):
+    onemap.reply = reply
+    db.seed(SCHOOL, {"postal_code": "579646", "content_hash": "v1"})
+
+    responses = await locate(db, times=2)
+
+    assert [response.status_code for response in responses] == [503] * 2
+    assert onemap.calls == 2
+    assert db.data(SCHOOL) == {"postal_code": "579646", "content_hash": "v1"}
@@ -0,0 +1,216 @@
+import asyncio
+import io
+import time
+
+import cloudinary.exceptions
+import cloudinary.uploader
+import pytest
+from PIL import Image
+from starlette.datastructures import Headers, UploadFile
+
+from controllers import document_controller
+from controllers.document_controller import router as document_router
+from services import media_upload
+from services.image_processing import MAX_IMAGE_DIMENSION, THUMBNAIL_EAGER
+from services.media_upload import MediaUploader, TransientUploadError, UploadError, UploadTooLargeError
+from tests.fakes import FakeFirestore, FakeUploader
+from tests.support import asgi_client, build_app
+
+pytestmark = pytest.mark.anyio
+
+
+def uploader(fake: FakeUploader, **kwargs) -> MediaUploader:
+    kwargs.setdefault("backoff", 0)
+    return MediaUploader(upload_fn=fake, **kwargs)
+
+
+def photo(size=(3000, 2000), fmt="JPEG") -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 120, 40)).save(out, fmt)
+    return out.getvalue()
+
+
+async def test_upload_returns_the_provider_result():
+    fake = FakeUploader()
+    result = await uploader(fake, timeout=12).upload(b"hello", folder="documentation/files", resource_type="raw")
+
+    options = fake.attempts[0].options
+    assert result["secure_url"].endswith(f"/raw/upload/v1/{options['public_id']}")
+    assert (options["folder"], options["timeout"]) == ("documentation/files", 12)
+    assert fake.attempts[0].content == b"hello"
+
+
+async def test_transient_failures_are_retried_with_the_same_public_id():
+    fake = FakeUploader(failures=[TransientUploadError("Socket error: reset")] * 2)
+    media = uploader(fake)
+    file = io.BytesIO(b"x" * 1000)
+
+    result = await media.upload(file)
+
+    assert len(fake.attempts) == 3
+    assert len({attempt.options["public_id"] for attempt in fake.attempts}) == 1
+    # Each retry starts from the top of the file, not where the last one stopped
+    assert [attempt.content for attempt in fake.attempts] == [b"x" * 1000] * 3
+    assert result["bytes"] == 1000
+    stats = media.stats()
+    assert (stats["requests"], stats["errors"], stats["retries"]) == (1, 0, 2)
+
+
+async def test_attempts_never_overlap():
+    fake = FakeUploader(latency=0.02, failures=[TransientUploadError("Unexpected error - timed out")] * 2)
+    await uploader(fake, backoff=0.01).upload(b"data")
+
+    attempts = sorted(fake.attempts, key=lambda attempt: attempt.started)
+    assert fake.max_active == 1
+    for previous, following in zip(attempts, attempts[1:]):
+        assert following.started >= previous.finished
+
+
+async def test_upload_fails_once_attempts_run_out():
+    fake = FakeUploader(failures=[TransientUploadError("Socket error: reset")] * 5)
+    media = uploader(fake, attempts=3)
+
+    with pytest.raises(UploadError, match="Upload failed after 3 attempts: Socket error"):
+        await media.upload(b"data")
+
+    assert len(fake.attempts) == 3
+    assert (media.stats()["errors"], media.stats()["retries"]) == (1, 2)
+
+
+async def test_rejected_uploads_are_not_retried():
+    fake = FakeUploader(failures=[cloudinary.exceptions.Error("Invalid image file")])
+    media = uploader(fake)
+
+    with pytest.raises(UploadError, match="Upload rejected: Invalid image file"):
+        await media.upload(b"data")
+
+    assert len(fake.attempts) == 1
+    assert media.stats()["retries"] == 0
+
+
+async def test_concurrent_uploads_are_bounded_by_the_pool():
+    fake = FakeUploader(latency=0.05)
+    media = uploader(fake, max_workers=3)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(media.upload(b"data") for _ in range(9)))
+
+    assert fake.max_active == 3
+    # Three rounds of three, not nine in a row
+    assert time.perf_counter() - started < 9 * 0.05
+    assert media.stats()["requests"] == 9
+
+
+async def test_upload_image_downscales_and_asks_for_the_thumbnail():
+    fake = FakeUploader()
+    await uploader(fake).upload_image(photo())
+
+    attempt = fake.attempts[0]
+    assert attempt.options["eager"] == [THUMBNAIL_EAGER]
+    with Image.open(io.BytesIO(attempt.content)) as stored:
+        assert max(stored.size) == MAX_IMAGE_DIMENSION
+
+
+async def test_unreadable_images_are_uploaded_as_they_are():
+    fake = FakeUploader()
+    await uploader(fake).upload_image(io.BytesIO(b"not an image"))
+    assert fake.attempts[0].content == b"not an image"
+
+
+@pytest.mark.parametrize("message, transient", [
+    ("Unexpected error - MaxRetryError", True),
+    ("Socket error: ConnectionResetError", True),
+    ("Error parsing server response (502) - <html>", True),
+    ("Invalid image file", False),
+    ("Resource not found", False),
+])
+def test_cloudinary_errors_are_classified(monkeypatch, message, transient):
+    def upload(file, **options):
+        raise cloudinary.exceptions.Error(message)
+
+    monkeypatch.setattr(cloudinary.uploader, "upload", upload)
+    expected = TransientUploadError if transient else cloudinary.exceptions.Error
+    with pytest.raises(expected) as raised:
+        media_upload._cloudinary_upload(b"data", public_id="p")
+    assert type(raised.value) is expected
+
+
+def test_large_files_are_sent_in_chunks(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cloudinary.uploader, "upload", lambda file, **options: calls.append(("upload", options)))
+    monkeypatch.setattr(cloudinary.uploader, "upload_large", lambda file, **options: calls.append(("upload_large", options)))
+    monkeypatch.setattr(media_upload, "UPLOAD_CHUNK_SIZE", 1024)
+
+    small = io.BytesIO(b"x" * 1024)
+    media_upload._cloudinary_upload(small, public_id="small")
+    large = io.BytesIO(b"x" * 1025)
+    large.seek(10)
+    media_upload._cloudinary_upload(large, public_id="large")
+
+    assert [name for name, _ in calls] == ["upload", "upload_large"]
+    assert calls[1][1]["chunk_size"] == 1024
+    assert calls[1][1]["resource_type"] == "auto"
+    # Measuring the size leaves the file where it was
+    assert large.tell() == 10
+
+
+@pytest.fixture
+def fake_uploader(monkeypatch):
+    fake = FakeUploader(latency=0.1)
+    media = uploader(fake)
+    monkeypatch.setattr(media_upload, "media_uploader", media)
+    # The controller imported the name directly
+    monkeypatch.setattr(document_controller, "media_uploader", media)
+    return fake
+
+
+async def test_form_file_past_the_limit_is_refused_unread(monkeypatch, fake_uploader):
+    monkeypatch.setattr(media_upload, "MAX_UPLOAD_BYTES", 100)
+    upload = UploadFile(io.BytesIO(b"x" * 101), size=101, filename="big.pdf", headers=Headers({}))
+
+    with pytest.raises(UploadTooLargeError):
+        await media_upload.upload_form_file(upload)
+    assert fake_uploader.attempts == []
+
+
+async def test_document_image_and_file_upload_side_by_side(fake_uploader):
+    db = FakeFirestore()
+    async with asgi_client(build_app(db, document_router)) as client:
+        response = await client.post(
+            "/createdocument/upload",
+            data={"name": "Consent form", "childid": "child-1"},
+            files={
+                "image": ("scan.png", photo((400, 300), "PNG"), "image/png"),
+                "file": ("form.pdf", b"%PDF-1.4 consent", "application/pdf"),
+            },
+        )
+
+    assert response.status_code == 200
+    assert fake_uploader.max_active == 2
+    stored = db.data(f"documents/{response.json()['id']}")
+    assert stored["image"].startswith("https://res.cloudinary.com/demo/image/upload/")
+    assert stored["file"].startswith("https://res.cloudinary.com/demo/raw/upload/")
+    assert b"%PDF-1.4 consent" in [attempt.content for attempt in fake_uploader.attempts]
+
+
+async def test_document_upload_past_the_limit_is_413(monkeypatch, fake_uploader):
+    monkeypatch.setattr(media_upload, "MAX_UPLOAD_BYTES", 1024)
+    async with asgi_client(build_app(FakeFirestore(), document_router)) as client:
+        response = await client.post(
+            "/createdocument/upload",
+            files={"file": ("big.pdf", b"x" * 2048, "application/pdf")},
+        )
+
+    assert response.status_code == 413
+    assert fake_uploader.attempts == []
+
+
+async def test_failed_base64_upload_keeps_its_error(fake_uploader):
+    fake_uploader.failures.append(cloudinary.exceptions.Error("Invalid image file"))
+    async with asgi_client(build_app(FakeFirestore(), document_router)) as client:
+        response = await client.post("/createdocument", json={
+            "name": "Consent form",
+            "file": "data:application/pdf;base64,JVBERi0xLjQ=",
+        })
+
+    assert (response.status_code, response.json()) == (500, {"detail": "File upload failed"})
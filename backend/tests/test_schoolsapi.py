@@ -0,0 +1,188 @@
+import copy
+import json
+import os
+
+import pytest
+import requests
+
+from services import geocoding, schoolsapi
+from tests.fakes import FakeSyncFirestore
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "schools_datagovsg.json")
+
+
+class RecordedSession:
+    """
+    Replays the recorded data.gov.sg records, a page at a time, and the
+    recorded OneMap replies, in place of a requests.Session.
+    """
+
+    def __init__(self, recording: dict):
+        self.records = recording["datastore"]["records"]
+        self.onemap = recording["onemap"]
+        self.onemap_down = False
+        self.fail_at_offset = None
+        self.calls = {"datastore": 0, "onemap": 0}
+
+    def get(self, url, params=None, timeout=None):
+        if url == schoolsapi.DATASTORE_URL:
+            self.calls["datastore"] += 1
+            offset, limit = params["offset"], params["limit"]
+            if offset == self.fail_at_offset:
+                raise requests.ConnectionError("connection reset by peer")
+            page = self.records[offset:offset + limit]
+            return self._reply({"success": True, "result": {"records": copy.deepcopy(page), "total": len(self.records), "limit": limit}})
+
+        assert url == geocoding.ONEMAP_SEARCH_URL
+        self.calls["onemap"] += 1
+        if self.onemap_down:
+            raise requests.ConnectionError("OneMap unreachable")
+        return self._reply(self.onemap.get(params["searchVal"], {"found": 0, "results": []}))
+
+    @staticmethod
+    def _reply(payload: dict):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(payload).encode("utf-8")
+        return response
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    # Three pages from the eight recorded schools, and small batches
+    monkeypatch.setattr(schoolsapi, "PAGE_SIZE", 3)
+    monkeypatch.setattr(schoolsapi, "BATCH_LIMIT", 2)
+
+
+@pytest.fixture
+def session():
+    with open(FIXTURE) as file:
+        return RecordedSession(json.load(file))
+
+
+@pytest.fixture
+def db():
+    return FakeSyncFirestore()
+
+
+@pytest.fixture
+def sync(db, session, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.json")
+    return lambda **kwargs: schoolsapi.preload_school_data(db, session, checkpoint_path=checkpoint, **kwargs)
+
+
+def school(db, name: str) -> dict:
+    return db.data(f"schoolapi/{schoolsapi.school_doc_id({'school_name': name})}")
+
+
+def test_first_run_writes_every_school_in_chunked_batches(sync, db, session):
+    stats = sync()
+
+    assert stats == {"fetched": 8, "written": 8, "unchanged": 0}
+    assert len(db.paths("schoolapi")) == 8
+    assert db.writes == 8
+    # Pages of 3, 3, 2 with at most 2 writes per batch
+    assert db.commits == 5
+    assert session.calls == {"datastore": 3, "onemap": 7}
+
+    admiralty = school(db, "ADMIRALTY PRIMARY SCHOOL")
+    assert (admiralty["latitude"], admiralty["longitude"]) == (1.4426347903311, 103.800040119743)
+    assert admiralty["content_hash"] == schoolsapi.content_hash(session.records[0])
+    assert "geocode_failed_hash" in school(db, "ST ANTHONY'S CANOSSIAN PRIMARY SCHOOL")
+    assert "latitude" not in school(db, "CHIJ (KELLOCK)")
+
+
+def test_unchanged_rerun_writes_nothing(sync, db, session):
+    sync()
+    db.reset_counts()
+    session.calls = {"datastore": 0, "onemap": 0}
+
+    stats = sync()
+
+    assert stats == {"fetched": 8, "written": 0, "unchanged": 8}
+    assert (db.writes, db.commits) == (0, 0)
+    # Stored hashes come from one query, and nothing is geocoded again
+    assert db.reads == 8
+    assert session.calls == {"datastore": 3, "onemap": 0}
+
+
+def test_only_changed_schools_are_rewritten(sync, db, session):
+    sync()
+    db.reset_counts()
+    session.calls["onemap"] = 0
+    session.records[2]["telephone_no"] = "64540000"
+    session.records[4]["postal_code"] = "544464"
+    session.onemap["544464"] = session.onemap.pop("544969")
+
+    stats = sync()
+
+    assert stats == {"fetched": 8, "written": 2, "unchanged": 6}
+    assert db.writes == 2
+    assert session.calls["onemap"] == 2
+    assert school(db, "AI TONG SCHOOL")["telephone_no"] == "64540000"
+    assert school(db, "ANCHOR GREEN PRIMARY SCHOOL")["postal_code"] == "544464"
+
+
+def test_moved_school_does_not_keep_its_old_coordinates(sync, db, session):
+    sync()
+    anchor, ai_tong = session.records[4], session.records[2]
+    assert "latitude" in school(db, "ANCHOR GREEN PRIMARY SCHOOL")
+
+    # New postal codes while OneMap is down, and one OneMap does not know
+    anchor["postal_code"] = "544464"
+    ai_tong["postal_code"] = "999999"
+    session.onemap["544464"] = session.onemap.pop("544969")
+    session.onemap_down = True
+    sync()
+    assert "latitude" not in school(db, "ANCHOR GREEN PRIMARY SCHOOL")
+    assert "longitude" not in school(db, "ANCHOR GREEN PRIMARY SCHOOL")
+
+    session.onemap_down = False
+    session.calls["onemap"] = 0
+    stats = sync()
+
+    # Anchor Green is looked up at its new address; Ai Tong has no location at all now
+    assert stats["written"] == 2
+    assert session.calls["onemap"] == 2
+    assert school(db, "ANCHOR GREEN PRIMARY SCHOOL")["latitude"] is not None
+    moved = school(db, "AI TONG SCHOOL")
+    assert "latitude" not in moved
+    assert moved["geocode_failed_hash"] == moved["content_hash"]
+    assert sync()["written"] == 0
+
+
+def test_schools_missed_while_onemap_was_down_are_geocoded_later(sync, db, session):
+    session.onemap_down = True
+    assert sync()["written"] == 8
+    assert "latitude" not in school(db, "ADMIRALTY PRIMARY SCHOOL")
+
+    # Still down: nothing changed, so nothing is rewritten
+    db.reset_counts()
+    assert sync() == {"fetched": 8, "written": 0, "unchanged": 8}
+    assert db.writes == 0
+
+    session.onemap_down = False
+    db.reset_counts()
+    stats = sync()
+
+    # The six with a location are filled in; the one OneMap cannot place is recorded as such
+    assert stats == {"fetched": 8, "written": 7, "unchanged": 1}
+    assert school(db, "ADMIRALTY PRIMARY SCHOOL")["latitude"] == 1.4426347903311
+    assert "geocode_failed_hash" in school(db, "ST ANTHONY'S CANOSSIAN PRIMARY SCHOOL")
+    assert sync()["written"] == 0
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(sync, db, session, tmp_path):
+    session.fail_at_offset = 6
+    assert sync() == {"fetched": 6, "written": 6, "unchanged": 0}
+    assert json.loads((tmp_path / "checkpoint.json").read_text()) == {"offset": 6}
+
+    session.fail_at_offset = None
+    session.calls["datastore"] = 0
+    db.reset_counts()
+    stats = sync(resume=True)
+
+    assert stats == {"fetched": 2, "written": 2, "unchanged": 0}
+    assert session.calls["datastore"] == 1
+    assert len(db.paths("schoolapi")) == 8
+    assert not (tmp_path / "checkpoint.json").exists()
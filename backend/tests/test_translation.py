@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+
+from controllers.translation_controller import router as translation_router
+from services import translation_service
+from services.cache import TTLCache
+from services.metrics import LatencyMetrics
+from services.singleflight import SingleFlight
+from tests.fakes import StubTranslationServer
+from tests.support import asgi_client
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    with StubTranslationServer() as server:
+        monkeypatch.setattr(translation_service, "TRANSLATE_URL", server.url)
+        monkeypatch.setattr(translation_service, "translation_cache", TTLCache(maxsize=100, ttl=60))
+        monkeypatch.setattr(translation_service, "upstream_metrics", LatencyMetrics())
+        monkeypatch.setattr(translation_service, "_translation_flight", SingleFlight())
+        monkeypatch.setattr(translation_service, "_batch_slots", asyncio.Semaphore(4))
+        monkeypatch.setattr(translation_service, "_client", None)
+        yield server
+
+
+@pytest.fixture
+async def client(upstream):
+    app = FastAPI()
+    app.include_router(translation_router)
+    async with asgi_client(app) as client:
+        yield client
+    await translation_service.close_client()
+
+
+async def translate(client, text, source="en", target="zh"):
+    response = await client.post("/translate", json={"text": text, "source": source, "target": target})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_repeat_translations_come_from_the_cache(client, upstream):
+    for _ in range(5):
+        assert await translate(client, "School closes early") == {"translatedText": "[zh] School closes early"}
+    assert await translate(client, "School closes early", target="ms") == {"translatedText": "[ms] School closes early"}
+
+    assert len(upstream.requests) == 2
+    metrics = (await client.get("/translate/metrics")).json()
+    assert (metrics["cache"]["hits"], metrics["cache"]["misses"]) == (4, 2)
+    assert metrics["upstream"]["requests"] == 2
+    assert metrics["upstream"]["latency_ms_p50"] is not None
+
+
+async def test_concurrent_identical_requests_share_one_upstream_call(client, upstream):
+    upstream.delay = 0.2
+    replies = await asyncio.gather(*(translate(client, "Sports day on Friday") for _ in range(20)))
+
+    assert all(reply == {"translatedText": "[zh] Sports day on Friday"} for reply in replies)
+    assert len(upstream.requests) == 1
+
+
+async def test_pooled_client_reuses_its_connection(client, upstream):
+    for i in range(10):
+        await translate(client, f"message {i}")
+    assert len(upstream.requests) == 10
+    assert upstream.connections == 1
+
+
+async def test_failures_are_reported_and_not_cached(client, upstream):
+    for _ in range(2):
+        reply = await translate(client, "fail: boom")
+        assert reply["error"] == "Translation API failed with status 500"
+        assert "upstream exploded" in reply["detail"]
+
+        reply = await translate(client, "empty: reply")
+        assert reply["error"] == "Translation API returned no translation"
+
+    assert len(upstream.requests) == 4
+    metrics = (await client.get("/translate/metrics")).json()
+    assert metrics["cache"]["size"] == 0
+    assert metrics["upstream"]["errors"] == 4
+
+
+async def test_same_language_skips_upstream(client, upstream):
+    assert await translate(client, "Hello", source="en", target="en") == {"translatedText": "Hello"}
+    assert upstream.requests == []
+
+
+async def test_batch_dedupes_and_isolates_failures(client, upstream):
+    await translate(client, "cached already", target="ta")
+    upstream.requests.clear()
+
+    response = await client.post("/translate/batch", json={
+        "texts": ["a", "b", "a", "fail: c", "cached already", "b"],
+        "source": "en",
+        "target": "ta",
+    })
+
+    assert response.json()["results"] == [
+        {"translatedText": "[ta] a"},
+        {"translatedText": "[ta] b"},
+        {"translatedText": "[ta] a"},
+        {"error": 'Translation API failed with status 500: {"error": "upstream exploded"}'},
+        {"translatedText": "[ta] cached already"},
+        {"translatedText": "[ta] b"},
+    ]
+    assert sorted(request["text"] for request in upstream.requests) == ["a", "b", "fail: c"]
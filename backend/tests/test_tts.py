@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+
+from controllers import tts_controller
+from controllers.tts_controller import router as tts_router
+from services import tts_service
+from services.singleflight import SingleFlight
+from tests.fakes import FakeTTSClient
+from tests.support import asgi_client
+
+pytestmark = pytest.mark.anyio
+
+MAX_CONCURRENCY = 2
+MAX_QUEUE = 3
+
+
+@pytest.fixture
+def tts_client(monkeypatch, tmp_path):
+    client = FakeTTSClient(gated=True)
+    monkeypatch.setattr(tts_service, "tts_client", client)
+    monkeypatch.setattr(tts_service, "synthesis_limiter", tts_service.SynthesisLimiter(MAX_CONCURRENCY, MAX_QUEUE))
+    monkeypatch.setattr(tts_service, "audio_cache", tts_service.AudioCache(str(tmp_path), 1024 * 1024))
+    monkeypatch.setattr(tts_service, "_synthesis_flight", SingleFlight())
+    # The controller imported these names directly
+    monkeypatch.setattr(tts_controller, "synthesis_limiter", tts_service.synthesis_limiter)
+    monkeypatch.setattr(tts_controller, "audio_cache", tts_service.audio_cache)
+    yield client
+    client.release()
+
+
+@pytest.fixture
+async def client(tts_client):
+    app = FastAPI()
+    app.include_router(tts_router)
+    async with asgi_client(app) as client:
+        yield client
+
+
+async def queue_stats(client) -> dict:
+    return (await client.get("/speak/stats")).json()["queue"]
+
+
+async def wait_for(client, predicate):
+    for _ in range(200):
+        stats = await queue_stats(client)
+        if predicate(stats):
+            return stats
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Queue never reached the expected state: {stats}")
+
+
+async def test_burst_is_queued_then_shed_while_other_endpoints_respond(client, tts_client):
+    burst = [
+        asyncio.ensure_future(client.post("/speak", json={"text": f"sentence {i}"}))
+        for i in range(MAX_CONCURRENCY + MAX_QUEUE)
+    ]
+    stats = await wait_for(client, lambda s: s["active"] == MAX_CONCURRENCY and s["queued"] == MAX_QUEUE)
+
+    # Synthesis is stuck in the executor, yet the event loop answers at once
+    started = time.perf_counter()
+    await queue_stats(client)
+    assert time.perf_counter() - started < 0.5
+
+    overflow = await client.post("/speak", json={"text": "one too many"})
+    assert overflow.status_code == 429
+    assert overflow.headers["Retry-After"] == "1"
+
+    tts_client.release()
+    responses = await asyncio.gather(*burst)
+    assert [response.status_code for response in responses] == [200] * len(burst)
+    assert all("/static/audio/" in response.json()["audio_url"] for response in responses)
+
+    stats = await queue_stats(client)
+    assert (stats["active"], stats["queued"]) == (0, 0)
+    assert (stats["completed"], stats["rejected"]) == (len(burst), 1)
+
+
+async def test_identical_requests_synthesize_once(client, tts_client):
+    requests = [client.post("/speak", json={"text": "same", "language_code": "en-GB"}) for _ in range(10)]
+    pending = asyncio.ensure_future(asyncio.gather(*requests))
+    await wait_for(client, lambda s: s["active"] == 1)
+    tts_client.release()
+
+    urls = {response.json()["audio_url"] for response in await pending}
+    assert len(urls) == 1
+    assert tts_client.calls == 1
+
+    cached = await client.post("/speak", json={"text": "same", "language_code": "en-GB"})
+    assert cached.json()["audio_url"] in urls
+    assert tts_client.calls == 1
+
+
+async def test_cancelled_request_stays_counted_until_its_job_finishes(client, tts_client):
+    limiter = tts_service.synthesis_limiter
+    jobs = [asyncio.ensure_future(limiter.run(tts_service.synthesize, f"text {i}", "en-US")) for i in range(4)]
+    await wait_for(client, lambda s: s["active"] == MAX_CONCURRENCY)
+
+    for job in jobs:
+        job.cancel()
+    await asyncio.sleep(0.05)
+    # Queued jobs are dropped with their callers, but the two already
+    # synthesizing keep their slots until the threads are done
+    assert limiter.pending == MAX_CONCURRENCY
+
+    tts_client.release()
+    await wait_for(client, lambda s: s["completed"] == MAX_CONCURRENCY)
+    assert limiter.pending == 0
+
+
+async def test_streaming_mode_returns_audio_for_every_sentence(client, tts_client):
+    tts_client.release()
+    response = await client.post("/speak", json={"text": "One. Two! Three?", "stream": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == b"ID3:en-US:One.ID3:en-US:Two!ID3:en-US:Three?"
@@ -18,6 +18,9 @@ def add_class():
         ],
         "homework" : [],
         "subteachers": [],
+        # Languages announcements and homework are pre-translated into;
+        # leave out to use every language the app offers
+        "languages": ["en", "zh", "ms", "ta"],
 
     }
 
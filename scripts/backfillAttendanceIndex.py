@@ -0,0 +1,47 @@
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+# === Firebase Setup ===
+cred = credentials.Certificate("../backend/serviceAccountKey.json")  # Adjust path if needed
+firebase_admin.initialize_app(cred)
+db = firestore.client()
+
+# === Constants ===
+INDEX_COLLECTION = "attendance_by_child"
+BATCH_LIMIT = 500  # Firestore max writes per batch
+
+def backfill_attendance_index():
+    # 🔍 Build childid -> present dates from every attendance day
+    dates_by_child = {}
+    all_dates = []
+
+    for doc in db.collection("attendance").stream():
+        data = doc.to_dict()
+        all_dates.append(doc.id)
+        # Covers both the records map and not-yet-migrated children lists;
+        # a record marked absent overrides the child's place in the list
+        records = data.get("records", {})
+        present = {child_id for child_id, record in records.items() if not record.get("absent")}
+        present |= {child_id for child_id in data.get("children", []) if child_id not in records}
+        for child_id in present:
+            dates_by_child.setdefault(child_id, set()).add(doc.id)
+
+    # 🔄 Write the per-child index docs in batches
+    batch = db.batch()
+    pending = 0
+    for child_id, dates in dates_by_child.items():
+        batch.set(db.collection(INDEX_COLLECTION).document(child_id), {"dates": list(dates)})
+        pending += 1
+        if pending == BATCH_LIMIT:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    batch.set(db.collection("attendance_meta").document("days"), {"dates": all_dates})
+    batch.commit()
+
+    print(f"✅ Indexed {len(all_dates)} attendance days for {len(dates_by_child)} children.")
+
+# ✅ Run it
+if __name__ == "__main__":
+    backfill_attendance_index()
@@ -0,0 +1,44 @@
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+# === Firebase Setup ===
+cred = credentials.Certificate("../backend/serviceAccountKey.json")  # Adjust path if needed
+firebase_admin.initialize_app(cred)
+db = firestore.client()
+
+def migrate_attendance_records():
+    # 🔄 Fold the parallel children/childrenimage lists into the per-child records map
+    migrated = 0
+    for doc in db.collection("attendance").stream():
+        data = doc.to_dict()
+        if "children" not in data and "childrenimage" not in data:
+            continue
+
+        # scripts/addAttendance.py dropped "null" images but kept the children,
+        # so a child without a matching image still counts as present
+        children = data.get("children", [])
+        images = data.get("childrenimage", [])
+        images = images + ["null"] * (len(children) - len(images))
+
+        # Children already in the records map (present or marked absent) win
+        existing = data.get("records", {})
+        records = {
+            child_id: {"image": image}
+            for child_id, image in zip(children, images)
+            if child_id not in existing
+        }
+
+        doc.reference.set({
+            "records": records,
+            "children": firestore.DELETE_FIELD,
+            "childrenimage": firestore.DELETE_FIELD,
+        }, merge=True)
+
+        migrated += 1
+        print(f"🧹 Migrated attendance doc {doc.id}")
+
+    print(f"✅ Migrated {migrated} attendance docs to the records map.")
+
+# ✅ Run it
+if __name__ == "__main__":
+    migrate_attendance_records()